@@ -1,14 +1,83 @@
+import re
+import socket
+import time
+from contextlib import contextmanager
 from email import message_from_string
+from email.header import decode_header, make_header
+from email.parser import BytesHeaderParser
+from email.utils import parseaddr
 
 import frappe
 from frappe import _
 from frappe.email.doctype.email_account.email_account import EmailAccount
-from frappe.email.receive import InboundMail
+from frappe.email.receive import (
+    EmailTimeoutError,
+    InboundMail,
+    LoginLimitExceeded,
+    TotalSizeExceededError,
+)
 from frappe.utils import cint
 from frappe.utils.password import set_encrypted_password
 
+from helpdesk.overrides import imap_pool
+
+# Envelope headers pulled by the header-only prefetch pass (get_inbound_mails(prefilter=...)).
+PREFETCH_HEADER_FIELDS = ("FROM", "SUBJECT", "MESSAGE-ID", "X-AUTO-GENERATED")
+
+# Mirrors the per-folder cap in EmailServer.get_messages.
+IMAP_FETCH_LIMIT = 100
+
+_UID_RE = re.compile(rb"UID (\d+)")
+
+
+def _decode_header_value(value) -> str:
+    if not value:
+        return ""
+    try:
+        return str(make_header(decode_header(value)))
+    except Exception:
+        return str(value)
+
+
+@contextmanager
+def _stage_timer(timings: dict, stage: str):
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + (time.monotonic() - started)
+
+
+def parse_header_fetch(data) -> list[dict]:
+    """Parse a `UID FETCH ... BODY.PEEK[HEADER.FIELDS (...)]` response into envelope metas.
+
+    Keys match the poller's mail identity (uid, message_id, from, subject) plus auto_generated.
+    """
+    metas = []
+    for item in data or []:
+        if not isinstance(item, tuple) or len(item) < 2:
+            continue
+        match = _UID_RE.search(item[0] or b"")
+        if not match:
+            continue
+        headers = BytesHeaderParser().parsebytes(item[1] or b"")
+        metas.append(
+            {
+                "uid": match.group(1).decode(),
+                "message_id": (headers.get("Message-ID") or "").strip(" <>") or None,
+                "from": parseaddr(_decode_header_value(headers.get("From")))[1] or None,
+                "subject": _decode_header_value(headers.get("Subject")),
+                "auto_generated": bool(headers.get("X-Auto-Generated")),
+            }
+        )
+    return metas
+
 
 class CustomEmailAccount(EmailAccount):
+    # Lets callers (telephony inbox poller) know get_inbound_mails accepts prefilter= / limit=.
+    supports_header_prefetch = True
+    supports_fetch_limit = True
+
     @property
     def host(self):
         # Frappe EmailServer expects settings.host
@@ -66,9 +135,86 @@ class CustomEmailAccount(EmailAccount):
     def set_password(self, fieldname, password):
         set_encrypted_password(self.doctype, self.name, password, fieldname=fieldname)
 
-    def get_inbound_mails(self) -> list[InboundMail]:
-        """retrive and return inbound mails."""
+    def _get_imap_messages_selective(self, email_server, folder, prefilter=None, limit=None) -> dict:
+        """IMAP fetch that only downloads the bodies the caller wants.
+
+        prefilter(metas): envelope headers are fetched first and the callable returns the
+        UIDs to skip; X-Auto-Generated mails are always skipped.
+        limit: download at most this many bodies; the rest stay untouched on the server and
+        are reported as `backlog` for the next poll.
+        Returns the same shape as EmailServer.get_messages(), plus `backlog`.
+        """
+        if not hasattr(email_server, "get_new_mails") or not hasattr(email_server, "retrieve_message"):
+            return email_server.get_messages(folder=folder) or {}
+
+        new_uids = email_server.get_new_mails(folder) or []
+        uid_list = new_uids[:IMAP_FETCH_LIMIT]
+        backlog = len(new_uids) - len(uid_list)
+        email_server.latest_messages = []
+        email_server.seen_status = {}
+        if not uid_list:
+            return {"latest_messages": [], "uid_list": [], "seen_status": {}, "backlog": backlog}
+
+        imap = email_server.imap
+        skip = set()
+        if prefilter:
+            _, data = imap.uid(
+                "fetch",
+                b",".join(uid_list),
+                f"(BODY.PEEK[HEADER.FIELDS ({' '.join(PREFETCH_HEADER_FIELDS)})])",
+            )
+            metas = parse_header_fetch(data)
+            skip = {m["uid"] for m in metas if m["auto_generated"]}
+            skip |= set(prefilter([m for m in metas if not m["auto_generated"]]) or [])
+
+        # Anything the header pass could not parse is fetched in full (fail open).
+        fetched = []
+        skipped = []
+        wanted = 0
+        stalled = False
+        for index, uid in enumerate(uid_list):
+            if frappe.safe_decode(uid) in skip:
+                skipped.append(uid)
+                continue
+            wanted += 1
+            if stalled or (limit is not None and wanted > limit):
+                backlog += 1
+                continue
+            before = len(email_server.latest_messages)
+            try:
+                email_server.retrieve_message(uid, index + 1)
+            except (socket.timeout, EmailTimeoutError, LoginLimitExceeded, TotalSizeExceededError):
+                # As EmailServer.get_messages: keep what was retrieved, leave the rest for the next poll.
+                stalled = True
+                backlog += 1
+                continue
+            if len(email_server.latest_messages) > before:
+                fetched.append(uid)
+
+        if skipped and email_server.settings.email_sync_rule == "UNSEEN":
+            # retrieve_message would have flagged these; keep the UNSEEN search from re-finding them.
+            imap.uid("STORE", b",".join(skipped), "+FLAGS", "(\\SEEN)")
+
+        return {
+            "latest_messages": email_server.latest_messages,
+            "uid_list": fetched,
+            "seen_status": email_server.seen_status,
+            "uid_reindexed": getattr(email_server, "uid_reindexed", False),
+            "backlog": backlog,
+        }
+
+    def get_inbound_mails(self, prefilter=None, limit=None) -> list[InboundMail]:
+        """retrive and return inbound mails.
+
+        prefilter: optional callable for IMAP accounts; gets the envelope headers of each
+        new mail and returns the UIDs to skip before their bodies are downloaded.
+        limit: optional cap on bodies downloaded per IMAP folder. Mails left on the server
+        are counted in `self.flags.inbound_backlog`.
+        Seconds spent per stage (connect / fetch / parse) land in `self.flags.inbound_timings`.
+        """
         mails = []
+        self.flags.inbound_backlog = 0
+        timings = self.flags.inbound_timings = {}
 
         def process_mail(messages, append_to=None):
             for index, message in enumerate(messages.get("latest_messages", [])):
@@ -110,41 +256,78 @@ class CustomEmailAccount(EmailAccount):
         if not self.enable_incoming:
             return []
 
+        # Pooled sessions stay logged in between polls (see imap_pool); POP3 is never pooled.
+        pooled = bool(self.use_imap) and self.service != "Frappe Mail" and imap_pool.enabled()
+
         try:
             if self.service == "Frappe Mail":
                 frappe_mail_client = self.get_frappe_mail_client()
-                messages = frappe_mail_client.pull_raw(
-                    last_received_at=self.last_synced_at
-                )
-                process_mail(messages)
+                with _stage_timer(timings, "fetch"):
+                    messages = frappe_mail_client.pull_raw(
+                        last_received_at=self.last_synced_at
+                    )
+                with _stage_timer(timings, "parse"):
+                    process_mail(messages)
                 self.db_set(
                     "last_synced_at", messages["last_received_at"], update_modified=False
                 )
             else:
                 email_sync_rule = self.build_email_sync_rule()
-                email_server = self.get_incoming_server(
-                    in_receive=True, email_sync_rule=email_sync_rule
-                )
+                with _stage_timer(timings, "connect"):
+                    if pooled:
+                        email_server = imap_pool.acquire(self, email_sync_rule)
+                    else:
+                        email_server = self.get_incoming_server(
+                            in_receive=True, email_sync_rule=email_sync_rule
+                        )
                 if self.use_imap:
                     # process all given imap folder
                     for folder in self.imap_folder:
-                        if email_server.select_imap_folder(folder.folder_name):
+                        with _stage_timer(timings, "connect"):
+                            selected = email_server.select_imap_folder(folder.folder_name)
+                            if (
+                                selected
+                                and pooled
+                                and imap_pool.check_uidvalidity(self, folder.folder_name, email_server)
+                            ):
+                                # Mailbox was recreated under the pooled session: start clean.
+                                imap_pool.discard(self)
+                                email_server = imap_pool.acquire(self, email_sync_rule)
+                                selected = email_server.select_imap_folder(folder.folder_name)
+                                imap_pool.check_uidvalidity(self, folder.folder_name, email_server)
+                        if selected:
                             email_server.settings["uid_validity"] = folder.uidvalidity
-                            messages = (
-                                email_server.get_messages(
-                                    folder=f'"{folder.folder_name}"'
-                                )
-                                or {}
-                            )
-                            process_mail(messages, folder.append_to)
+                            with _stage_timer(timings, "fetch"):
+                                if prefilter or limit is not None:
+                                    messages = self._get_imap_messages_selective(
+                                        email_server, f'"{folder.folder_name}"', prefilter, limit
+                                    )
+                                    self.flags.inbound_backlog += messages.get("backlog", 0)
+                                else:
+                                    messages = (
+                                        email_server.get_messages(
+                                            folder=f'"{folder.folder_name}"'
+                                        )
+                                        or {}
+                                    )
+                            with _stage_timer(timings, "parse"):
+                                process_mail(messages, folder.append_to)
                 else:
                     # process the pop3 account
-                    messages = email_server.get_messages() or {}
-                    process_mail(messages)
+                    with _stage_timer(timings, "fetch"):
+                        messages = email_server.get_messages() or {}
+                    with _stage_timer(timings, "parse"):
+                        process_mail(messages)
 
-                # close connection to mailserver
-                email_server.logout()
+                # close connection to mailserver (pooled sessions stay open for the next poll)
+                with _stage_timer(timings, "connect"):
+                    if pooled:
+                        imap_pool.release(self)
+                    else:
+                        email_server.logout()
         except Exception:
+            if pooled:
+                imap_pool.discard(self)
             self.log_error(
                 title=_("Error while connecting to email account {0}").format(self.name)
             )
@@ -0,0 +1,148 @@
+"""Per-process pool of authenticated IMAP sessions, keyed by site + Email Account.
+
+Used by CustomEmailAccount.get_inbound_mails when site config `telephony_imap_pool` is 1.
+It only pays off in processes that outlive a single poll (IMAP IDLE worker, non-forking
+workers); in a forked job the pool simply starts empty and behaves like a fresh connect.
+"""
+
+import time
+
+import frappe
+
+# Skip the NOOP probe when the session was used this recently.
+NOOP_AFTER_SECONDS = 5
+
+# RFC 3501 servers may drop idle sessions after 30 minutes; reconnect before that.
+MAX_IDLE_SECONDS = 25 * 60
+
+_SESSIONS: dict = {}
+
+
+class _Session:
+    __slots__ = ("server", "fingerprint", "last_used", "uidvalidity")
+
+    def __init__(self, server, fingerprint):
+        self.server = server
+        self.fingerprint = fingerprint
+        self.last_used = time.monotonic()
+        self.uidvalidity = {}
+
+
+def enabled() -> bool:
+    try:
+        v = frappe.conf.get("telephony_imap_pool")
+    except Exception:
+        v = None
+    try:
+        return int(v or 0) == 1
+    except Exception:
+        return bool(v)
+
+
+def _key(account) -> tuple:
+    return (getattr(frappe.local, "site", None), account.name)
+
+
+def _fingerprint(account) -> tuple:
+    # Any saved change to the account (server, port, login, password) bumps `modified`.
+    return (
+        str(account.get("modified")),
+        account.get("email_server"),
+        account.get("incoming_port"),
+        account.get("login_id") or account.get("email_id"),
+    )
+
+
+def _logout(server) -> None:
+    try:
+        server.logout()
+    except Exception:
+        pass
+
+
+def _alive(session: _Session) -> bool:
+    idle = time.monotonic() - session.last_used
+    if idle > MAX_IDLE_SECONDS:
+        return False
+    if idle < NOOP_AFTER_SECONDS:
+        return True
+    try:
+        typ, _ = session.server.imap.noop()
+        return typ == "OK"
+    except Exception:
+        return False
+
+
+def acquire(account, email_sync_rule):
+    """Return a live, logged-in EmailServer for `account`, reusing a pooled one if possible."""
+    key = _key(account)
+    session = _SESSIONS.get(key)
+    if session is not None:
+        if session.fingerprint == _fingerprint(account) and _alive(session):
+            # Sync rule moves every poll (UID ranges for ALL sync); refresh it on the reused session.
+            session.server.settings["email_sync_rule"] = email_sync_rule
+            session.last_used = time.monotonic()
+            return session.server
+        discard(account)
+
+    server = account.get_incoming_server(in_receive=True, email_sync_rule=email_sync_rule)
+    _SESSIONS[key] = _Session(server, _fingerprint(account))
+    return server
+
+
+def release(account) -> None:
+    """Mark the pooled session idle (instead of logging out)."""
+    session = _SESSIONS.get(_key(account))
+    if session is not None:
+        session.last_used = time.monotonic()
+
+
+def discard(account) -> None:
+    """Drop and log out the pooled session; the next acquire() reconnects."""
+    session = _SESSIONS.pop(_key(account), None)
+    if session is not None:
+        _logout(session.server)
+
+
+def check_uidvalidity(account, folder_name, server) -> bool:
+    """Compare the UIDVALIDITY from the last SELECT with what this session saw before.
+
+    Reads the untagged SELECT response (no extra round-trip). Returns True when the
+    mailbox was recreated under a live session; the caller should discard + reconnect so
+    Frappe's own uidvalidity resync runs against a fresh session.
+    """
+    session = _SESSIONS.get(_key(account))
+    if session is None:
+        return False
+    try:
+        _, data = server.imap.response("UIDVALIDITY")
+        current = frappe.safe_decode(data[0]) if data and data[0] else None
+    except Exception:
+        return False
+    if not current:
+        return False
+    previous = session.uidvalidity.get(folder_name)
+    session.uidvalidity[folder_name] = current
+    return previous is not None and previous != current
+
+
+def keepalive() -> dict:
+    """NOOP every pooled session on this site; drop the ones that fail. For long-lived workers."""
+    site = getattr(frappe.local, "site", None)
+    out = {"alive": 0, "dropped": 0}
+    for key, session in list(_SESSIONS.items()):
+        if key[0] != site:
+            continue
+        try:
+            typ, _ = session.server.imap.noop()
+            ok = typ == "OK"
+        except Exception:
+            ok = False
+        if ok:
+            session.last_used = time.monotonic()
+            out["alive"] += 1
+        else:
+            _SESSIONS.pop(key, None)
+            _logout(session.server)
+            out["dropped"] += 1
+    return out
@@ -0,0 +1,95 @@
+import click
+from frappe.commands import get_site, pass_context
+
+
+@click.command("telectro-imap-idle")
+@click.option(
+    "--account",
+    "accounts",
+    multiple=True,
+    help="Pilot inbox to watch (repeatable). Defaults to all poller accounts.",
+)
+@pass_context
+def telectro_imap_idle(context, accounts=None):
+    """Run the IMAP IDLE intake worker in the foreground (for supervisor / compose)."""
+    from telephony.jobs.imap_idle_worker import run_worker
+
+    run_worker(get_site(context), accounts=list(accounts) or None)
+
+
+@click.command("telectro-backfill-partner-notes")
+@click.option("--no-commit", is_flag=True, default=False, help="Roll back instead of committing.")
+@pass_context
+def telectro_backfill_partner_notes(context, no_commit=False):
+    """Rebuild the TELECTRO Partner Note store from existing HD Ticket Comments."""
+    import frappe
+
+    from telephony.partner_notes import backfill
+
+    frappe.init(site=get_site(context))
+    frappe.connect()
+    try:
+        result = backfill(commit=not no_commit)
+        if no_commit:
+            frappe.db.rollback()
+        click.echo(f"partner notes: {result['notes']} note(s) across {result['tickets']} ticket(s)")
+    finally:
+        frappe.destroy()
+
+
+@click.command("telectro-rebuild-fault-rollup")
+@click.option("--from-date", default=None, help="First creation day (YYYY-MM-DD). Omit both dates for a full backfill.")
+@click.option("--to-date", default=None, help="Last creation day (YYYY-MM-DD). Defaults to today.")
+@pass_context
+def telectro_rebuild_fault_rollup(context, from_date=None, to_date=None):
+    """Rebuild TELECTRO Fault Daily Rollup rows from HD Ticket."""
+    import frappe
+    from frappe.utils import nowdate
+
+    from telephony.fault_rollup import backfill, rebuild
+
+    frappe.init(site=get_site(context))
+    frappe.connect()
+    try:
+        if from_date:
+            result = rebuild(from_date, to_date or nowdate())
+        else:
+            result = backfill()
+        click.echo(f"fault rollup: {result['rows']} row(s) from {result['from_date']} to {result['to_date']}")
+    finally:
+        frappe.destroy()
+
+
+@click.command("telectro-check-fault-rollup")
+@click.option("--from-date", default=None, help="First creation day (YYYY-MM-DD). Defaults to 31 days ago.")
+@click.option("--to-date", default=None, help="Last creation day (YYYY-MM-DD). Defaults to today.")
+@pass_context
+def telectro_check_fault_rollup(context, from_date=None, to_date=None):
+    """Compare TELECTRO Fault Daily Rollup with a fresh HD Ticket aggregate (read-only)."""
+    import frappe
+
+    from telephony.fault_rollup import check_consistency
+
+    frappe.init(site=get_site(context))
+    frappe.connect()
+    try:
+        result = check_consistency(from_date, to_date)
+        click.echo(
+            f"fault rollup {result['from_date']}..{result['to_date']}: "
+            f"{'ok' if result['ok'] else 'DRIFT'} - {result['rows']} expected row(s), "
+            f"{result['missing']} missing, {result['stale']} stale, {result['extra']} extra"
+        )
+        for day in result["mismatched_days"]:
+            click.echo(f"  mismatched day: {day}")
+        if not result["ok"]:
+            raise SystemExit(1)
+    finally:
+        frappe.destroy()
+
+
+commands = [
+    telectro_imap_idle,
+    telectro_backfill_partner_notes,
+    telectro_rebuild_fault_rollup,
+    telectro_check_fault_rollup,
+]
@@ -1,6 +1,8 @@
 import frappe
 from frappe import _
 
+from telephony.ticket_context import get_ticket_context
+
 
 _INTERNAL_FINALISATION_ROLES = {
     "System Manager",
@@ -35,10 +37,12 @@ def prevent_customer_portal_ticket_closure(doc, method=None):
     if frappe.session.user in ("Administrator", "Guest"):
         return
 
-    if _is_internal_finalisation_user():
+    ctx = get_ticket_context(doc)
+
+    if _is_internal_finalisation_user(ctx):
         return
 
-    if not _is_customer_portal_context(doc):
+    if not _is_customer_portal_context(doc, ctx):
         return
 
     frappe.throw(
@@ -49,21 +53,18 @@ def prevent_customer_portal_ticket_closure(doc, method=None):
     )
 
 
-def _is_internal_finalisation_user() -> bool:
-    roles = set(frappe.get_roles(frappe.session.user))
-    return bool(roles.intersection(_INTERNAL_FINALISATION_ROLES))
+def _is_internal_finalisation_user(ctx) -> bool:
+    return bool(ctx.roles().intersection(_INTERNAL_FINALISATION_ROLES))
 
 
-def _is_customer_portal_context(doc) -> bool:
+def _is_customer_portal_context(doc, ctx) -> bool:
     if doc.get("via_customer_portal"):
         return True
 
     if (doc.get("custom_request_source") or "").strip() == "Customer":
         return True
 
-    roles = set(frappe.get_roles(frappe.session.user))
-    if "Customer" in roles:
+    if "Customer" in ctx.roles():
         return True
 
-    user_type = frappe.db.get_value("User", frappe.session.user, "user_type")
-    return user_type == "Website User"
+    return ctx.user_type() == "Website User"
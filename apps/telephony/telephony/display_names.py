@@ -0,0 +1,37 @@
+import frappe
+
+
+def get_display_names(doctype: str, names, display_fields) -> dict:
+    """
+    Batched report display labels: {name: label} with one query per doctype.
+
+    Same precedence as the per-row get_display_value() helpers in the reports:
+    blank -> "-", missing record -> name, then the first non-empty display field,
+    then the doctype title_field, then the name itself.
+    """
+    wanted = {(n or "").strip() for n in (names or [])}
+    out = {"": "-"} if "" in wanted else {}
+    wanted.discard("")
+    if not wanted:
+        return out
+
+    meta = frappe.get_meta(doctype)
+    fields = [f for f in display_fields if meta.has_field(f)]
+    title_field = meta.title_field
+    if title_field and title_field not in fields and meta.has_field(title_field):
+        fields.append(title_field)
+
+    rows = frappe.get_all(
+        doctype,
+        filters={"name": ["in", sorted(wanted)]},
+        fields=["name", *fields],
+        limit_page_length=0,
+        ignore_permissions=True,
+    )
+    found = {row.name: row for row in rows}
+
+    for name in wanted:
+        row = found.get(name)
+        label = next((row.get(f) for f in fields if row and row.get(f)), None)
+        out[name] = label or name
+    return out
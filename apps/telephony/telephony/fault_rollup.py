@@ -0,0 +1,519 @@
+"""
+Daily fault rollup behind TELECTRO Repeat Faults by Location.
+
+TELECTRO Fault Daily Rollup holds one row per creation day and (account, campus, fault
+point, fault asset, service area, fault category, severity), with the fault and status
+counts, the first/last creation and the latest ticket of that group. Rows are named
+TFR-<day>-<digest of the dimensions>, so a day and group always map to the same row.
+
+HD Ticket hooks keep the rollup current: after_insert queues the new ticket's group,
+on_update queues the old and new group whenever a TRACKED_FIELDS value changed,
+after_delete queues the group the ticket left. Queued (day, group) pairs are deduplicated
+per request and recomputed after the ticket's transaction commits, so the shared rollup
+row is never locked by a ticket save and every recompute sees committed tickets. Each
+recompute is one query over a single day of tickets, upserted into the row. Days from
+built_from() onwards are read from the rollup; earlier days, and every day until the
+first backfill, are aggregated from HD Ticket with the same SQL. Both paths filter
+creation on a half-open datetime range, never date(creation), so the creation index
+stays usable.
+
+backfill() builds every day and sets built_from; after_migrate runs it once, rebuild()
+replaces any range. The daily reconcile_recent() job runs check_consistency() over the
+last REFRESH_DAYS days, plus every older day holding a ticket modified since its previous
+run, and rebuilds days that drifted. Writes that skip both the hooks and `modified`
+(update_modified=False, raw SQL, raw deletes) on tickets older than REFRESH_DAYS are only
+repaired by telectro-rebuild-fault-rollup. `bench --site <site>
+telectro-rebuild-fault-rollup` and `telectro-check-fault-rollup` are the manual entry
+points.
+"""
+
+import hashlib
+
+import frappe
+from frappe.utils import add_days, cint, get_datetime, getdate, now_datetime, nowdate
+
+DOCTYPE = "TELECTRO Fault Daily Rollup"
+
+REFRESH_DAYS = 31
+
+BUILT_FROM_KEY = "telectro_fault_rollup_built_from"
+
+RECONCILED_AT_KEY = "telectro_fault_rollup_reconciled_at"
+
+_LOCAL_ATTR = "telectro_fault_rollup_groups"
+
+# (rollup field, HD Ticket expression). The account falls back to the standard customer
+# field, matching what the report shows.
+DIMENSIONS = (
+    ("customer", "coalesce(nullif(t.custom_customer, ''), t.customer, '')"),
+    ("campus", "coalesce(t.custom_site_group, '')"),
+    ("site", "coalesce(t.custom_site, '')"),
+    ("fault_asset", "coalesce(t.custom_fault_asset, '')"),
+    ("service_area", "coalesce(t.custom_service_area, '')"),
+    ("fault_category", "coalesce(t.custom_fault_category, '')"),
+    ("severity", "coalesce(t.custom_severity, '')"),
+)
+
+DIMENSION_FIELDS = tuple(field for field, _expr in DIMENSIONS)
+
+# Report filter key -> HD Ticket predicate for the raw path. Plain column equality
+# wherever the stored dimension is the column itself.
+TICKET_FILTERS = {
+    "customer": "coalesce(nullif(t.custom_customer, ''), t.customer) = %(customer)s",
+    "campus": "t.custom_site_group = %(campus)s",
+    "site": "t.custom_site = %(site)s",
+    "service_area": "t.custom_service_area = %(service_area)s",
+    "fault_category": "t.custom_fault_category = %(fault_category)s",
+    "severity": "t.custom_severity = %(severity)s",
+}
+
+# HD Ticket fields that move a ticket between rollup rows or status counts.
+TRACKED_FIELDS = (
+    "status",
+    "customer",
+    "custom_customer",
+    "custom_site_group",
+    "custom_site",
+    "custom_fault_asset",
+    "custom_service_area",
+    "custom_fault_category",
+    "custom_severity",
+)
+
+COUNT_FIELDS = ("fault_count", "open_count", "resolved_count", "archived_count")
+
+ROW_FIELDS = (
+    "rollup_date",
+    *DIMENSION_FIELDS,
+    *COUNT_FIELDS,
+    "first_ticket_on",
+    "last_ticket_on",
+    "last_ticket",
+)
+
+
+def day_range(from_date, to_date):
+    """Inclusive dates -> half-open [from 00:00, day after to_date 00:00) datetimes."""
+    start = get_datetime(getdate(from_date))
+    end = get_datetime(add_days(getdate(to_date), 1))
+    return start, end
+
+
+def rollup_name(rollup_date, row) -> str:
+    key = "\x1f".join(str(row.get(field) or "") for field in DIMENSION_FIELDS)
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    return f"TFR-{getdate(rollup_date).isoformat()}-{digest}"
+
+
+def ticket_dimensions(doc) -> dict:
+    """The DIMENSIONS of one HD Ticket (doc or dict), as aggregate_tickets() computes them."""
+    return {
+        "customer": doc.get("custom_customer") or doc.get("customer") or "",
+        "campus": doc.get("custom_site_group") or "",
+        "site": doc.get("custom_site") or "",
+        "fault_asset": doc.get("custom_fault_asset") or "",
+        "service_area": doc.get("custom_service_area") or "",
+        "fault_category": doc.get("custom_fault_category") or "",
+        "severity": doc.get("custom_severity") or "",
+    }
+
+
+def _aggregate(start, end, conditions=(), values=None) -> list:
+    dimensions = ",\n            ".join(f"{expr} as {field}" for field, expr in DIMENSIONS)
+    group_by = ", ".join(DIMENSION_FIELDS)
+    where = " and ".join(["t.creation >= %(start)s", "t.creation < %(end)s", *conditions])
+
+    return frappe.db.sql(
+        f"""
+        select
+            date(t.creation) as rollup_date,
+            {dimensions},
+            count(*) as fault_count,
+            sum(t.status = 'Open') as open_count,
+            sum(t.status = 'Resolved') as resolved_count,
+            sum(t.status = 'Archived') as archived_count,
+            min(t.creation) as first_ticket_on,
+            max(t.creation) as last_ticket_on,
+            substring_index(
+                group_concat(t.name order by t.creation desc, t.name desc separator '\\n'),
+                '\\n',
+                1
+            ) as last_ticket
+        from `tabHD Ticket` t
+        where {where}
+        group by rollup_date, {group_by}
+        """,
+        {"start": start, "end": end, **(values or {})},
+        as_dict=True,
+    )
+
+
+def aggregate_tickets(start, end, filters=None) -> list:
+    """
+    Rollup-shaped rows (one per creation day and dimension set) straight from HD Ticket,
+    for tickets created in [start, end).
+    """
+    filters = filters or {}
+    conditions = []
+    values = {}
+
+    for key, condition in TICKET_FILTERS.items():
+        if filters.get(key):
+            conditions.append(condition)
+            values[key] = filters.get(key)
+
+    return _aggregate(start, end, conditions, values)
+
+
+def _insert_rows(rows):
+    if not rows:
+        return
+
+    now = now_datetime()
+    user = frappe.session.user
+    fields = ["name", "creation", "modified", "owner", "modified_by", *ROW_FIELDS]
+    values = [
+        (
+            rollup_name(row.get("rollup_date"), row),
+            now,
+            now,
+            user,
+            user,
+            *(row.get(field) for field in ROW_FIELDS),
+        )
+        for row in rows
+    ]
+    frappe.db.bulk_insert(DOCTYPE, fields=fields, values=values)
+
+
+def rebuild(from_date, to_date, commit: bool = True) -> dict:
+    """Replace the rollup rows of [from_date, to_date] (inclusive) from HD Ticket."""
+    from_date, to_date = getdate(from_date), getdate(to_date)
+    if from_date > to_date:
+        return {"from_date": from_date, "to_date": to_date, "rows": 0}
+
+    rows = aggregate_tickets(*day_range(from_date, to_date))
+
+    frappe.db.delete(DOCTYPE, {"rollup_date": ["between", [from_date, to_date]]})
+    _insert_rows(rows)
+
+    if commit:
+        frappe.db.commit()
+
+    return {"from_date": from_date, "to_date": to_date, "rows": len(rows)}
+
+
+def _upsert_row(row):
+    """Insert the rollup row, or update its counts and latest ticket in place."""
+    now = now_datetime()
+    user = frappe.session.user
+    fields = ["name", "creation", "modified", "owner", "modified_by", *ROW_FIELDS]
+    updated = ["modified", "modified_by", *COUNT_FIELDS, "first_ticket_on", "last_ticket_on", "last_ticket"]
+
+    frappe.db.sql(
+        f"""
+        insert into `tab{DOCTYPE}` ({", ".join(f"`{field}`" for field in fields)})
+        values ({", ".join(["%s"] * len(fields))})
+        on duplicate key update {", ".join(f"`{field}` = values(`{field}`)" for field in updated)}
+        """,
+        (
+            rollup_name(row.get("rollup_date"), row),
+            now,
+            now,
+            user,
+            user,
+            *(row.get(field) for field in ROW_FIELDS),
+        ),
+    )
+
+
+def refresh_group(rollup_date, dimensions) -> int:
+    """Recompute one day of one dimension set from HD Ticket; drops the row when it is empty."""
+    conditions = [f"{expr} = %({field})s" for field, expr in DIMENSIONS]
+    values = {field: dimensions.get(field) or "" for field in DIMENSION_FIELDS}
+    rows = _aggregate(*day_range(rollup_date, rollup_date), conditions, values)
+
+    if not rows:
+        frappe.db.delete(DOCTYPE, {"name": rollup_name(rollup_date, values)})
+        return 0
+
+    for row in rows:
+        _upsert_row(row)
+    return len(rows)
+
+
+def built_from():
+    """First creation day the rollup covers; every later day is kept current by the hooks."""
+    value = frappe.db.get_global(BUILT_FROM_KEY)
+    return getdate(value) if value else None
+
+
+def backfill(commit: bool = True) -> dict:
+    """Build every day from the oldest ticket through today, then hand over to the hooks."""
+    today = getdate(nowdate())
+    oldest = frappe.db.sql("select min(creation) from `tabHD Ticket`")
+    first_day = getdate(oldest[0][0]) if oldest and oldest[0][0] else today
+
+    result = rebuild(first_day, today, commit=False)
+
+    frappe.db.set_global(BUILT_FROM_KEY, str(first_day))
+    if commit:
+        frappe.db.commit()
+    return result
+
+
+def after_migrate():
+    """Seed the rollup once, on the first migrate after the DocType is installed."""
+    if built_from():
+        return None
+
+    result = backfill()
+    frappe.logger("telephony").info(
+        "Fault rollup seeded: %s row(s) from %s to %s",
+        result["rows"],
+        result["from_date"],
+        result["to_date"],
+    )
+    return result
+
+
+# ------------------
+# HD Ticket hooks
+# ------------------
+
+def _maintained_day(doc):
+    start = built_from()
+    if not start or not doc.get("creation"):
+        return None
+    day = getdate(doc.get("creation"))
+    return day if day >= start else None
+
+
+def queue_group(rollup_date, dimensions):
+    """Recompute one (day, group) once the current transaction commits; deduplicated per request."""
+    pending = getattr(frappe.local, _LOCAL_ATTR, None)
+    if pending is None:
+        pending = {}
+        setattr(frappe.local, _LOCAL_ATTR, pending)
+        frappe.db.after_commit.add(flush_groups)
+        frappe.db.after_rollback.add(discard_groups)
+    pending.setdefault(rollup_name(rollup_date, dimensions), (getdate(rollup_date), dimensions))
+
+
+def discard_groups():
+    """after_rollback callback: the queued tickets were never written."""
+    try:
+        delattr(frappe.local, _LOCAL_ATTR)
+    except AttributeError:
+        pass
+
+
+def flush_groups():
+    """after_commit callback: recompute the queued groups in their own short transaction."""
+    pending = getattr(frappe.local, _LOCAL_ATTR, None) or {}
+    discard_groups()
+
+    for day, dimensions in pending.values():
+        try:
+            refresh_group(day, dimensions)
+        except Exception:
+            # the daily reconcile_recent() repairs the day
+            frappe.log_error(title="TELECTRO fault rollup refresh", message=frappe.get_traceback())
+
+    if pending:
+        frappe.db.commit()
+
+
+def on_ticket_insert(doc, method=None):
+    """doc_events hook (HD Ticket after_insert): count the new ticket in its group."""
+    day = _maintained_day(doc)
+    if day:
+        queue_group(day, ticket_dimensions(doc))
+
+
+def on_ticket_update(doc, method=None):
+    """doc_events hook (HD Ticket on_update): move the ticket when a counted field changed."""
+    if doc.flags.in_insert:
+        return
+
+    day = _maintained_day(doc)
+    if not day:
+        return
+
+    before = doc.get_doc_before_save()
+    if before is not None and not any(
+        (before.get(field) or "") != (doc.get(field) or "") for field in TRACKED_FIELDS
+    ):
+        return
+
+    queue_group(day, ticket_dimensions(doc))
+    if before is not None:
+        queue_group(day, ticket_dimensions(before))
+
+
+def on_ticket_delete(doc, method=None):
+    """doc_events hook (HD Ticket after_delete): recount the group the ticket left."""
+    day = _maintained_day(doc)
+    if day:
+        queue_group(day, ticket_dimensions(doc))
+
+
+# ------------------
+# Consistency check
+# ------------------
+
+def _comparable(row) -> tuple:
+    return (
+        *(cint(row.get(field)) for field in COUNT_FIELDS),
+        get_datetime(row.get("first_ticket_on")) if row.get("first_ticket_on") else None,
+        get_datetime(row.get("last_ticket_on")) if row.get("last_ticket_on") else None,
+        row.get("last_ticket") or "",
+    )
+
+
+def check_consistency(from_date=None, to_date=None) -> dict:
+    """
+    Compare rollup rows of [from_date, to_date] (default: the last REFRESH_DAYS days) with a
+    fresh aggregate of HD Ticket. Returns the days that disagree and the row-level counts.
+    """
+    today = getdate(nowdate())
+    to_date = getdate(to_date) if to_date else today
+    from_date = getdate(from_date) if from_date else getdate(add_days(today, -(REFRESH_DAYS - 1)))
+
+    expected = {
+        rollup_name(row.get("rollup_date"), row): row
+        for row in aggregate_tickets(*day_range(from_date, to_date))
+    }
+    stored = {
+        row.name: row
+        for row in frappe.get_all(
+            DOCTYPE,
+            filters={"rollup_date": ["between", [from_date, to_date]]},
+            fields=["name", *ROW_FIELDS],
+            limit_page_length=0,
+            ignore_permissions=True,
+        )
+    }
+
+    missing = [name for name in expected if name not in stored]
+    extra = [name for name in stored if name not in expected]
+    stale = [
+        name
+        for name, row in expected.items()
+        if name in stored and _comparable(row) != _comparable(stored[name])
+    ]
+
+    days = sorted(
+        {getdate(expected[name].get("rollup_date")) for name in missing + stale}
+        | {getdate(stored[name].get("rollup_date")) for name in extra}
+    )
+
+    return {
+        "ok": not days,
+        "from_date": from_date,
+        "to_date": to_date,
+        "rows": len(expected),
+        "missing": len(missing),
+        "stale": len(stale),
+        "extra": len(extra),
+        "mismatched_days": days,
+    }
+
+
+def changed_days(since, before) -> list:
+    """Creation days (on or after built_from) of tickets modified in [since, before)."""
+    start = built_from()
+    if not since or not start:
+        return []
+
+    rows = frappe.db.sql(
+        """
+        select distinct date(t.creation)
+        from `tabHD Ticket` t
+        where t.modified >= %(since)s
+          and t.modified < %(before)s
+          and t.creation >= %(start)s
+        """,
+        {"since": get_datetime(since), "before": before, "start": get_datetime(start)},
+    )
+    return sorted(getdate(row[0]) for row in rows if row[0])
+
+
+def reconcile_recent():
+    """
+    Scheduler job (daily): backfill once, then check the last REFRESH_DAYS days, and every
+    older day with a ticket modified since the previous run, and rebuild any day that
+    drifted (e.g. a status written with db.set_value, which skips the hooks).
+    """
+    if not built_from():
+        return backfill()
+
+    started_at = now_datetime()
+    result = check_consistency()
+
+    older = [
+        day
+        for day in changed_days(frappe.db.get_global(RECONCILED_AT_KEY), started_at)
+        if day < result["from_date"]
+    ]
+    for day in older:
+        day_result = check_consistency(day, day)
+        for key in ("rows", "missing", "stale", "extra"):
+            result[key] += day_result[key]
+        result["mismatched_days"] += day_result["mismatched_days"]
+    result["mismatched_days"] = sorted(set(result["mismatched_days"]))
+    result["ok"] = not result["mismatched_days"]
+    result["older_days_checked"] = len(older)
+
+    for day in result["mismatched_days"]:
+        rebuild(day, day, commit=False)
+    frappe.db.set_global(RECONCILED_AT_KEY, str(started_at))
+    frappe.db.commit()
+
+    if not result["ok"]:
+        frappe.logger("telephony").warning(
+            "Fault rollup drift repaired on %s day(s): %s missing, %s stale, %s extra row(s)",
+            len(result["mismatched_days"]),
+            result["missing"],
+            result["stale"],
+            result["extra"],
+        )
+    return result
+
+
+def _rollup_rows(from_date, to_date, filters) -> list:
+    rollup_filters = {"rollup_date": ["between", [from_date, to_date]]}
+    for key in TICKET_FILTERS:
+        if filters.get(key):
+            rollup_filters[key] = filters.get(key)
+
+    return frappe.get_all(
+        DOCTYPE,
+        filters=rollup_filters,
+        fields=list(ROW_FIELDS),
+        limit_page_length=0,
+        ignore_permissions=True,
+    )
+
+
+def get_fault_rows(filters, from_date, to_date) -> list:
+    """
+    Rollup-shaped rows for creation days [from_date, to_date]: covered days from the rollup,
+    days before built_from() aggregated from HD Ticket.
+    """
+    from_date, to_date = getdate(from_date), getdate(to_date)
+    start = built_from()
+
+    if not start:
+        return aggregate_tickets(*day_range(from_date, to_date), filters)
+
+    rows = []
+
+    if to_date >= start:
+        rows += _rollup_rows(max(from_date, start), to_date, filters)
+
+    if from_date < start:
+        raw_to = min(to_date, getdate(add_days(start, -1)))
+        rows += aggregate_tickets(*day_range(from_date, raw_to), filters)
+
+    return rows
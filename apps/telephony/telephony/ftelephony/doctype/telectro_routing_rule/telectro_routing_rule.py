@@ -0,0 +1,58 @@
+import frappe
+from frappe.model.document import Document
+
+
+RULE_TYPES = ("Mailbox Area", "Area Team", "Campus User")
+
+
+class TELECTRORoutingRule(Document):
+    def validate(self):
+        self._set_defaults()
+        self._validate_rule()
+        self._validate_duplicate()
+
+    def _set_defaults(self):
+        if self.enabled is None:
+            self.enabled = 1
+
+        self.match_value = str(self.match_value or "").strip()
+        self.target = str(self.target or "").strip()
+
+    def _validate_rule(self):
+        if self.rule_type not in RULE_TYPES:
+            frappe.throw("Rule Type must be Mailbox Area, Area Team, or Campus User.")
+
+        if not self.match_value:
+            frappe.throw("Match Value is required.")
+
+        if not self.target:
+            frappe.throw("Target is required.")
+
+        # routing skips (and logs) campus users that do not exist; warn, do not block
+        if self.rule_type == "Campus User" and not frappe.db.exists("User", self.target):
+            frappe.msgprint(
+                f"User {frappe.bold(self.target)} does not exist; "
+                "this campus will not be routed until the User is created."
+            )
+
+    def _validate_duplicate(self):
+        if not self.enabled:
+            return
+
+        # campus keys match casefolded, like the routing table
+        match_value = self.match_value.casefold() if self.rule_type == "Campus User" else self.match_value
+
+        for row in frappe.get_all(
+            "TELECTRO Routing Rule",
+            filters={"enabled": 1, "rule_type": self.rule_type, "name": ["!=", self.name]},
+            fields=["name", "match_value"],
+            limit_page_length=0,
+        ):
+            other = str(row.match_value or "").strip()
+            if self.rule_type == "Campus User":
+                other = other.casefold()
+            if other == match_value:
+                frappe.throw(
+                    f"Enabled {self.rule_type} rule {frappe.bold(row.name)} "
+                    f"already matches {frappe.bold(self.match_value)}."
+                )
@@ -69,7 +69,7 @@ def execute(filters=None):
            AND td.reference_name = h.name
            AND td.status = 'Open'
         WHERE h.status NOT IN ('Resolved', 'Archived')
-          AND TIMESTAMPDIFF(HOUR, h.modified, NOW()) >= 24
+          AND h.modified <= NOW() - INTERVAL 24 HOUR
         ORDER BY
             stale_hours DESC,
             td.allocated_to ASC,
@@ -1,10 +1,9 @@
-import json
-
 import frappe
 from frappe.utils import get_datetime, now_datetime, time_diff_in_seconds
 
+from telephony.ticket_assignees import resolve_assignees
+from telephony.ticket_report_data import get_active_tickets
 
-TERMINAL_STATUSES = ("Resolved", "Closed", "Archived")
 
 OVERSIGHT_ROLES = {
     "System Manager",
@@ -125,56 +124,17 @@ def get_data(filters):
 
     now = now_datetime()
 
-    rows = frappe.db.sql(
-        """
-        select
-            t.name,
-            t.subject,
-            t.status,
-            t.priority,
-            t.custom_severity,
-            t.customer,
-            t.custom_customer,
-            t.custom_site_group,
-            t.custom_service_area,
-            t.custom_request_source,
-            t.via_customer_portal,
-            t.raised_by,
-            t.agent_group,
-            t.custom_equipment_ref,
-            t._assign,
-            t.first_responded_on,
-            t.response_by,
-            t.resolution_by,
-            t.resolution_date,
-            t.creation,
-            t.modified
-        from `tabHD Ticket` t
-        where
-            t.status not in %(terminal_statuses)s
-            and t.resolution_by is not null
-            and t.resolution_by >= %(now)s
-            and (
-                ifnull(t.via_customer_portal, 0) = 1
-                or ifnull(t.custom_request_source, '') = 'Customer'
-                or (
-                    ifnull(t.customer, '') != ''
-                    and ifnull(t.raised_by, '') != ''
-                )
-            )
-        order by
-            t.modified desc
-        """,
-        {
-            "terminal_statuses": TERMINAL_STATUSES,
-            "now": now,
-        },
-        as_dict=True,
+    rows = get_active_tickets(
+        lambda row: row.get("resolution_by")
+        and get_datetime(row.get("resolution_by")) >= now
+        and _is_customer_ticket(row)
     )
 
+    assignees = resolve_assignees(rows)
+
     for row in rows:
         row["customer_display"] = row.get("customer") or row.get("custom_customer") or ""
-        row["assigned_to"] = _assigned_to(row)
+        row["assigned_to"] = ", ".join(assignees.get(row.get("name")) or [])
         row["resolution_risk"] = _resolution_risk(row, now)
         row["time_left_to_resolution"] = _time_left_to_resolution(row, now)
         row["age"] = _age(row, now)
@@ -190,6 +150,14 @@ def get_data(filters):
     )
 
 
+def _is_customer_ticket(row) -> bool:
+    return bool(
+        int(row.get("via_customer_portal") or 0) == 1
+        or row.get("custom_request_source") == "Customer"
+        or (row.get("customer") and row.get("raised_by"))
+    )
+
+
 def _is_oversight_user(user: str) -> bool:
     if not user or user == "Guest":
         return False
@@ -198,53 +166,6 @@ def _is_oversight_user(user: str) -> bool:
     return bool(roles & OVERSIGHT_ROLES)
 
 
-def _assigned_to(row) -> str:
-    assigned = _parse_assign(row.get("_assign"))
-
-    if assigned:
-        return ", ".join(assigned)
-
-    todo_users = frappe.get_all(
-        "ToDo",
-        filters={
-            "reference_type": "HD Ticket",
-            "reference_name": row.get("name"),
-            "status": "Open",
-        },
-        fields=["allocated_to"],
-        order_by="creation asc",
-    )
-
-    assigned = [todo.allocated_to for todo in todo_users if todo.allocated_to]
-    return ", ".join(assigned)
-
-
-def _parse_assign(raw) -> list[str]:
-    if not raw:
-        return []
-
-    if isinstance(raw, list):
-        return [value for value in raw if value]
-
-    if isinstance(raw, str):
-        trimmed = raw.strip()
-
-        if not trimmed or trimmed == "[]":
-            return []
-
-        try:
-            parsed = json.loads(trimmed)
-        except Exception:
-            return [trimmed]
-
-        if isinstance(parsed, list):
-            return [value for value in parsed if value]
-
-        return [trimmed]
-
-    return []
-
-
 def _resolution_risk(row, now) -> str:
     resolution_by = row.get("resolution_by")
 
@@ -1,12 +1,12 @@
 
-import json
 from datetime import date
 
 import frappe
 from frappe.utils import get_datetime, now_datetime, time_diff_in_seconds
 
+from telephony.ticket_assignees import resolve_assignees
+from telephony.ticket_report_data import get_active_tickets
 
-TERMINAL_STATUSES = ("Resolved", "Closed", "Archived")
 
 OVERSIGHT_ROLES = {
     "System Manager",
@@ -121,46 +121,18 @@ def get_data(filters):
     
     now = now_datetime()
 
-    rows = frappe.db.sql(
-        """
-        select
-            t.name,
-            t.subject,
-            t.status,
-            t.priority,
-            t.custom_severity,
-            t.customer,
-            t.custom_customer,
-            t.custom_site_group,
-            t.custom_service_area,
-            t.custom_request_source,
-            t.agent_group,
-            t.custom_equipment_ref,
-            t._assign,
-            t.first_responded_on,
-            t.response_by,
-            t.creation,
-            t.modified
-        from `tabHD Ticket` t
-        where
-            t.status not in %(terminal_statuses)s
-            and ifnull(t.custom_request_source, '') = 'Customer'
-            and t.first_responded_on is null
-            and t.response_by is not null
-            and t.response_by >= %(now)s
-        order by
-            t.modified desc
-        """,
-        {
-            "terminal_statuses": TERMINAL_STATUSES,
-            "now": now,
-        },
-        as_dict=True,
+    rows = get_active_tickets(
+        lambda row: row.get("custom_request_source") == "Customer"
+        and not row.get("first_responded_on")
+        and row.get("response_by")
+        and get_datetime(row.get("response_by")) >= now
     )
 
+    assignees = resolve_assignees(rows)
+
     for row in rows:
         row["customer_display"] = row.get("customer") or row.get("custom_customer") or ""
-        row["assigned_to"] = _assigned_to(row)
+        row["assigned_to"] = ", ".join(assignees.get(row.get("name")) or [])
         row["first_response_risk"] = _first_response_risk(row, now)
         row["time_left_to_first_response"] = _time_left_to_first_response(row, now)
         row["age"] = _age(row, now)
@@ -184,53 +156,6 @@ def _is_oversight_user(user: str) -> bool:
     return bool(roles & OVERSIGHT_ROLES)
 
 
-def _assigned_to(row) -> str:
-    assigned = _parse_assign(row.get("_assign"))
-
-    if assigned:
-        return ", ".join(assigned)
-
-    todo_users = frappe.get_all(
-        "ToDo",
-        filters={
-            "reference_type": "HD Ticket",
-            "reference_name": row.get("name"),
-            "status": "Open",
-        },
-        fields=["allocated_to"],
-        order_by="creation asc",
-    )
-
-    assigned = [todo.allocated_to for todo in todo_users if todo.allocated_to]
-    return ", ".join(assigned)
-
-
-def _parse_assign(raw) -> list[str]:
-    if not raw:
-        return []
-
-    if isinstance(raw, list):
-        return [value for value in raw if value]
-
-    if isinstance(raw, str):
-        trimmed = raw.strip()
-
-        if not trimmed or trimmed == "[]":
-            return []
-
-        try:
-            parsed = json.loads(trimmed)
-        except Exception:
-            return [trimmed]
-
-        if isinstance(parsed, list):
-            return [value for value in parsed if value]
-
-        return [trimmed]
-
-    return []
-
-
 def _first_response_risk(row, now) -> str:
     if row.get("first_responded_on"):
         return "Responded"
@@ -1,7 +1,8 @@
 import frappe
 
+from telephony.ticket_assignees import parse_assign
+from telephony.ticket_report_data import get_active_tickets
 
-TERMINAL_STATUSES = ("Resolved", "Closed", "Archived")
 
 INTERNAL_REVIEW_ROLES = {
     "System Manager",
@@ -49,18 +50,23 @@ def get_data(filters):
 
     broad_partner_visibility = _can_see_broad_partner_work(user)
 
+    # One shared active-ticket scan (telephony.ticket_report_data); buckets filter in memory.
+    tickets = get_active_tickets()
+    shared = _get_shared_ticket_names(user)
+    scope = (user, shared, broad_partner_visibility)
+
     rows = []
     seen = set()
 
     # Priority order matters. A ticket needing review/rework should appear in that bucket
     # before generic "Assigned to me".
     sources = [
-        _get_assigned_to_me(user),
-        _get_shared_with_me(user),
-        _get_partner_acceptance_review_needed(user, broad_partner_visibility),
-        _get_partner_acceptance_rework_follow_up(user, broad_partner_visibility),
-        _get_partner_work_review_needed(user, broad_partner_visibility),
-        _get_partner_work_currently_with_partner(user, broad_partner_visibility),
+        _get_assigned_to_me(tickets, user),
+        _get_shared_with_me(tickets, shared),
+        _get_partner_acceptance_review_needed(tickets, scope),
+        _get_partner_acceptance_rework_follow_up(tickets, scope),
+        _get_partner_work_review_needed(tickets, scope),
+        _get_partner_work_currently_with_partner(tickets, scope),
     ]
 
     for source_rows in sources:
@@ -96,25 +102,6 @@ def _can_see_broad_partner_work(user: str) -> bool:
     return bool(roles & INTERNAL_REVIEW_ROLES)
 
 
-def _base_select():
-    return """
-        select
-            t.name,
-            t.subject,
-            t.status,
-            t.priority,
-            t.custom_severity,
-            t.custom_customer,
-            t.custom_site_group,
-            t.custom_service_area,
-            t.custom_request_source,
-            t.custom_fulfilment_party,
-            t.custom_partner_acceptance_state,
-            t.custom_partner_work_state,
-            t.modified
-        from `tabHD Ticket` t
-    """
-
 def _bucket_group_sort(bucket: str) -> int:
     if bucket in ("Assigned to me", "Shared with me"):
         return 10
@@ -141,58 +128,41 @@ def _modified_sort_value(row):
 
     return frappe.utils.get_datetime("1900-01-01")
 
-def _scope_condition(broad_partner_visibility: bool):
-    if broad_partner_visibility:
-        return ""
-
-    return """
-        and (
-            ifnull(t._assign, '') like %(assign_like)s
-            or exists (
-                select 1
-                from `tabDocShare` ds
-                where
-                    ds.share_doctype = 'HD Ticket'
-                    and ds.share_name = t.name
-                    and ds.user = %(user)s
-                    and ifnull(ds.read, 0) = 1
-            )
+
+def _get_shared_ticket_names(user: str) -> set:
+    return set(
+        frappe.get_all(
+            "DocShare",
+            filters={"share_doctype": "HD Ticket", "user": user, "read": 1},
+            pluck="share_name",
+            limit_page_length=0,
+            ignore_permissions=True,
         )
-    """
+    )
 
 
-def _params(user: str):
-    return {
-        "terminal_statuses": TERMINAL_STATUSES,
-        "user": user,
-        "assign_like": f'%"{user}"%',
-    }
+def _is_assigned_to(row, user: str) -> bool:
+    return user in parse_assign(row.get("_assign"))
+
+
+def _in_scope(row, scope) -> bool:
+    user, shared, broad_partner_visibility = scope
+    return broad_partner_visibility or _is_assigned_to(row, user) or row.get("name") in shared
 
 
 def _apply_bucket(rows, bucket: str, next_action: str):
-    for row in rows:
-        row["bucket"] = bucket
-        row["next_action"] = next_action
-    return rows
-
-
-def _get_partner_acceptance_review_needed(user: str, broad_partner_visibility: bool):
-    rows = frappe.db.sql(
-        _base_select()
-        + """
-        where
-            t.status not in %(terminal_statuses)s
-            and ifnull(t.custom_request_source, '') = 'Partner'
-            and ifnull(t.custom_fulfilment_party, '') != 'Partner'
-            and ifnull(t.custom_partner_acceptance_state, '') = 'Accepted by Partner'
-        """
-        + _scope_condition(broad_partner_visibility)
-        + """
-        order by t.modified desc
-        """,
-        _params(user),
-        as_dict=True,
-    )
+    return [frappe._dict(row, bucket=bucket, next_action=next_action) for row in rows]
+
+
+def _get_partner_acceptance_review_needed(tickets, scope):
+    rows = [
+        row
+        for row in tickets
+        if row.get("custom_request_source") == "Partner"
+        and row.get("custom_fulfilment_party") != "Partner"
+        and row.get("custom_partner_acceptance_state") == "Accepted by Partner"
+        and _in_scope(row, scope)
+    ]
 
     return _apply_bucket(
         rows,
@@ -201,23 +171,15 @@ def _get_partner_acceptance_review_needed(user: str, broad_partner_visibility: b
     )
 
 
-def _get_partner_acceptance_rework_follow_up(user: str, broad_partner_visibility: bool):
-    rows = frappe.db.sql(
-        _base_select()
-        + """
-        where
-            t.status not in %(terminal_statuses)s
-            and ifnull(t.custom_request_source, '') = 'Partner'
-            and ifnull(t.custom_fulfilment_party, '') != 'Partner'
-            and ifnull(t.custom_partner_acceptance_state, '') = 'Rework Required'
-        """
-        + _scope_condition(broad_partner_visibility)
-        + """
-        order by t.modified desc
-        """,
-        _params(user),
-        as_dict=True,
-    )
+def _get_partner_acceptance_rework_follow_up(tickets, scope):
+    rows = [
+        row
+        for row in tickets
+        if row.get("custom_request_source") == "Partner"
+        and row.get("custom_fulfilment_party") != "Partner"
+        and row.get("custom_partner_acceptance_state") == "Rework Required"
+        and _in_scope(row, scope)
+    ]
 
     return _apply_bucket(
         rows,
@@ -226,23 +188,15 @@ def _get_partner_acceptance_rework_follow_up(user: str, broad_partner_visibility
     )
 
 
-def _get_partner_work_review_needed(user: str, broad_partner_visibility: bool):
-    rows = frappe.db.sql(
-        _base_select()
-        + """
-        where
-            t.status not in %(terminal_statuses)s
-            and ifnull(t.custom_request_source, '') != 'Partner'
-            and ifnull(t.custom_fulfilment_party, '') = 'Partner'
-            and ifnull(t.custom_partner_work_state, '') = 'Work Completed by Partner'
-        """
-        + _scope_condition(broad_partner_visibility)
-        + """
-        order by t.modified desc
-        """,
-        _params(user),
-        as_dict=True,
-    )
+def _get_partner_work_review_needed(tickets, scope):
+    rows = [
+        row
+        for row in tickets
+        if row.get("custom_request_source") != "Partner"
+        and row.get("custom_fulfilment_party") == "Partner"
+        and row.get("custom_partner_work_state") == "Work Completed by Partner"
+        and _in_scope(row, scope)
+    ]
 
     return _apply_bucket(
         rows,
@@ -251,23 +205,15 @@ def _get_partner_work_review_needed(user: str, broad_partner_visibility: bool):
     )
 
 
-def _get_partner_work_currently_with_partner(user: str, broad_partner_visibility: bool):
-    rows = frappe.db.sql(
-        _base_select()
-        + """
-        where
-            t.status not in %(terminal_statuses)s
-            and ifnull(t.custom_request_source, '') != 'Partner'
-            and ifnull(t.custom_fulfilment_party, '') = 'Partner'
-            and ifnull(t.custom_partner_work_state, '') in ('Assigned to Partner', 'Rework Required')
-        """
-        + _scope_condition(broad_partner_visibility)
-        + """
-        order by t.modified desc
-        """,
-        _params(user),
-        as_dict=True,
-    )
+def _get_partner_work_currently_with_partner(tickets, scope):
+    rows = [
+        row
+        for row in tickets
+        if row.get("custom_request_source") != "Partner"
+        and row.get("custom_fulfilment_party") == "Partner"
+        and row.get("custom_partner_work_state") in ("Assigned to Partner", "Rework Required")
+        and _in_scope(row, scope)
+    ]
 
     return _apply_bucket(
         rows,
@@ -276,18 +222,8 @@ def _get_partner_work_currently_with_partner(user: str, broad_partner_visibility
     )
 
 
-def _get_assigned_to_me(user: str):
-    rows = frappe.db.sql(
-        _base_select()
-        + """
-        where
-            t.status not in %(terminal_statuses)s
-            and ifnull(t._assign, '') like %(assign_like)s
-        order by t.modified desc
-        """,
-        _params(user),
-        as_dict=True,
-    )
+def _get_assigned_to_me(tickets, user: str):
+    rows = [row for row in tickets if _is_assigned_to(row, user)]
 
     return _apply_bucket(
         rows,
@@ -296,29 +232,11 @@ def _get_assigned_to_me(user: str):
     )
 
 
-def _get_shared_with_me(user: str):
-    rows = frappe.db.sql(
-        _base_select()
-        + """
-        where
-            t.status not in %(terminal_statuses)s
-            and exists (
-                select 1
-                from `tabDocShare` ds
-                where
-                    ds.share_doctype = 'HD Ticket'
-                    and ds.share_name = t.name
-                    and ds.user = %(user)s
-                    and ifnull(ds.read, 0) = 1
-            )
-        order by t.modified desc
-        """,
-        _params(user),
-        as_dict=True,
-    )
+def _get_shared_with_me(tickets, shared: set):
+    rows = [row for row in tickets if row.get("name") in shared]
 
     return _apply_bucket(
         rows,
         "Shared with me",
         "Review shared ticket",
-    )
\ No newline at end of file
+    )
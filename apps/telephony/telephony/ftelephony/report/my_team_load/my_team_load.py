@@ -1,8 +1,10 @@
 import frappe
 from frappe.utils import now_datetime, time_diff_in_hours
 
+from telephony.ticket_assignees import get_open_todo_users
+from telephony.ticket_report_data import get_active_tickets
+
 
-TERMINAL_STATUSES = ("Resolved", "Closed", "Archived")
 POOL_LABEL = "Unclaimed (Pool)"
 
 INTERNAL_VIEW_ROLES = {
@@ -98,32 +100,19 @@ def _can_view_report(user: str) -> bool:
 
 
 def _get_rows():
-    return frappe.db.sql(
-        """
-        select
-            t.name,
-            t.subject,
-            t.status,
-            t.priority,
-            t.custom_severity,
-            t.custom_fulfilment_party,
-            t.custom_partner_acceptance_state,
-            t.custom_partner_work_state,
-            t.creation,
-            t.modified,
-            t._assign,
-            td.allocated_to as todo_owner
-        from `tabHD Ticket` t
-        left join `tabToDo` td
-            on td.reference_type = 'HD Ticket'
-            and td.reference_name = t.name
-            and td.status = 'Open'
-        where t.status not in %(terminal_statuses)s
-        order by t.creation asc
-        """,
-        {"terminal_statuses": TERMINAL_STATUSES},
-        as_dict=True,
-    )
+    rows = get_active_tickets()
+
+    # One row per (ticket, Open ToDo user), like the former ToDo join: a ticket counts
+    # under every owner holding an Open ToDo on it. One batched ToDo query.
+    todo_users = get_open_todo_users([row.name for row in rows])
+    out = []
+    for row in rows:
+        for user in todo_users.get(row.name) or [None]:
+            owner_row = row.copy()
+            owner_row["todo_owner"] = user
+            out.append(owner_row)
+
+    return out
 
 
 def _build_summary_rows(rows):
@@ -149,7 +138,6 @@ def _build_summary_rows(rows):
             },
         )
 
-        # A ticket can have duplicate Open ToDos in dirty historical data.
         # Count each ticket once per owner bucket.
         ticket_name = str(row.get("name") or "").strip()
         if not ticket_name or ticket_name in bucket["_ticket_names"]:
@@ -1,7 +1,6 @@
-import frappe
+from datetime import datetime
 
-
-ACTIVE_EXCLUDED_STATUSES = ("Closed", "Archived", "Resolved")
+from telephony.ticket_report_data import get_active_tickets
 
 
 def execute(filters=None):
@@ -123,35 +122,14 @@ def get_columns():
 
 
 def get_data():
-    return frappe.db.sql(
-        """
-        select
-            t.name,
-            t.subject,
-            t.status,
-            t.priority,
-            coalesce(t.custom_request_type, '') as custom_request_type,
-            coalesce(t.custom_customer, '') as custom_customer,
-            coalesce(t.custom_site_group, '') as custom_site_group,
-            coalesce(t.custom_site, '') as custom_site,
-            coalesce(t.custom_service_area, '') as custom_service_area,
-            coalesce(t.custom_request_source, '') as custom_request_source,
-            coalesce(t.custom_fulfilment_party, '') as custom_fulfilment_party,
-            coalesce(t.custom_partner_acceptance_state, '') as custom_partner_acceptance_state,
-            coalesce(t.custom_partner_work_state, '') as custom_partner_work_state,
-            t.raised_by,
-            t.owner,
-            t.creation,
-            t.modified,
-            'HD Ticket' as reference_doctype
-        from `tabHD Ticket` t
-        where coalesce(t.status, '') not in %s
-          and coalesce(t.custom_request_source, '') = 'Partner'
-          and coalesce(t.custom_fulfilment_party, '') != 'Partner'
-          and coalesce(t.custom_partner_acceptance_state, '') = ''
-          and coalesce(t.custom_partner_work_state, '') = ''
-        order by t.creation desc, t.modified desc
-        """,
-        (ACTIVE_EXCLUDED_STATUSES,),
-        as_dict=True,
+    rows = get_active_tickets(
+        lambda row: row.get("custom_request_source") == "Partner"
+        and row.get("custom_fulfilment_party") != "Partner"
+        and not row.get("custom_partner_acceptance_state")
+        and not row.get("custom_partner_work_state")
     )
+    for row in rows:
+        row["reference_doctype"] = "HD Ticket"
+
+    # creation desc, then modified desc as the shared set is already ordered
+    return sorted(rows, key=lambda row: row.get("creation") or datetime.min, reverse=True)
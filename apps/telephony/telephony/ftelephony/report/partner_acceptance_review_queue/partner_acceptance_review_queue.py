@@ -1,7 +1,9 @@
-import frappe
-from telephony.partner_create import get_partner_note_summary
+from datetime import date
 
-EXCLUDED_STATUSES = ("Resolved", "Closed", "Archived")
+from frappe.utils import getdate
+
+from telephony.partner_create import get_partner_note_summaries
+from telephony.ticket_report_data import get_active_tickets
 
 
 def execute(filters=None):
@@ -76,32 +78,22 @@ def get_columns():
     ]
 
 
+def _accepted_on_key(row):
+    # custom_partner_accepted_on is a Date field; never compare it with a datetime
+    accepted_on = row.get("custom_partner_accepted_on")
+    return (bool(accepted_on), getdate(accepted_on) if accepted_on else date.min)
+
+
 def get_data():
-    rows = frappe.db.sql(
-        """
-        select
-            t.name,
-            t.subject,
-            t.status,
-            coalesce(t.custom_customer, '') as custom_customer,
-            coalesce(t.custom_site_group, '') as custom_site_group,
-            coalesce(t.custom_request_type, '') as custom_request_type,
-            coalesce(t.custom_partner_acceptance_state, '') as custom_partner_acceptance_state,
-            t.custom_partner_accepted_on,
-            t.modified
-        from `tabHD Ticket` t
-        where coalesce(t.custom_request_source, '') = 'Partner'
-          and coalesce(t.custom_partner_acceptance_state, '') = 'Accepted by Partner'
-          and coalesce(t.status, '') not in %s
-        order by
-            t.custom_partner_accepted_on desc,
-            t.modified desc
-        """,
-        (EXCLUDED_STATUSES,),
-        as_dict=True,
+    rows = get_active_tickets(
+        lambda row: row.get("custom_request_source") == "Partner"
+        and row.get("custom_partner_acceptance_state") == "Accepted by Partner"
     )
+    # accepted_on desc (unset last); ties keep the shared set's modified desc order
+    rows.sort(key=_accepted_on_key, reverse=True)
 
+    notes_by_ticket = get_partner_note_summaries([row.name for row in rows])
     for row in rows:
-        row.update(get_partner_note_summary(row.name))
+        row.update(notes_by_ticket.get(row.name) or {})
 
     return rows
\ No newline at end of file
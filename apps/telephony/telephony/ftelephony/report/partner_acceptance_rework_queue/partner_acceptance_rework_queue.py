@@ -1,9 +1,7 @@
 import frappe
 
-from telephony.partner_create import get_partner_note_summary
-
-
-ACTIVE_EXCLUDED_STATUSES = ("Closed", "Archived", "Resolved")
+from telephony.partner_create import get_partner_note_summaries
+from telephony.ticket_report_data import get_active_tickets
 
 
 def execute(filters=None):
@@ -115,41 +113,17 @@ def get_columns():
 
 
 def get_data():
-    rows = frappe.db.sql(
-        """
-        select
-            t.name,
-            t.subject,
-            t.status,
-            coalesce(t.custom_customer, '') as custom_customer,
-            coalesce(t.customer, '') as customer,
-            coalesce(t.custom_site_group, '') as custom_site_group,
-            coalesce(t.custom_site, '') as custom_site,
-            coalesce(t.custom_fault_asset, '') as custom_fault_asset,
-            coalesce(t.custom_request_type, '') as custom_request_type,
-            coalesce(t.custom_service_area, '') as custom_service_area,
-            coalesce(t.custom_severity, '') as custom_severity,
-            coalesce(t.custom_partner_acceptance_state, '') as custom_partner_acceptance_state,
-            coalesce(t.custom_fulfilment_party, '') as custom_fulfilment_party,
-            coalesce(t.custom_request_source, '') as custom_request_source,
-            coalesce(t.owner, '') as owner,
-            coalesce(t._assign, '') as _assign,
-            t.modified,
-            'HD Ticket' as reference_doctype
-        from `tabHD Ticket` t
-        where coalesce(t.custom_request_source, '') = 'Partner'
-          and coalesce(t.custom_fulfilment_party, '') = 'Telectro'
-          and coalesce(t.custom_partner_acceptance_state, '') = 'Rework Required'
-          and coalesce(t.status, '') not in %s
-        order by t.modified desc
-        """,
-        (ACTIVE_EXCLUDED_STATUSES,),
-        as_dict=True,
+    rows = get_active_tickets(
+        lambda row: row.get("custom_request_source") == "Partner"
+        and row.get("custom_fulfilment_party") == "Telectro"
+        and row.get("custom_partner_acceptance_state") == "Rework Required"
     )
 
+    notes_by_ticket = get_partner_note_summaries([row.name for row in rows])
     for row in rows:
-        row.update(get_partner_note_summary(row.name))
+        row.update(notes_by_ticket.get(row.name) or {})
 
+        row["reference_doctype"] = "HD Ticket"
         row["customer_display"] = get_customer_display_name(
             row.get("custom_customer") or row.get("customer")
         )
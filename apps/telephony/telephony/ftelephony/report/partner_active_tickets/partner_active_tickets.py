@@ -1,9 +1,5 @@
-import frappe
-
-from telephony.partner_create import get_partner_note_summary
-
-
-ACTIVE_EXCLUDED_STATUSES = ("Closed", "Archived", "Resolved")
+from telephony.partner_create import get_partner_note_summaries
+from telephony.ticket_report_data import get_active_tickets
 
 
 def execute(filters=None):
@@ -85,28 +81,10 @@ def get_columns():
 
 
 def get_data():
-    rows = frappe.db.sql(
-        """
-        select
-            t.name,
-            t.subject,
-            t.status,
-            t.priority,
-            coalesce(t.custom_request_source, '') as custom_request_source,
-            coalesce(t.raised_by, '') as raised_by,
-            coalesce(t.custom_partner_work_state, '') as custom_partner_work_state,
-            t.custom_partner_work_completed,
-            t.modified,
-            'HD Ticket' as reference_doctype
-        from `tabHD Ticket` t
-        where coalesce(t.custom_fulfilment_party, '') = 'Partner'
-          and coalesce(t.status, '') not in %s
-        order by t.modified desc
-        """,
-        (ACTIVE_EXCLUDED_STATUSES,),
-        as_dict=True,
-    )
+    rows = get_active_tickets(lambda row: row.get("custom_fulfilment_party") == "Partner")
+    notes_by_ticket = get_partner_note_summaries([row.name for row in rows])
     for row in rows:
-        row.update(get_partner_note_summary(row.name))
-        
+        row.update(notes_by_ticket.get(row.name) or {})
+        row["reference_doctype"] = "HD Ticket"
+
     return rows
\ No newline at end of file
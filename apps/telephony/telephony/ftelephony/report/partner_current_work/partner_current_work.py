@@ -1,7 +1,7 @@
 import frappe
 from datetime import datetime
 
-from telephony.partner_create import get_partner_note_summary
+from telephony.partner_create import get_partner_note_summaries
 from telephony.permissions import get_partner_ticket_report_condition
 
 
@@ -150,6 +150,7 @@ def get_data():
     )
 
     data = []
+    notes_by_ticket = get_partner_note_summaries([row.name for row in rows])
 
     for row in rows:
         action = classify_partner_current_work(row)
@@ -157,7 +158,7 @@ def get_data():
         if not action:
             continue
 
-        notes = get_partner_note_summary(row.name)
+        notes = notes_by_ticket.get(row.name)
 
         row["current_work_bucket"] = action["bucket"]
         row["waiting_on"] = action["waiting_on"]
@@ -1,12 +1,10 @@
-import frappe
-
-from telephony.partner_create import get_partner_note_summary
+from telephony.display_names import get_display_names
+from telephony.partner_create import get_partner_note_summaries
+from telephony.ticket_assignees import resolve_assignees
+from telephony.ticket_report_data import get_active_tickets
 from datetime import datetime
 
 
-ACTIVE_EXCLUDED_STATUSES = ("Closed", "Archived", "Resolved")
-
-
 def modified_sort_value(row):
     return row.get("modified") or datetime.min
 
@@ -125,57 +123,47 @@ def get_columns():
 
 
 def get_data():
-    rows = frappe.db.sql(
-        """
-        select
-            t.name,
-            t.subject,
-            t.status,
-            coalesce(t.custom_customer, '') as custom_customer,
-            coalesce(t.customer, '') as customer,
-            coalesce(t.custom_site_group, '') as custom_site_group,
-            coalesce(t.custom_site, '') as custom_site,
-            coalesce(t.custom_fault_asset, '') as custom_fault_asset,
-            coalesce(t.custom_request_source, '') as custom_request_source,
-            coalesce(t.custom_fulfilment_party, '') as custom_fulfilment_party,
-            coalesce(t.custom_partner_acceptance_state, '') as custom_partner_acceptance_state,
-            t.custom_partner_accepted_on,
-            coalesce(t.custom_partner_work_state, '') as custom_partner_work_state,
-            t.custom_partner_work_completed,
-            coalesce(t.owner, '') as owner,
-            coalesce(t._assign, '') as _assign,
-            t.modified,
-            'HD Ticket' as reference_doctype
-        from `tabHD Ticket` t
-        where coalesce(t.status, '') not in %s
-          and (
-                coalesce(t.custom_request_source, '') = 'Partner'
-                or coalesce(t.custom_fulfilment_party, '') = 'Partner'
-              )
-        order by t.modified desc
-        """,
-        (ACTIVE_EXCLUDED_STATUSES,),
-        as_dict=True,
+    rows = get_active_tickets(
+        lambda row: row.get("custom_request_source") == "Partner"
+        or row.get("custom_fulfilment_party") == "Partner"
     )
 
-    data = []
+    actionable = []
 
     for row in rows:
         action = classify_partner_action(row)
 
-        if not action:
-            continue
+        if action:
+            actionable.append((row, action))
+
+    # Constant query count: one partner note, one ToDo, one Customer and one Location lookup.
+    notes_by_ticket = get_partner_note_summaries([row.name for row, _action in actionable])
+    customer_names = get_display_names(
+        "Customer",
+        [row.get("custom_customer") or row.get("customer") for row, _action in actionable],
+        ["customer_name"],
+    )
+    location_names = get_display_names(
+        "Location",
+        [row.get(f) for row, _action in actionable for f in ("custom_site_group", "custom_site")],
+        ["location_name"],
+    )
+    assignees = resolve_assignees([row for row, _action in actionable])
+
+    data = []
 
-        notes = get_partner_note_summary(row.name)
+    for row, action in actionable:
+        notes = notes_by_ticket.get(row.name)
 
+        row["reference_doctype"] = "HD Ticket"
         row["action_bucket"] = action["bucket"]
         row["waiting_on"] = action["waiting_on"]
-        row["customer_display"] = get_customer_display_name(
-            row.get("custom_customer") or row.get("customer")
-        )
-        row["campus_display"] = get_location_display_name(row.get("custom_site_group"))
-        row["fault_point_display"] = get_location_display_name(row.get("custom_site"))
-        row["assigned_to"] = clean_assign(row.get("_assign"))
+        row["customer_display"] = customer_names[
+            (row.get("custom_customer") or row.get("customer") or "").strip()
+        ]
+        row["campus_display"] = location_names[(row.get("custom_site_group") or "").strip()]
+        row["fault_point_display"] = location_names[(row.get("custom_site") or "").strip()]
+        row["assigned_to"] = clean_assign(assignees.get(row.name))
         row["latest_partner_note"] = get_latest_note_for_action(action["note_key"], notes)
 
         data.append(row)
@@ -282,52 +270,5 @@ def action_sort_key(action_bucket):
     return order.get(action_bucket or "", 999)
 
 
-def get_customer_display_name(customer):
-    return get_display_value("Customer", customer, ["customer_name"])
-
-
-def get_location_display_name(location):
-    return get_display_value("Location", location, ["location_name"])
-
-
-def get_display_value(doctype, name, display_fields):
-    name = (name or "").strip()
-
-    if not name:
-        return "-"
-
-    if not frappe.db.exists(doctype, name):
-        return name
-
-    for fieldname in display_fields:
-        value = frappe.db.get_value(doctype, name, fieldname)
-
-        if value:
-            return value
-
-    title_field = frappe.get_meta(doctype).title_field
-
-    if title_field:
-        value = frappe.db.get_value(doctype, name, title_field)
-
-        if value:
-            return value
-
-    return name
-
-
-def clean_assign(raw_assign):
-    raw_assign = (raw_assign or "").strip()
-
-    if not raw_assign or raw_assign == "[]":
-        return "-"
-
-    try:
-        parsed = frappe.parse_json(raw_assign)
-    except Exception:
-        return raw_assign
-
-    if isinstance(parsed, list):
-        return ", ".join([user for user in parsed if user]) or "-"
-
-    return str(parsed or "-")
\ No newline at end of file
+def clean_assign(users):
+    return ", ".join(users or []) or "-"
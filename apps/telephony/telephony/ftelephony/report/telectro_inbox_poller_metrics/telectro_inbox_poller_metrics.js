@@ -0,0 +1,10 @@
+frappe.query_reports["TELECTRO Inbox Poller Metrics"] = {
+  filters: [
+    {
+      fieldname: "account",
+      label: "Email Account",
+      fieldtype: "Link",
+      options: "Email Account",
+    },
+  ],
+};
@@ -0,0 +1,75 @@
+import frappe
+
+from telephony import inbox_metrics
+
+
+def execute(filters=None):
+    filters = frappe._dict(filters or {})
+
+    accounts = [filters.account] if filters.get("account") else None
+    snap = inbox_metrics.snapshot(accounts)
+
+    columns = get_columns()
+    data = build_rows(snap)
+    chart = build_chart(snap)
+    report_summary = [
+        {
+            "label": "Mails (last hour)",
+            "value": snap["mails_last_hour"],
+            "indicator": "Blue",
+            "datatype": "Int",
+        },
+    ]
+
+    return columns, data, None, chart, report_summary
+
+
+def get_columns():
+    return [
+        {"label": "Email Account", "fieldname": "account", "fieldtype": "Link", "options": "Email Account", "width": 140},
+        {"label": "Stage", "fieldname": "stage", "fieldtype": "Data", "width": 100},
+        {"label": "Samples", "fieldname": "count", "fieldtype": "Int", "width": 90},
+        {"label": "Last (s)", "fieldname": "last", "fieldtype": "Float", "precision": 3, "width": 90},
+        {"label": "p50 (s)", "fieldname": "p50", "fieldtype": "Float", "precision": 3, "width": 90},
+        {"label": "p95 (s)", "fieldname": "p95", "fieldtype": "Float", "precision": 3, "width": 90},
+        {"label": "Max (s)", "fieldname": "max", "fieldtype": "Float", "precision": 3, "width": 90},
+        {"label": "Mails (last hour)", "fieldname": "mails_last_hour", "fieldtype": "Int", "width": 130},
+    ]
+
+
+def build_rows(snap):
+    rows = []
+    for acct_name, acct in snap["accounts"].items():
+        for stage in inbox_metrics.STAGES:
+            hist = acct["stages"][stage]
+            if not hist["count"]:
+                continue
+            rows.append(
+                {
+                    "account": acct_name,
+                    "stage": stage,
+                    "count": hist["count"],
+                    "last": hist["last"],
+                    "p50": hist["p50"],
+                    "p95": hist["p95"],
+                    "max": hist["max"],
+                    "mails_last_hour": acct["mails_last_hour"],
+                }
+            )
+    return rows
+
+
+def build_chart(snap):
+    window = snap["window_minutes"]
+    labels = [f"-{window - i - 1}m" if i < window - 1 else "now" for i in range(window)]
+
+    return {
+        "data": {
+            "labels": labels,
+            "datasets": [
+                {"name": acct_name, "values": acct["mails_per_min"]}
+                for acct_name, acct in snap["accounts"].items()
+            ],
+        },
+        "type": "line",
+    }
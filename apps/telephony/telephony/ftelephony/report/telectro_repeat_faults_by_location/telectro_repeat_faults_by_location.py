@@ -1,8 +1,10 @@
 import json
-from collections import defaultdict
 
 import frappe
-from frappe.utils import add_days, cint, getdate, nowdate
+from frappe.utils import add_days, cint, get_datetime, getdate, nowdate
+
+from telephony import fault_rollup
+from telephony.display_names import get_display_names
 
 
 DEFAULT_PERIOD = "Last 14 days"
@@ -165,115 +167,65 @@ def get_date_range(filters):
 
 
 def get_tickets(filters, from_date, to_date):
-    conditions = [
-        "date(t.creation) between %(from_date)s and %(to_date)s",
-    ]
+    """Per-day fault rollup rows for the window; see telephony.fault_rollup."""
+    return fault_rollup.get_fault_rows(filters, from_date, to_date)
 
-    values = {
-        "from_date": from_date,
-        "to_date": to_date,
-    }
 
-    add_optional_condition(
-        conditions,
-        values,
-        filters,
-        filter_key="customer",
-        column_name="custom_customer",
-    )
-    add_optional_condition(
-        conditions,
-        values,
-        filters,
-        filter_key="campus",
-        column_name="custom_site_group",
-    )
-    add_optional_condition(
-        conditions,
-        values,
-        filters,
-        filter_key="site",
-        column_name="custom_site",
-    )
-    add_optional_condition(
-        conditions,
-        values,
-        filters,
-        filter_key="service_area",
-        column_name="custom_service_area",
-    )
-    add_optional_condition(
-        conditions,
-        values,
-        filters,
-        filter_key="fault_category",
-        column_name="custom_fault_category",
-    )
-    add_optional_condition(
-        conditions,
-        values,
-        filters,
-        filter_key="severity",
-        column_name="custom_severity",
-    )
-
-    where_clause = " and ".join(conditions)
-
-    return frappe.db.sql(
-        f"""
-        select
-            t.name,
-            t.subject,
-            t.status,
-            t.creation,
-            t.modified,
-            t.owner,
-            t.raised_by,
-            t.custom_customer,
-            t.customer,
-            t.custom_site_group,
-            t.custom_site,
-            t.custom_fault_asset,
-            t.custom_service_area,
-            t.custom_fault_category,
-            t.custom_severity,
-            t.custom_fulfilment_party,
-            t._assign
-        from `tabHD Ticket` t
-        where {where_clause}
-        order by t.creation asc
-        """,
-        values,
-        as_dict=True,
-    )
+def build_rows(tickets, minimum_repeat_count):
+    labels = get_display_labels(tickets)
+    grouped = {}
+
+    for rollup_row in tickets:
+        key = get_group_key(rollup_row, labels)
+        group = grouped.get(key)
+
+        if group is None:
+            group = grouped[key] = {
+                "fault_count": 0,
+                "open_count": 0,
+                "resolved_count": 0,
+                "archived_count": 0,
+                "sev1_count": 0,
+                "sev2_count": 0,
+                "first_ticket_date": None,
+                "last_ticket_date": None,
+                "latest_ticket": None,
+            }
 
+        fault_count = cint(rollup_row.get("fault_count"))
+        group["fault_count"] += fault_count
+        group["open_count"] += cint(rollup_row.get("open_count"))
+        group["resolved_count"] += cint(rollup_row.get("resolved_count"))
+        group["archived_count"] += cint(rollup_row.get("archived_count"))
 
-def add_optional_condition(conditions, values, filters, filter_key, column_name):
-    value = filters.get(filter_key)
+        severity = rollup_row.get("severity") or ""
+        if severity == "Sev1":
+            group["sev1_count"] += fault_count
+        elif severity == "Sev2":
+            group["sev2_count"] += fault_count
 
-    if value:
-        conditions.append(f"coalesce({column_name}, '') = %({filter_key})s")
-        values[filter_key] = value
+        first_on = get_datetime(rollup_row.get("first_ticket_on"))
+        last_on = get_datetime(rollup_row.get("last_ticket_on"))
 
+        if group["first_ticket_date"] is None or first_on < group["first_ticket_date"]:
+            group["first_ticket_date"] = first_on
 
-def build_rows(tickets, minimum_repeat_count):
-    grouped = defaultdict(list)
+        if group["last_ticket_date"] is None or last_on > group["last_ticket_date"]:
+            group["last_ticket_date"] = last_on
+            group["latest_ticket"] = rollup_row.get("last_ticket")
 
-    for ticket in tickets:
-        key = get_group_key(ticket)
-        grouped[key].append(ticket)
+    groups = [
+        (key, group)
+        for key, group in grouped.items()
+        if group["fault_count"] >= minimum_repeat_count
+    ]
+    latest = get_latest_tickets([group["latest_ticket"] for _key, group in groups])
 
     rows = []
 
-    for key, group_tickets in grouped.items():
-        if len(group_tickets) < minimum_repeat_count:
-            continue
-
-        sorted_tickets = sorted(group_tickets, key=lambda row: row.creation)
-        first_ticket = sorted_tickets[0]
-        latest_ticket = sorted_tickets[-1]
-
+    for key, group in groups:
         customer, campus, site, fault_point, service_area, fault_category = key
+        latest_ticket = latest.get(group["latest_ticket"]) or frappe._dict()
 
         rows.append(
             {
@@ -281,19 +233,11 @@ def build_rows(tickets, minimum_repeat_count):
                 "campus": campus,
                 "site": site,
                 "fault_point": fault_point,
+                **group,
                 "service_area": service_area,
                 "fault_category": fault_category,
-                "fault_count": len(group_tickets),
-                "first_ticket_date": first_ticket.creation,
-                "last_ticket_date": latest_ticket.creation,
-                "open_count": count_status(group_tickets, "Open"),
-                "resolved_count": count_status(group_tickets, "Resolved"),
-                "archived_count": count_status(group_tickets, "Archived"),
-                "sev1_count": count_severity(group_tickets, "Sev1"),
-                "sev2_count": count_severity(group_tickets, "Sev2"),
-                "latest_ticket": latest_ticket.name,
-                "latest_subject": latest_ticket.subject or "",
-                "latest_status": latest_ticket.status or "",
+                "latest_subject": latest_ticket.get("subject") or "",
+                "latest_status": latest_ticket.get("status") or "",
                 "latest_owner": get_latest_owner(latest_ticket),
             }
         )
@@ -309,27 +253,58 @@ def build_rows(tickets, minimum_repeat_count):
     return rows
 
 
-def get_group_key(ticket):
+def get_display_labels(rollup_rows):
+    customers = {row.get("customer") or "" for row in rollup_rows}
+    locations = set()
+
+    for row in rollup_rows:
+        locations.update(
+            (
+                row.get("campus") or "",
+                row.get("site") or "",
+                row.get("fault_asset") or "",
+            )
+        )
+
+    return {
+        "Customer": get_display_names("Customer", customers, ["customer_name"]),
+        "Location": get_display_names("Location", locations, ["location_name"]),
+    }
+
+
+def get_group_key(rollup_row, labels):
+    customers = labels["Customer"]
+    locations = labels["Location"]
+
     return (
-        get_customer_display_name(ticket.get("custom_customer") or ticket.get("customer")),
-        get_location_display_name(ticket.get("custom_site_group")),
-        get_location_display_name(ticket.get("custom_site")),
-        get_location_display_name(ticket.get("custom_fault_asset")),
-        clean_value(ticket.get("custom_service_area")),
-        clean_value(ticket.get("custom_fault_category")),
+        customers.get(rollup_row.get("customer") or "", "-"),
+        locations.get(rollup_row.get("campus") or "", "-"),
+        locations.get(rollup_row.get("site") or "", "-"),
+        locations.get(rollup_row.get("fault_asset") or "", "-"),
+        clean_value(rollup_row.get("service_area")),
+        clean_value(rollup_row.get("fault_category")),
     )
 
 
-def clean_value(value):
-    return value or "-"
+def get_latest_tickets(ticket_names):
+    names = sorted({name for name in ticket_names if name})
 
+    if not names:
+        return {}
 
-def count_status(tickets, status):
-    return sum(1 for ticket in tickets if (ticket.status or "") == status)
+    rows = frappe.get_all(
+        "HD Ticket",
+        filters={"name": ["in", names]},
+        fields=["name", "subject", "status", "owner", "_assign"],
+        limit_page_length=0,
+        ignore_permissions=True,
+    )
 
+    return {row.name: row for row in rows}
 
-def count_severity(tickets, severity):
-    return sum(1 for ticket in tickets if (ticket.custom_severity or "") == severity)
+
+def clean_value(value):
+    return value or "-"
 
 
 def get_latest_owner(ticket):
@@ -366,36 +341,3 @@ def parse_assigned_users(raw_assign):
             return [str(parsed)]
 
     return []
-
-def get_customer_display_name(customer):
-    return get_display_value("Customer", customer, ["customer_name"])
-
-
-def get_location_display_name(location):
-    return get_display_value("Location", location, ["location_name"])
-
-
-def get_display_value(doctype, name, display_fields):
-    name = clean_value(name)
-
-    if name == "-":
-        return "-"
-
-    if not frappe.db.exists(doctype, name):
-        return name
-
-    for fieldname in display_fields:
-        value = frappe.db.get_value(doctype, name, fieldname)
-
-        if value:
-            return value
-
-    title_field = frappe.get_meta(doctype).title_field
-
-    if title_field:
-        value = frappe.db.get_value(doctype, name, title_field)
-
-        if value:
-            return value
-
-    return name
@@ -1,6 +1,8 @@
 import frappe
 from frappe import _
 
+from telephony import unclaimed_pool
+
 
 ALLOWED_ROLES = {
     "System Manager",
@@ -75,8 +77,14 @@ def execute(filters=None):
         },
     ]
 
-    rows = frappe.db.sql(
-        """
+    rows = get_pool_rows()
+    if rows is None:
+        rows = get_sql_rows()
+
+    return columns, rows
+
+
+_TICKET_SELECT = """
         SELECT
             ticket.name AS ticket,
             ticket.subject,
@@ -91,10 +99,7 @@ def execute(filters=None):
             ticket.creation
         FROM `tabHD Ticket` ticket
         WHERE ticket.status = 'Open'
-          AND COALESCE(
-              ticket.custom_fulfilment_party,
-              ''
-          ) = 'Telectro'
+          AND ticket.custom_fulfilment_party = 'Telectro'
           AND COALESCE(
               ticket._assign,
               ''
@@ -106,13 +111,36 @@ def execute(filters=None):
                 AND assignment.reference_name = ticket.name
                 AND assignment.status = 'Open'
           )
-        ORDER BY TIMESTAMPDIFF(
-            MINUTE,
-            ticket.modified,
-            NOW()
-        ) DESC
-        """,
+"""
+
+
+def get_pool_rows():
+    """
+    Pool members narrowed to Open Telectro tickets without an Open ToDo, idle since they
+    entered the pool, longest waiting first; None until the pool is seeded.
+    """
+    entries = unclaimed_pool.get_entries()
+    if entries is None:
+        return None
+    if not entries:
+        return []
+
+    entered = dict(entries)
+    rows = frappe.db.sql(
+        _TICKET_SELECT + "          AND ticket.name IN %(names)s\n",
+        {"names": tuple(entered)},
         as_dict=True,
     )
 
-    return columns, rows
+    for row in rows:
+        row["idle_minutes"] = unclaimed_pool.idle_minutes(entered[row["ticket"]])
+
+    rows.sort(key=lambda row: (entered[row["ticket"]], row["ticket"]))
+    return rows
+
+
+def get_sql_rows():
+    return frappe.db.sql(
+        _TICKET_SELECT + "        ORDER BY ticket.modified ASC\n",
+        as_dict=True,
+    )
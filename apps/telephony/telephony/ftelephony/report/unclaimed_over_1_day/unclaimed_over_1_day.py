@@ -1,5 +1,9 @@
 import frappe
 
+from telephony import unclaimed_pool
+
+MIN_IDLE_MINUTES = 24 * 60
+
 
 def execute(filters=None):
     filters = filters or {}
@@ -30,6 +34,12 @@ def execute(filters=None):
             "fieldtype": "Datetime",
             "width": 180,
         },
+        {
+            "label": "Unclaimed Since",
+            "fieldname": "unclaimed_since",
+            "fieldtype": "Datetime",
+            "width": 180,
+        },
         {
             "label": "Idle Hours",
             "fieldname": "idle_hours",
@@ -38,13 +48,68 @@ def execute(filters=None):
         },
     ]
 
-    data = frappe.db.sql(
+    data = get_pool_rows()
+    if data is None:
+        data = get_sql_rows()
+
+    report_summary = [
+        {
+            "label": "Unclaimed > 1 Day",
+            "value": len(data),
+            "indicator": "Orange" if data else "Green",
+        }
+    ]
+
+    return columns, data, None, None, report_summary
+
+
+def get_pool_rows():
+    """Rows from the unclaimed pool (idle since pool entry); None until the pool is seeded."""
+    entries = unclaimed_pool.get_entries(MIN_IDLE_MINUTES)
+    if entries is None:
+        return None
+    if not entries:
+        return []
+
+    entered = dict(entries)
+    tickets = frappe.get_all(
+        "HD Ticket",
+        filters={"name": ["in", list(entered)]},
+        fields=["name", "subject", "status", "modified", "_assign"],
+        limit_page_length=0,
+        ignore_permissions=True,
+    )
+
+    data = []
+    for ticket in tickets:
+        if not unclaimed_pool.in_pool(ticket):
+            continue
+
+        since = entered[ticket.name]
+        data.append(
+            {
+                "name": ticket.name,
+                "subject": ticket.subject,
+                "status": ticket.status,
+                "modified": ticket.modified,
+                "unclaimed_since": since,
+                "idle_hours": unclaimed_pool.idle_minutes(since) // 60,
+            }
+        )
+
+    data.sort(key=lambda row: (row["unclaimed_since"], row["name"]))
+    return data
+
+
+def get_sql_rows():
+    return frappe.db.sql(
         """
         SELECT
             name,
             subject,
             status,
             modified,
+            modified AS unclaimed_since,
             TIMESTAMPDIFF(HOUR, modified, NOW()) AS idle_hours
         FROM `tabHD Ticket`
         WHERE status IN ('Open', 'Replied')
@@ -54,13 +119,3 @@ def execute(filters=None):
         """,
         as_dict=True,
     )
-
-    report_summary = [
-        {
-            "label": "Unclaimed > 1 Day",
-            "value": len(data),
-            "indicator": "Orange" if data else "Green",
-        }
-    ]
-
-    return columns, data, None, None, report_summary
\ No newline at end of file
@@ -172,6 +172,7 @@ fixtures = [
                 "TELECTRO Ops — Partner Queue",
                 "Submitted by Partner",
                 "Assigned to Partner",
+                "TELECTRO Ops — Inbox Mails (last hour)",
             ]],
         ],
     },
@@ -181,6 +182,7 @@ fixtures = [
         "filters": [
             ["name", "in", [
                 "Supervisor Active Work by Bucket",
+                "TELECTRO Inbox Poller Throughput",
             ]],
         ],
     },
@@ -248,6 +250,7 @@ fixtures = [
                 "Customer Ticket Oversight",
                 "Customer Resolution Oversight",
                 "Customer SLA Breach Oversight",
+                "TELECTRO Inbox Poller Metrics",
             ]],
         ],
     },
@@ -302,8 +305,28 @@ if job_path not in minute_jobs:
     minute_jobs.append(job_path)
 
 cron_events[minute_expr] = minute_jobs
+
+ten_minute_expr = "*/10 * * * *"
+ten_minute_jobs = list(cron_events.get(ten_minute_expr) or [])
+
+for job_path in (
+    "telephony.kpi_counters.reconcile",
+    "telephony.unclaimed_pool.reconcile",
+):
+    if job_path not in ten_minute_jobs:
+        ten_minute_jobs.append(job_path)
+
+cron_events[ten_minute_expr] = ten_minute_jobs
 scheduler_events["cron"] = cron_events
 
+daily_jobs = list(scheduler_events.get("daily") or [])
+
+fault_rollup_job = "telephony.fault_rollup.reconcile_recent"
+if fault_rollup_job not in daily_jobs:
+    daily_jobs.append(fault_rollup_job)
+
+scheduler_events["daily"] = daily_jobs
+
 # ------------------
 # TELECTRO Pilot hooks
 # ------------------
@@ -327,10 +350,35 @@ report_transport_cleanup_after_migrate = (
 if report_transport_cleanup_after_migrate not in after_migrate:
     after_migrate.append(report_transport_cleanup_after_migrate)
 
+db_indexes_after_migrate = "telephony.setup.db_indexes.after_migrate"
+
+if db_indexes_after_migrate not in after_migrate:
+    after_migrate.append(db_indexes_after_migrate)
+
+partner_notes_after_migrate = "telephony.partner_notes.after_migrate"
+
+if partner_notes_after_migrate not in after_migrate:
+    after_migrate.append(partner_notes_after_migrate)
+
+fault_rollup_after_migrate = "telephony.fault_rollup.after_migrate"
+
+if fault_rollup_after_migrate not in after_migrate:
+    after_migrate.append(fault_rollup_after_migrate)
+
+routing_table_after_migrate = "telephony.telectro_routing_table.after_migrate"
+
+if routing_table_after_migrate not in after_migrate:
+    after_migrate.append(routing_table_after_migrate)
+
 
 doc_events = dict(globals().get("doc_events") or {})
 doc_events.setdefault("HD Ticket", {})
 doc_events.setdefault("DocShare", {})
+doc_events.setdefault("Contact", {})
+doc_events.setdefault("Customer", {})
+doc_events.setdefault("Location", {})
+doc_events.setdefault("Comment", {})
+doc_events.setdefault("ToDo", {})
 
 def _append_hook(target, event, handler):
     cur = target.get(event)
@@ -353,9 +401,51 @@ permission_query_conditions = {
     "HD Ticket": "telephony.permissions.hd_ticket_query_conditions",
 }
 
+# in-memory coverage index (telephony.service_coverage)
+doc_events.setdefault("TELECTRO Service Coverage", {})
+for _event in ("on_update", "on_trash"):
+    _append_hook(doc_events["TELECTRO Service Coverage"], _event, "telephony.service_coverage.invalidate")
+
+# compiled routing table (telephony.telectro_routing_table); User covers role changes
+for _dt in ("TELECTRO Routing Rule", "User"):
+    doc_events.setdefault(_dt, {})
+    for _event in ("on_update", "on_trash"):
+        _append_hook(doc_events[_dt], _event, "telephony.telectro_routing_table.invalidate")
+
+# Partner org graph (telephony.partner_identity); bumped before the contexts built from it
+for _dt in ("TELECTRO Partner", "User"):
+    doc_events.setdefault(_dt, {})
+    for _event in ("on_update", "on_trash"):
+        _append_hook(doc_events[_dt], _event, "telephony.partner_identity.invalidate_partner_graph")
+
+# compiled per-user permission contexts (telephony.permissions); child rows save with their parent
+for _dt in ("User", "Role Profile", "Contact", "TELECTRO Partner"):
+    doc_events.setdefault(_dt, {})
+    for _event in ("on_update", "on_trash"):
+        _append_hook(doc_events[_dt], _event, "telephony.permissions.invalidate_permission_contexts")
+
 # --- HD Ticket hooks ---
 _append_hook(doc_events["HD Ticket"], "before_insert", "telephony.telectro_intake.populate_from_email")
 
+# sender -> Customer cache used by Stage A intake
+for _dt in ("Contact", "Customer"):
+    for _event in ("on_update", "on_trash", "after_rename"):
+        _append_hook(doc_events[_dt], _event, "telephony.telectro_intake.invalidate_customer_map")
+
+# SITE: label index used by Stage A intake
+for _event in ("after_insert", "on_update", "after_rename", "on_trash"):
+    _append_hook(doc_events["Location"], _event, "telephony.telectro_site_label_index.on_location_change")
+
+# materialised partner notes (telephony.partner_notes), written with the Comment
+_append_hook(doc_events["Comment"], "on_update", "telephony.partner_notes.on_comment_update")
+_append_hook(doc_events["Comment"], "on_trash", "telephony.partner_notes.on_comment_trash")
+_append_hook(doc_events["HD Ticket"], "on_trash", "telephony.partner_notes.on_ticket_trash")
+
+# daily fault rollup (telephony.fault_rollup), maintained per ticket write
+_append_hook(doc_events["HD Ticket"], "after_insert", "telephony.fault_rollup.on_ticket_insert")
+_append_hook(doc_events["HD Ticket"], "on_update", "telephony.fault_rollup.on_ticket_update")
+_append_hook(doc_events["HD Ticket"], "after_delete", "telephony.fault_rollup.on_ticket_delete")
+
 _append_hook(doc_events["HD Ticket"], "after_insert", "telephony.telectro_round_robin.assign_after_insert")
 _append_hook(doc_events["HD Ticket"], "after_insert", "telephony.docshare_guard.hd_ticket_after_insert")
 
@@ -375,6 +465,26 @@ _append_hook(doc_events["HD Ticket"], "on_update", "telephony.telectro_reassign_
 _append_hook(doc_events["HD Ticket"], "on_update", "telephony.telectro_assign_sync.sync_ticket_assignments")
 _append_hook(doc_events["HD Ticket"], "on_update", "telephony.docshare_guard.hd_ticket_on_update")
 
+# shared active-ticket report snapshot (telephony.ticket_report_data); ToDo writes rewrite _assign
+for _event in ("on_change", "on_trash", "after_rename"):
+    _append_hook(doc_events["HD Ticket"], _event, "telephony.ticket_report_data.invalidate")
+for _event in ("on_change", "on_trash"):
+    _append_hook(doc_events["ToDo"], _event, "telephony.ticket_report_data.invalidate")
+
+# cached KPI number card snapshot (telephony.ops_kpis)
+for _event in ("on_change", "on_trash"):
+    _append_hook(doc_events["HD Ticket"], _event, "telephony.ops_kpis.invalidate")
+    _append_hook(doc_events["ToDo"], _event, "telephony.ops_kpis.invalidate")
+
+# Redis ticket state: live KPI counters + unclaimed pool (telephony.ticket_state_sync), after commit
+for _event in ("on_change", "after_delete"):
+    _append_hook(doc_events["HD Ticket"], _event, "telephony.ticket_state_sync.on_ticket_change")
+for _event in ("on_change", "on_trash"):
+    _append_hook(doc_events["ToDo"], _event, "telephony.ticket_state_sync.on_todo_change")
+
+# last in the chain: drop the shared per-save lookups (telephony.ticket_context)
+_append_hook(doc_events["HD Ticket"], "on_change", "telephony.ticket_context.release")
+
 # --- DocShare debug hook (OFF by default) ---
 if TELECTRO_DEBUG:
     _append_hook(doc_events["DocShare"], "before_insert", "telephony.debug_docshare.log_pool_hd_ticket_docshare")
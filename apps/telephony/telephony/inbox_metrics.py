@@ -0,0 +1,142 @@
+import time
+
+import frappe
+
+ACCOUNTS = ["Faults", "Routing", "PABX", "Helpdesk"]
+
+# Poller instrumentation, kept in Redis next to the poller breadcrumbs:
+# - latency ring:  {BASE}:latency:<account>:<stage>  LIST of seconds, newest first, capped at RING_SIZE
+# - mail counters: {BASE}:mails:<account>:<epoch minute>  INCR'd per run, expire after COUNTER_TTL_SECONDS
+BASE = "telephony:pull_pilot_inboxes:metrics"
+
+STAGES = ("connect", "fetch", "parse", "process", "commit")
+
+# ~4 hours of one-minute polls per (account, stage).
+RING_SIZE = 240
+
+COUNTER_WINDOW_MINUTES = 60
+COUNTER_TTL_SECONDS = 2 * 3600
+
+# Upper bounds (seconds) for the latency histogram; the last bucket is open-ended.
+HISTOGRAM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _latency_key(acct_name: str, stage: str) -> str:
+    return f"{BASE}:latency:{acct_name}:{stage}"
+
+
+def _count_key(acct_name: str, minute: int) -> str:
+    return f"{BASE}:mails:{acct_name}:{minute}"
+
+
+def record_run(acct_name: str, timings: dict, mails: int = 0) -> None:
+    """Push one poll's stage timings and processed-mail count in a single pipeline.
+
+    Best-effort: metrics must never break intake.
+    """
+    try:
+        cache = frappe.cache()
+        pipe = cache.pipeline()
+        for stage in STAGES:
+            seconds = timings.get(stage)
+            if seconds is None:
+                continue
+            key = cache.make_key(_latency_key(acct_name, stage))
+            pipe.lpush(key, f"{float(seconds):.4f}")
+            pipe.ltrim(key, 0, RING_SIZE - 1)
+        if mails:
+            key = cache.make_key(_count_key(acct_name, int(time.time() // 60)))
+            pipe.incrby(key, int(mails))
+            pipe.expire(key, COUNTER_TTL_SECONDS)
+        pipe.execute()
+    except Exception:
+        pass
+
+
+def _percentile(ordered: list[float], pct: float):
+    if not ordered:
+        return None
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return round(ordered[idx], 4)
+
+
+def _histogram(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    buckets = {}
+    for bound in HISTOGRAM_BUCKETS:
+        buckets[f"<={bound}"] = sum(1 for s in ordered if s <= bound)
+    buckets["+inf"] = len(ordered)
+    return {
+        "count": len(ordered),
+        "last": round(samples[0], 4) if samples else None,
+        "p50": _percentile(ordered, 50),
+        "p95": _percentile(ordered, 95),
+        "max": round(ordered[-1], 4) if ordered else None,
+        "buckets": buckets,
+    }
+
+
+def _decode_float(raw):
+    try:
+        return float(frappe.safe_decode(raw))
+    except Exception:
+        return None
+
+
+def snapshot(accounts=None) -> dict:
+    """Latency histograms per account/stage plus mails/min for the last hour (2 round-trips)."""
+    accounts = list(accounts or ACCOUNTS)
+    cache = frappe.cache()
+    now_minute = int(time.time() // 60)
+    minutes = list(range(now_minute - COUNTER_WINDOW_MINUTES + 1, now_minute + 1))
+
+    pipe = cache.pipeline()
+    for acct_name in accounts:
+        for stage in STAGES:
+            pipe.lrange(cache.make_key(_latency_key(acct_name, stage)), 0, RING_SIZE - 1)
+    rings = pipe.execute()
+
+    count_keys = [
+        cache.make_key(_count_key(acct_name, minute))
+        for acct_name in accounts
+        for minute in minutes
+    ]
+    counts = cache.mget(count_keys) if count_keys else []
+
+    out = {"generated_at": str(frappe.utils.now_datetime()), "window_minutes": COUNTER_WINDOW_MINUTES, "accounts": {}}
+    total = 0
+    for a_idx, acct_name in enumerate(accounts):
+        stages = {}
+        for s_idx, stage in enumerate(STAGES):
+            raw = rings[a_idx * len(STAGES) + s_idx] or []
+            samples = [v for v in (_decode_float(x) for x in raw) if v is not None]
+            stages[stage] = _histogram(samples)
+
+        per_min = [
+            int(_decode_float(counts[a_idx * len(minutes) + m_idx]) or 0)
+            for m_idx in range(len(minutes))
+        ]
+        mails_last_hour = sum(per_min)
+        total += mails_last_hour
+        out["accounts"][acct_name] = {
+            "stages": stages,
+            "mails_last_hour": mails_last_hour,
+            "mails_per_min": per_min,
+        }
+
+    out["mails_last_hour"] = total
+    return out
+
+
+@frappe.whitelist()
+def get_inbox_metrics(account=None) -> dict:
+    return snapshot([account] if account else None)
+
+
+@frappe.whitelist()
+def mails_last_hour() -> dict:
+    """Number Card: mails processed by the pilot inbox poller in the last 60 minutes."""
+    try:
+        return {"value": snapshot()["mails_last_hour"]}
+    except Exception:
+        return {"value": 0}
@@ -0,0 +1,253 @@
+"""Long-running IMAP IDLE intake worker (alternative to waiting for the 1-minute cron).
+
+One watcher thread per pilot inbox holds IMAP IDLE on the account's folders. Watchers
+never touch Frappe; they only push the account name onto a queue. The main thread drains
+the queue inside a site context and calls pull_pilot_inboxes.run_account(), so intake
+goes through the same per-account lock, block rules and dedupe keys
+(telephony:pull_pilot_inboxes:dedupe:*) as the cron. Both can run side by side.
+
+Start with `bench --site <site> telectro-imap-idle` (see telephony/commands.py).
+"""
+
+import imaplib
+import queue
+import select
+import signal
+import threading
+import time
+import traceback
+
+import frappe
+
+from telephony.jobs import pull_pilot_inboxes
+
+BASE = f"{pull_pilot_inboxes.BASE}:idle"
+
+# RFC 2177: re-issue IDLE at least every 29 minutes.
+IDLE_RENEW_SECONDS = 25 * 60
+
+# Safety net: poll every account this often even without IDLE events.
+SAFETY_POLL_SECONDS = 5 * 60
+
+# Coalesce bursts: wait this long after the first event before processing.
+DEBOUNCE_SECONDS = 1.0
+
+RECONNECT_BACKOFF_SECONDS = (5, 15, 30, 60, 120)
+
+
+def _set(key, val):
+    frappe.cache().set_value(f"{BASE}:{key}", val)
+
+
+def _watch_config(acct_name: str):
+    """Connection settings for one watcher, or None when IDLE does not apply."""
+    acc = frappe.get_doc("Email Account", acct_name)
+    if not acc.enable_incoming or not acc.use_imap:
+        return None
+    if acc.get("use_oauth") or acc.get("service") == "Frappe Mail":
+        # OAuth / Frappe Mail accounts stay on the cron path.
+        return None
+
+    use_ssl = frappe.utils.cint(acc.get("use_ssl"))
+    return {
+        "acct": acct_name,
+        "host": acc.get("email_server"),
+        "port": frappe.utils.cint(acc.get("incoming_port")) or (993 if use_ssl else 143),
+        "use_ssl": use_ssl,
+        "use_starttls": frappe.utils.cint(acc.get("use_starttls")),
+        "username": acc.get("login_id") or acc.get("email_id"),
+        "password": acc.get_password("password", raise_exception=False),
+        "folders": [f.folder_name for f in (acc.get("imap_folder") or [])] or ["INBOX"],
+    }
+
+
+def _connect(cfg):
+    if cfg["use_ssl"]:
+        conn = imaplib.IMAP4_SSL(cfg["host"], cfg["port"])
+    else:
+        conn = imaplib.IMAP4(cfg["host"], cfg["port"])
+        if cfg["use_starttls"]:
+            conn.starttls()
+    conn.login(cfg["username"], cfg["password"])
+    return conn
+
+
+def _idle_once(conn, timeout: float) -> bool:
+    """Hold one IDLE round. True when the server announced new mail (EXISTS/RECENT)."""
+    tag = conn._new_tag()
+    conn.send(tag + b" IDLE\r\n")
+    line = conn.readline()
+    if not line.startswith(b"+"):
+        raise imaplib.IMAP4.error(f"IDLE refused: {line[:200]!r}")
+
+    got_mail = False
+    # select() on the raw socket; a line already sitting in the read buffer is caught
+    # by the next round or the safety poll.
+    ready, _, _ = select.select([conn.sock], [], [], timeout)
+    if ready:
+        line = conn.readline()
+        if not line:
+            raise imaplib.IMAP4.abort("connection closed during IDLE")
+        got_mail = b"EXISTS" in line or b"RECENT" in line
+
+    conn.send(b"DONE\r\n")
+    while True:
+        line = conn.readline()
+        if not line:
+            raise imaplib.IMAP4.abort("connection closed after IDLE")
+        if line.startswith(tag):
+            break
+        if b"EXISTS" in line or b"RECENT" in line:
+            got_mail = True
+    return got_mail
+
+
+class _IdleWatcher(threading.Thread):
+    """Holds IDLE on one folder of one account; pushes the account name on new mail."""
+
+    def __init__(self, cfg: dict, folder: str, events: queue.Queue, stop: threading.Event):
+        super().__init__(name=f"imap-idle:{cfg['acct']}:{folder}", daemon=True)
+        self.cfg = cfg
+        self.folder = folder
+        self.events = events
+        self.stop = stop
+        self.last_error = None
+
+    def run(self):
+        attempt = 0
+        while not self.stop.is_set():
+            conn = None
+            try:
+                conn = _connect(self.cfg)
+                if "IDLE" not in conn.capabilities:
+                    self.last_error = "server does not advertise IDLE"
+                    return
+                conn.select(f'"{self.folder}"', readonly=True)
+                attempt = 0
+                while not self.stop.is_set():
+                    if _idle_once(conn, IDLE_RENEW_SECONDS):
+                        self.events.put(self.cfg["acct"])
+            except Exception as e:
+                self.last_error = repr(e)[:300]
+                delay = RECONNECT_BACKOFF_SECONDS[min(attempt, len(RECONNECT_BACKOFF_SECONDS) - 1)]
+                attempt += 1
+                # Something may have landed while we were disconnected.
+                self.events.put(self.cfg["acct"])
+                self.stop.wait(delay)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.logout()
+                    except Exception:
+                        pass
+
+
+def _with_site(site: str, fn, *args, **kwargs):
+    frappe.init(site=site)
+    try:
+        frappe.connect()
+        return fn(*args, **kwargs)
+    finally:
+        frappe.destroy()
+
+
+def _load_configs(accounts):
+    configs = []
+    skipped = []
+    for acct_name in accounts:
+        try:
+            cfg = _watch_config(acct_name)
+        except Exception as e:
+            skipped.append({"acct": acct_name, "reason": repr(e)[:200]})
+            continue
+        if cfg is None:
+            skipped.append({"acct": acct_name, "reason": "not an IDLE-capable IMAP account"})
+            continue
+        configs.append(cfg)
+    return configs, skipped
+
+
+def _drain(events: queue.Queue, first: str) -> list[str]:
+    pending = {first}
+    deadline = time.monotonic() + DEBOUNCE_SECONDS
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            pending.add(events.get(timeout=remaining))
+        except queue.Empty:
+            break
+    return [a for a in pull_pilot_inboxes.ACCOUNTS if a in pending]
+
+
+def _process(accounts: list[str], watchers: list, reason: str):
+    from helpdesk.overrides import imap_pool
+
+    for acct_name in accounts:
+        pull_pilot_inboxes.run_account(acct_name)
+    try:
+        imap_pool.keepalive()
+    except Exception:
+        pass
+
+    _set("last_trigger", {"at": str(frappe.utils.now_datetime()), "reason": reason, "accounts": accounts})
+    _set(
+        "watchers",
+        {w.name: {"alive": w.is_alive(), "last_error": w.last_error} for w in watchers},
+    )
+
+
+def run_worker(site: str, accounts=None):
+    """Block forever: IDLE watchers + a main loop that runs the poller per account."""
+    accounts = list(accounts or pull_pilot_inboxes.ACCOUNTS)
+    stop = threading.Event()
+    events: queue.Queue = queue.Queue()
+
+    def _stop(*_):
+        stop.set()
+        events.put(None)
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+    configs, skipped = _with_site(site, _load_configs, accounts)
+    watchers = [
+        _IdleWatcher(cfg, folder, events, stop)
+        for cfg in configs
+        for folder in cfg["folders"]
+    ]
+    for w in watchers:
+        w.start()
+
+    def _started():
+        _set("started", {"at": str(frappe.utils.now_datetime()), "watching": [w.name for w in watchers], "skipped": skipped})
+        # Catch up on anything that arrived before we were watching.
+        _process(accounts, watchers, "startup")
+
+    _with_site(site, _started)
+
+    last_poll = time.monotonic()
+    while not stop.is_set():
+        timeout = max(0.0, SAFETY_POLL_SECONDS - (time.monotonic() - last_poll))
+        try:
+            acct_name = events.get(timeout=timeout)
+        except queue.Empty:
+            acct_name = None
+
+        if stop.is_set():
+            break
+
+        try:
+            if acct_name is None:
+                _with_site(site, _process, accounts, watchers, "safety_poll")
+            else:
+                _with_site(site, _process, _drain(events, acct_name), watchers, "idle")
+        except Exception:
+            # Keep the worker up; run_account already recorded its own breadcrumbs.
+            tb = traceback.format_exc()
+            try:
+                _with_site(site, frappe.log_error, title="TELECTRO IMAP IDLE worker", message=tb)
+            except Exception:
+                pass
+        last_poll = time.monotonic()
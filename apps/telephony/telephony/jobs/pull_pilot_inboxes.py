@@ -1,14 +1,54 @@
+import pickle
+import time
+
 import frappe
 
+from telephony import inbox_metrics
+
 MAX_MAILS_PER_ACCOUNT = 25
 
 # Bump this any time you change logic so you can confirm the scheduler is running the new code.
-JOB_FINGERPRINT = "2026-03-09-poller-stable-01"
+JOB_FINGERPRINT = "2026-10-16-poller-metrics-01"
 
 BASE = "telephony:pull_pilot_inboxes"
 
 ACCOUNTS = ["Faults", "Routing", "PABX", "Helpdesk"]
 
+LOCK_TIMEOUT_SECONDS = 55
+
+# --- parallel mode (site config: telephony_pull_pilot_inboxes_parallel = 1) ---
+# The cron tick only dispatches one background job per account. Each account job
+# holds its own lock and writes breadcrumbs under {BASE}:acct:<name>:*, so a slow
+# IMAP server only stalls its own mailbox. The process()/commit stage is still
+# serialized across accounts via PROCESS_LOCK_KEY (ticket insert hooks, round-robin).
+ACCOUNT_JOB_METHOD = "telephony.jobs.pull_pilot_inboxes.run_account"
+ACCOUNT_JOB_QUEUE = "short"
+ACCOUNT_JOB_TIMEOUT_SECONDS = 120
+PROCESS_LOCK_KEY = f"{BASE}:process_lock"
+PROCESS_LOCK_TIMEOUT_SECONDS = 50
+PROCESS_LOCK_WAIT_SECONDS = 20
+
+# --- batched mode (site config: telephony_pull_pilot_inboxes_commit_every = N > 1) ---
+# Dedupe lookups for the fetched page go out in one MGET, dedupe marks are pipelined
+# after each commit, and every mail runs inside its own savepoint so a bad mail still
+# rolls back alone while the transaction is only committed every N mails.
+COMMIT_EVERY_DEFAULT = 1
+
+# --- header prefetch (site config: telephony_pull_pilot_inboxes_header_prefetch = 1) ---
+# IMAP accounts hand us envelope headers first (CustomEmailAccount.get_inbound_mails(prefilter=...));
+# blocked and already-seen mails are dropped before their bodies are downloaded.
+
+# --- adaptive drain (site config: telephony_pull_pilot_inboxes_time_budget = seconds, e.g. 45) ---
+# Instead of fetching everything and truncating to MAX_MAILS_PER_ACCOUNT, each fetch is
+# sized from the account's measured seconds-per-mail so it fits the remaining budget.
+# Mails that do not fit stay untouched on the server (reported as `backlog`) for the next
+# run. In serial mode the budget is shared across accounts; unused time rolls forward.
+DRAIN_DEFAULT_SEC_PER_MAIL = 1.0
+DRAIN_MIN_FETCH = 5
+DRAIN_MAX_FETCH = 100
+DRAIN_EWMA_ALPHA = 0.3
+DRAIN_LOCK_MARGIN_SECONDS = 5
+
 # --- mail identity helpers (best-effort across Frappe versions) ---
 
 def _mail_uid(m):
@@ -31,9 +71,73 @@ def _mail_identity(m):
         "subject": _mail_subject(m),
     }
 
-def _set(key, val):
+def _acct_ns(acct_name: str) -> str:
+    return f"acct:{acct_name}"
+
+def _set(key, val, ns=None):
+    if ns:
+        key = f"{ns}:{key}"
     frappe.cache().set_value(f"{BASE}:{key}", val)
 
+def _get(key, ns=None):
+    if ns:
+        key = f"{ns}:{key}"
+    return frappe.cache().get_value(f"{BASE}:{key}")
+
+def _conf_flag(key: str) -> bool:
+    try:
+        v = frappe.conf.get(key)
+    except Exception:
+        v = None
+    try:
+        return int(v or 0) == 1
+    except Exception:
+        return bool(v)
+
+def _parallel_enabled() -> bool:
+    return _conf_flag("telephony_pull_pilot_inboxes_parallel")
+
+def _header_prefetch_enabled() -> bool:
+    return _conf_flag("telephony_pull_pilot_inboxes_header_prefetch")
+
+def _commit_every() -> int:
+    try:
+        v = int(frappe.conf.get("telephony_pull_pilot_inboxes_commit_every") or COMMIT_EVERY_DEFAULT)
+    except Exception:
+        v = COMMIT_EVERY_DEFAULT
+    return max(1, v)
+
+def _time_budget() -> float:
+    try:
+        v = float(frappe.conf.get("telephony_pull_pilot_inboxes_time_budget") or 0)
+    except Exception:
+        v = 0.0
+    if v <= 0:
+        return 0.0
+    return min(v, LOCK_TIMEOUT_SECONDS - DRAIN_LOCK_MARGIN_SECONDS)
+
+def _sec_per_mail(acct_name: str) -> float:
+    try:
+        v = float(_get("sec_per_mail", _acct_ns(acct_name)) or 0)
+    except Exception:
+        v = 0.0
+    return v if v > 0 else DRAIN_DEFAULT_SEC_PER_MAIL
+
+def _drain_limit(acct_name: str, seconds_left: float) -> int:
+    return max(DRAIN_MIN_FETCH, min(DRAIN_MAX_FETCH, int(seconds_left / _sec_per_mail(acct_name))))
+
+def _record_throughput(acct_name: str, handled: int, seconds: float) -> None:
+    # EWMA of fetch+process seconds per handled mail; feeds the next run's fetch size.
+    if handled <= 0:
+        return
+    sample = seconds / handled
+    prev = _get("sec_per_mail", _acct_ns(acct_name))
+    try:
+        value = DRAIN_EWMA_ALPHA * sample + (1 - DRAIN_EWMA_ALPHA) * float(prev) if prev else sample
+    except Exception:
+        value = sample
+    _set("sec_per_mail", round(value, 4), _acct_ns(acct_name))
+
 DEDUPE_TTL_SECONDS = 6 * 3600  # 6 hours
 
 SUBJECT_BLOCK_CONTAINS = [
@@ -62,6 +166,52 @@ def _dedupe_mark(acct: str, ident: str) -> None:
     except TypeError:
         frappe.cache().set_value(_dedupe_key(acct, ident), 1)
 
+def _dedupe_seen_many(acct: str, idents: list[str]) -> set[str]:
+    """One MGET for a whole fetched page; returns the idents already marked."""
+    idents = [i for i in dict.fromkeys(idents) if i]
+    if not idents:
+        return set()
+    cache = frappe.cache()
+    try:
+        raw = cache.mget([cache.make_key(_dedupe_key(acct, i)) for i in idents])
+    except Exception:
+        return {i for i in idents if _dedupe_seen(acct, i)}
+    return {i for i, v in zip(idents, raw) if v is not None}
+
+def _dedupe_mark_many(acct: str, idents: list[str]) -> None:
+    """Pipelined _dedupe_mark; values are pickled like RedisWrapper.set_value."""
+    idents = [i for i in dict.fromkeys(idents) if i]
+    if not idents:
+        return
+    cache = frappe.cache()
+    try:
+        payload = pickle.dumps(1)
+        pipe = cache.pipeline()
+        for i in idents:
+            pipe.set(cache.make_key(_dedupe_key(acct, i)), payload, ex=DEDUPE_TTL_SECONDS)
+        pipe.execute()
+    except Exception:
+        for i in idents:
+            _dedupe_mark(acct, i)
+
+def _persisted_message_ids(message_ids: list) -> set:
+    """Message-IDs that already have a Communication (survived an implicit commit)."""
+    message_ids = [mid for mid in dict.fromkeys(message_ids) if mid]
+    if not message_ids:
+        return set()
+    try:
+        return set(
+            frappe.get_all(
+                "Communication",
+                filters={"message_id": ["in", message_ids]},
+                pluck="message_id",
+                limit_page_length=0,
+                ignore_permissions=True,
+            )
+        )
+    except Exception:
+        return set()
+
 def _is_blocked_meta(meta: dict) -> bool:
     subj = (meta.get("subject") or "").lower()
     frm = (meta.get("from") or "").lower()
@@ -81,6 +231,424 @@ def _dedupe_ident(meta: dict) -> str:
         return f"mid:{mid}"
     return ""
 
+def _is_interesting(per: dict) -> bool:
+    return any(
+        v.get("mails_total", 0)
+        or v.get("processed", 0)
+        or v.get("skipped_blocked", 0)
+        or v.get("skipped_dedupe", 0)
+        or v.get("mail_errors", 0)
+        or v.get("backlog", 0)
+        for v in per.values()
+        if isinstance(v, dict)
+    )
+
+def _make_prefilter(acct_name: str, counters: dict):
+    """Header-only block + dedupe pass; returns the UIDs get_inbound_mails should skip."""
+    def prefilter(metas):
+        skip = set()
+        seen = _dedupe_seen_many(acct_name, [_dedupe_ident(meta) for meta in metas])
+        for meta in metas:
+            ident = _dedupe_ident(meta)
+            if _is_blocked_meta(meta):
+                reason = "blocked"
+                counters["skipped_blocked"] += 1
+            elif ident and ident in seen:
+                reason = "dedupe"
+                counters["skipped_dedupe"] += 1
+            else:
+                continue
+            skip.add(meta.get("uid"))
+            counters["last_skip_meta"] = {
+                "acct": acct_name,
+                "reason": reason,
+                "prefetch": 1,
+                **{k: meta.get(k) for k in ("uid", "message_id", "from", "subject")},
+            }
+        return skip
+    return prefilter
+
+def _fetch_mails(acc, acct_name: str, limit=None) -> tuple[list, dict]:
+    """get_inbound_mails(), with header prefetch and/or a fetch limit when supported.
+
+    Returns (mails, info); info carries prefetch counters and `backlog` when applicable.
+    """
+    kwargs = {}
+    info = {}
+    if _header_prefetch_enabled() and getattr(acc, "supports_header_prefetch", False):
+        info.update({"skipped_blocked": 0, "skipped_dedupe": 0, "last_skip_meta": None})
+        kwargs["prefilter"] = _make_prefilter(acct_name, info)
+    if limit is not None and getattr(acc, "supports_fetch_limit", False):
+        kwargs["limit"] = limit
+
+    mails = acc.get_inbound_mails(**kwargs) or []
+    if "limit" in kwargs:
+        info["backlog"] = int(acc.flags.inbound_backlog or 0)
+    return mails, info
+
+def _comm_reference_ticket(comm):
+    # InboundMail.process() returns the inserted Communication; read the reference off it
+    # instead of reloading the doc. Only fall back to a single-column read for bare names.
+    if getattr(comm, "reference_doctype", None):
+        return comm.reference_name if comm.reference_doctype == "HD Ticket" else None
+    if isinstance(comm, str) and comm:
+        ref = frappe.db.get_value(
+            "Communication", comm, ["reference_doctype", "reference_name"], as_dict=True
+        )
+        if ref and ref.reference_doctype == "HD Ticket":
+            return ref.reference_name
+    return None
+
+def _process_mails(acct_name: str, mails: list, ns=None) -> dict:
+    """Filter (block/dedupe) and process fetched mails for one account.
+
+    Default: commit after each successful mail; a failing mail is rolled back alone.
+    Batched (commit_every > 1): one MGET for the page's dedupe keys, one savepoint per
+    mail, commit + pipelined dedupe marks every N mails.
+    Returns the per-account entry plus `_last_*` keys for the caller's breadcrumbs.
+    """
+    skipped_blocked = 0
+    skipped_dedupe = 0
+    processed = 0
+    blocked_flood = 0
+    last_comm = None
+    last_ticket = None
+    last_mail_meta = None
+    last_skip_meta = None
+    mail_errors = 0
+    uids = []
+
+    commit_every = _commit_every()
+    batched = commit_every > 1
+    metas = [_mail_identity(m) for m in mails]
+    seen = _dedupe_seen_many(acct_name, [_dedupe_ident(meta) for meta in metas]) if batched else set()
+    pending_marks = []
+    # (ident, message_id) for every mail in the open batch
+    open_batch = []
+    uncommitted = 0
+    commits = 0
+    batch_lost = 0
+
+    timings = {"process": 0.0, "commit": 0.0}
+
+    def _flush():
+        nonlocal uncommitted, commits
+        if not uncommitted:
+            return
+        t0 = time.monotonic()
+        frappe.db.commit()
+        _dedupe_mark_many(acct_name, list(pending_marks))
+        timings["commit"] += time.monotonic() - t0
+        pending_marks.clear()
+        open_batch.clear()
+        uncommitted = 0
+        commits += 1
+
+    for idx, m in enumerate(mails):
+        meta = metas[idx]
+        ident = _dedupe_ident(meta)
+
+        if _is_blocked_meta(meta):
+            skipped_blocked += 1
+
+            if skipped_blocked >= 20:
+                blocked_flood = 1
+                _set("stage", f"acct:{acct_name}:blocked_flood", ns)
+                break
+
+            # Mail is already marked seen by Frappe receive pipeline during IMAP fetch when sync rule is UNSEEN.
+            last_skip_meta = {"acct": acct_name, "reason": "blocked", **meta}
+            if not batched:
+                _set("last_skip_meta", last_skip_meta)
+            continue
+
+        if ident and (ident in seen if batched else _dedupe_seen(acct_name, ident)):
+            skipped_dedupe += 1
+            last_skip_meta = {"acct": acct_name, "reason": "dedupe", **meta}
+            if not batched:
+                _set("last_skip_meta", last_skip_meta)
+            continue
+
+        # --- process the mail (this is your existing behavior) ---
+        savepoint = f"pull_pilot_mail_{idx}" if batched else None
+        try:
+            if savepoint:
+                frappe.db.savepoint(savepoint)
+
+            t0 = time.monotonic()
+            comm = m.process()
+            timings["process"] += time.monotonic() - t0
+            processed += 1
+            last_comm = getattr(comm, "name", comm)
+            last_ticket = _comm_reference_ticket(comm) or last_ticket
+
+            last_mail_meta = {"acct": acct_name, **meta}
+            uid = meta.get("uid")
+            if uid is not None:
+                try:
+                    uids.append(int(uid))
+                except Exception:
+                    pass
+
+            if batched:
+                if ident:
+                    pending_marks.append(ident)
+                    seen.add(ident)
+                open_batch.append((ident, meta.get("message_id")))
+                frappe.db.release_savepoint(savepoint)
+                uncommitted += 1
+                if uncommitted >= commit_every:
+                    _flush()
+            else:
+                if ident:
+                    _dedupe_mark(acct_name, ident)
+                _set("last_mail_meta", last_mail_meta)
+                t0 = time.monotonic()
+                frappe.db.commit()  # ✅ commit each successful mail
+                timings["commit"] += time.monotonic() - t0
+        except Exception as e:
+            if savepoint:
+                try:
+                    frappe.db.rollback(save_point=savepoint)
+                except Exception:
+                    # Savepoint is gone. After a disconnect the open batch is lost, but an
+                    # implicit commit may have persisted part of it: keep (and mark) the
+                    # mails whose Communication exists, count only the rest as lost.
+                    frappe.db.rollback()
+                    kept = _persisted_message_ids([mid for _ident, mid in open_batch])
+                    survivors = [i for i, mid in open_batch if mid and mid in kept]
+                    lost = uncommitted - len(survivors)
+                    if survivors:
+                        _dedupe_mark_many(acct_name, survivors)
+                    batch_lost += lost
+                    processed -= lost
+                    pending_marks.clear()
+                    open_batch.clear()
+                    uncommitted = 0
+            else:
+                frappe.db.rollback()
+            mail_errors += 1
+            _set("last_nonfatal_err", f"{acct_name}: {repr(e)[:200]}")
+            _set("stage", f"acct:{acct_name}:mail_error", ns)
+            # continue with next mail
+            continue
+
+    if batched:
+        _flush()
+        if last_mail_meta:
+            _set("last_mail_meta", last_mail_meta)
+        if last_skip_meta:
+            _set("last_skip_meta", last_skip_meta)
+
+    entry = {
+        "disabled": False,
+        "mails": len(mails),
+        "processed": processed,
+        "skipped_blocked": skipped_blocked,
+        "skipped_dedupe": skipped_dedupe,
+        "blocked_flood": blocked_flood,
+        "mail_errors": mail_errors,
+        "_last_comm": last_comm,
+        "_last_ticket": last_ticket,
+        "_last_mail_meta": last_mail_meta,
+        "_timings": timings,
+    }
+    if batched:
+        entry.update({"commit_every": commit_every, "commits": commits, "batch_lost": batch_lost})
+    if uids:
+        entry.update({"uid_min": min(uids), "uid_max": max(uids)})
+    return entry
+
+def _acquire_process_lock():
+    lock = frappe.cache().lock(
+        PROCESS_LOCK_KEY,
+        timeout=PROCESS_LOCK_TIMEOUT_SECONDS,
+        blocking_timeout=PROCESS_LOCK_WAIT_SECONDS,
+    )
+    if not lock.acquire(blocking=True):
+        return None
+    return lock
+
+def _poll_account(acct_name: str, ns=None, serialize_process=False, deadline=None) -> dict:
+    """Fetch + process one pilot inbox. Never raises; errors land in the entry.
+
+    deadline: monotonic time (adaptive drain). The fetch is sized to fit before it and
+    nothing is truncated after download.
+    """
+    _set("stage", f"acct:{acct_name}:start", ns)
+    try:
+        acc = frappe.get_doc("Email Account", acct_name)
+        if not acc.enable_incoming:
+            return {"disabled": True, "mails": 0, "processed": 0}
+
+        limit = None
+        if deadline is not None:
+            seconds_left = deadline - time.monotonic()
+            if seconds_left <= 0:
+                # Out of budget: leave this inbox for the next run rather than overrun the lock.
+                return {"disabled": False, "mails": 0, "processed": 0, "deferred": 1}
+            limit = _drain_limit(acct_name, seconds_left)
+
+        # Pull + process ourselves so we can count + capture last Communication
+        _set("stage", f"acct:{acct_name}:fetch", ns)
+        started = time.monotonic()
+        mails, prefetch = _fetch_mails(acc, acct_name, limit=limit)
+        fetch_seconds = time.monotonic() - started
+        mails_total = len(mails)
+        if limit is None:
+            mails = mails[:MAX_MAILS_PER_ACCOUNT]
+
+        process_lock = None
+        if serialize_process and mails:
+            _set("stage", f"acct:{acct_name}:wait_process_lock", ns)
+            process_lock = _acquire_process_lock()
+            if process_lock is None:
+                # UNSEEN sync already flagged these on the server; dropping them would lose mail.
+                # Process unserialized instead; dedupe keys still guard against double intake.
+                _set("last_nonfatal_err", f"{acct_name}: process lock wait timed out")
+
+        try:
+            _set("stage", f"acct:{acct_name}:process", ns)
+            entry = _process_mails(acct_name, mails, ns=ns)
+        finally:
+            if process_lock is not None:
+                try:
+                    process_lock.release()
+                except Exception:
+                    pass
+
+        entry["mails_total"] = mails_total
+
+        # Stage latencies: connect/fetch/parse from the Email Account override (whole
+        # get_inbound_mails() as "fetch" otherwise), process/commit from _process_mails.
+        # Empty polls only feed the IMAP stages so they don't drown process/commit in zeros.
+        timings = dict(acc.flags.get("inbound_timings") or {"fetch": fetch_seconds})
+        process_timings = entry.pop("_timings")
+        if mails:
+            timings.update(process_timings)
+        inbox_metrics.record_run(acct_name, timings, mails=entry["processed"])
+
+        if limit is not None:
+            handled = entry["processed"] + entry["mail_errors"]
+            _record_throughput(acct_name, handled, time.monotonic() - started)
+            entry["fetch_limit"] = limit
+            entry["backlog"] = prefetch.get("backlog", 0)
+        if "skipped_blocked" in prefetch:
+            skipped = prefetch["skipped_blocked"] + prefetch["skipped_dedupe"]
+            entry["skipped_blocked"] += prefetch["skipped_blocked"]
+            entry["skipped_dedupe"] += prefetch["skipped_dedupe"]
+            entry["prefetch_skipped"] = skipped
+            entry["mails_total"] += skipped
+            if entry["skipped_blocked"] >= 20:
+                entry["blocked_flood"] = 1
+            if prefetch["last_skip_meta"]:
+                _set("last_skip_meta", prefetch["last_skip_meta"])
+        _set("stage", f"acct:{acct_name}:done", ns)
+        return entry
+
+    except Exception as e:
+        frappe.db.rollback()
+        # keep going with other accounts, but remember the last error
+        _set("last_nonfatal_err", f"{acct_name}: {repr(e)[:500]}")
+        _set("stage", f"acct:{acct_name}:error", ns)
+        return {"error": repr(e)[:500]}
+
+def _publish_last(entry: dict) -> None:
+    # Update global "last_*" based on most recent processed mail
+    last_comm = entry.pop("_last_comm", None)
+    last_ticket = entry.pop("_last_ticket", None)
+    entry.pop("_last_mail_meta", None)
+    if last_comm:
+        _set("last_comm", last_comm)
+    if last_ticket:
+        _set("last_ticket", last_ticket)
+
+def _dispatch_accounts() -> list[str]:
+    """Enqueue one account job per pilot inbox (deduplicated by job_id)."""
+    dispatched = []
+    for acct_name in ACCOUNTS:
+        kwargs = dict(
+            queue=ACCOUNT_JOB_QUEUE,
+            timeout=ACCOUNT_JOB_TIMEOUT_SECONDS,
+            job_id=f"{BASE}:{acct_name}",
+            acct_name=acct_name,
+        )
+        try:
+            frappe.enqueue(ACCOUNT_JOB_METHOD, deduplicate=True, **kwargs)
+        except TypeError:
+            # Older Frappe: no deduplicate kwarg; the per-account lock still guards overlap.
+            frappe.enqueue(ACCOUNT_JOB_METHOD, **kwargs)
+        dispatched.append(acct_name)
+    return dispatched
+
+def run_account(acct_name: str):
+    """Background job: poll a single pilot inbox under its own lock + breadcrumb namespace."""
+    ns = _acct_ns(acct_name)
+    _set("fingerprint", JOB_FINGERPRINT, ns)
+    _set("last_run", str(frappe.utils.now_datetime()), ns)
+    _set("stage", "start", ns)
+    _set("last_err", None, ns)
+
+    lock = frappe.cache().lock(f"{BASE}:lock:{acct_name}", timeout=LOCK_TIMEOUT_SECONDS, blocking_timeout=1)
+    acquired = lock.acquire(blocking=False)
+    _set("lock_acquired", 1 if acquired else 0, ns)
+    if not acquired:
+        _set("last_skip", str(frappe.utils.now_datetime()), ns)
+        _set("stage", "skipped", ns)
+        return
+
+    _set("last_start", str(frappe.utils.now_datetime()), ns)
+
+    try:
+        budget = _time_budget()
+        deadline = time.monotonic() + budget if budget else None
+        entry = _poll_account(acct_name, ns=ns, serialize_process=True, deadline=deadline)
+        last_mail_meta = entry.get("_last_mail_meta")
+        _publish_last(entry)
+
+        if last_mail_meta:
+            _set("last_mail_meta", last_mail_meta, ns)
+        _set("entry", entry, ns)
+        if _is_interesting({acct_name: entry}):
+            _set("last_entry_nonzero", entry, ns)
+        _set("processed_last_run", entry.get("processed", 0), ns)
+        if deadline is not None:
+            _set("backlog", entry.get("backlog", 0), ns)
+        _set("last_ok", str(frappe.utils.now_datetime()), ns)
+        _set("stage", "done", ns)
+
+    except Exception as e:
+        frappe.db.rollback()
+        _set("last_err", repr(e)[:1000], ns)
+        _set("stage", "fatal", ns)
+        raise
+
+    finally:
+        try:
+            lock.release()
+        except Exception:
+            pass
+
+def _run_parallel():
+    # Dispatcher only: per_account reflects the latest *completed* account jobs.
+    dispatched = _dispatch_accounts()
+    _set("dispatched", dispatched)
+
+    per = {}
+    for acct_name in ACCOUNTS:
+        entry = _get("entry", _acct_ns(acct_name))
+        if entry is not None:
+            per[acct_name] = entry
+
+    if _is_interesting(per):
+        _set("last_per_account_nonzero", per)
+    _set("processed_last_run", sum(int(v.get("processed") or 0) for v in per.values() if isinstance(v, dict)))
+    _set("per_account", per)
+    if _time_budget():
+        _set("backlog", {k: v.get("backlog", 0) for k, v in per.items() if isinstance(v, dict)})
+    _set("last_ok", str(frappe.utils.now_datetime()))
+    _set("stage", "dispatched")
+
 def run():
     last_mail_meta = None
     # --- breadcrumbs ---
@@ -90,9 +658,12 @@ def run():
     _set("last_err", None)
     _set("last_nonfatal_err", None)
 
+    parallel = _parallel_enabled()
+    _set("mode", "parallel" if parallel else "serial")
+
     # --- lock (RedisWrapper supports .lock()) ---
     lock_key = f"{BASE}:lock"
-    lock = frappe.cache().lock(lock_key, timeout=55, blocking_timeout=1)
+    lock = frappe.cache().lock(lock_key, timeout=LOCK_TIMEOUT_SECONDS, blocking_timeout=1)
     acquired = lock.acquire(blocking=False)
     _set("lock_acquired", 1 if acquired else 0)
     if not acquired:
@@ -103,137 +674,37 @@ def run():
     _set("last_start", str(frappe.utils.now_datetime()))
 
     try:
+        if parallel:
+            _run_parallel()
+            return
+
         total = 0
         per = {}
-        blocked_flood = 0
-
-        for acct_name in ACCOUNTS:
-            _set("stage", f"acct:{acct_name}:start")
-            uids = []
-            try:
-                acc = frappe.get_doc("Email Account", acct_name)
-                if not acc.enable_incoming:
-                    per[acct_name] = {"disabled": True, "mails": 0, "processed": 0}
-                    continue
-
-                # Pull + process ourselves so we can count + capture last Communication
-                mails = acc.get_inbound_mails() or []
-                mails_total = len(mails)
-                mails = mails[:MAX_MAILS_PER_ACCOUNT]
-                skipped_blocked = 0
-                skipped_dedupe = 0
-                processed = 0
-                last_comm = None
-                last_ticket = None
-                mail_errors = 0
-
-                # counters at account scope (define these before the loop)
-                # skipped_blocked = 0
-                # skipped_dedupe = 0
-
-                for m in mails:
-                    meta = _mail_identity(m)
-                    ident = _dedupe_ident(meta)
-
-                    if _is_blocked_meta(meta):
-                        skipped_blocked += 1
-                        
-                        if skipped_blocked >= 20:
-                            blocked_flood = 1
-                            _set("stage", f"acct:{acct_name}:blocked_flood")
-                            break
-
-                        # Mail is already marked seen by Frappe receive pipeline during IMAP fetch when sync rule is UNSEEN.
-                        uid = meta.get("uid")
-
-                        _set("last_skip_meta", {"acct": acct_name, "reason": "blocked", **meta})
-                        continue
-
-                    if ident and _dedupe_seen(acct_name, ident):
-                        skipped_dedupe += 1
-                        _set("last_skip_meta", {"acct": acct_name, "reason": "dedupe", **meta})
-                        continue
-
-                    # --- process the mail (this is your existing behavior) ---
-                    try:
-                        comm = m.process()
-                        processed += 1
-                        last_comm = getattr(comm, "name", comm)
-
-                        if ident:
-                            _dedupe_mark(acct_name, ident)
-
-                        try:
-                            cdoc = frappe.get_doc("Communication", last_comm)
-                            if cdoc.reference_doctype == "HD Ticket":
-                                last_ticket = cdoc.reference_name
-                        except Exception:
-                            pass
-
-                        last_mail_meta = {"acct": acct_name, **meta}
-                        _set("last_mail_meta", last_mail_meta)
-                        uid = meta.get("uid")
-                        if uid is not None:
-                            try:
-                                uids.append(int(uid))
-                            except Exception:
-                                pass
-
-                        frappe.db.commit()  # ✅ commit each successful mail
-                    except Exception as e:
-                        frappe.db.rollback()
-                        mail_errors += 1
-                        _set("last_nonfatal_err", f"{acct_name}: {repr(e)[:200]}")
-                        _set("stage", f"acct:{acct_name}:mail_error")
-                        # continue with next mail
-                        continue
-
-                entry = {
-                    "disabled": False,
-                    "mails": len(mails),
-                    "mails_total": mails_total,
-                    "processed": processed,
-                    "skipped_blocked": skipped_blocked,
-                    "skipped_dedupe": skipped_dedupe,
-                    "blocked_flood": blocked_flood,
-                    "mail_errors": mail_errors,
-                }
-                if uids:
-                    entry.update({"uid_min": min(uids), "uid_max": max(uids)})
-                per[acct_name] = entry
-                interesting = any(
-                    v.get("mails_total", 0)
-                    or v.get("processed", 0)
-                    or v.get("skipped_blocked", 0)
-                    or v.get("skipped_dedupe", 0)
-                    or v.get("mail_errors", 0)
-                    for v in per.values()
-                    if isinstance(v, dict)
-                )
-                if interesting:
-                    _set("last_per_account_nonzero", per)
-                total += processed
-
-                # Update global "last_*" based on most recent processed mail
-                if last_comm:
-                    _set("last_comm", last_comm)
-                if last_ticket:
-                    _set("last_ticket", last_ticket)
-
-                _set("stage", f"acct:{acct_name}:done")
-
-            except Exception as e:
-                frappe.db.rollback()
-                per[acct_name] = {"error": repr(e)[:500]}
-                # keep going with other accounts, but remember the last error
-                _set("last_nonfatal_err", f"{acct_name}: {repr(e)[:500]}")
-                _set("stage", f"acct:{acct_name}:error")
+        budget = _time_budget()
+        run_deadline = time.monotonic() + budget if budget else None
+
+        for index, acct_name in enumerate(ACCOUNTS):
+            deadline = None
+            if run_deadline is not None:
+                # Fair share of what is left; time an account does not use rolls forward.
+                left = run_deadline - time.monotonic()
+                deadline = time.monotonic() + left / (len(ACCOUNTS) - index)
+            entry = _poll_account(acct_name, deadline=deadline)
+            last_mail_meta = entry.get("_last_mail_meta") or last_mail_meta
+            _publish_last(entry)
+            per[acct_name] = entry
+
+            if _is_interesting(per):
+                _set("last_per_account_nonzero", per)
+            total += entry.get("processed", 0)
 
         if last_mail_meta:
             _set("last_mail_meta", last_mail_meta)
         _set("processed_total", total)
         _set("processed_last_run", total)
         _set("per_account", per)
+        if run_deadline is not None:
+            _set("backlog", {k: v.get("backlog", 0) for k, v in per.items() if isinstance(v, dict)})
         _set("last_ok", str(frappe.utils.now_datetime()))
         _set("stage", "done")
 
@@ -0,0 +1,187 @@
+"""
+Live KPI counters: Redis counts kept current by per-ticket deltas (opt-in).
+
+With telephony_kpi_live_counters = 1 in site config, the count-only KPI cards (active,
+unclaimed, partner queue, assigned to / submitted by partner) read one Redis key instead
+of the SQL snapshot in telephony.ops_kpis. Age buckets (unclaimed over 60m / 4h) depend on
+the clock, not on writes, so they stay on the snapshot.
+
+Each ticket's current contribution is a bit mask in the MEMBERSHIP_KEY hash. After
+commit, telephony.ticket_state_sync hands over the state of every ticket written in the
+transaction; a Lua script swaps each mask and applies the difference to the counters
+atomically, so applying the same state twice is harmless.
+
+reconcile() (every 10 minutes) recomputes everything from SQL, logs drift and rewrites
+the counters; until it has run once (SEEDED_KEY) the cards keep using the snapshot.
+"""
+
+import frappe
+
+ACTIVE_STATUSES = ("Open", "Replied")
+
+EXCLUDED_STATUSES = ("Closed", "Archived", "Resolved")
+
+# Counter names, in mask bit order. Names match the ops_kpis snapshot keys.
+COUNTERS = (
+    "total_active",
+    "unclaimed_now",
+    "partner_queue",
+    "assigned_to_partner",
+    "submitted_by_partner",
+)
+
+STATE_FIELDS = ("name", "status", "_assign", "custom_fulfilment_party", "custom_request_source")
+
+KEY_PREFIX = "telephony:kpi_counters"
+MEMBERSHIP_KEY = f"{KEY_PREFIX}:membership"
+SEEDED_KEY = f"{KEY_PREFIX}:seeded"
+
+# KEYS[1] membership hash, KEYS[2..] counters in COUNTERS order; ARGV[1] ticket, ARGV[2] mask.
+_APPLY_SCRIPT = """
+local old = tonumber(redis.call('HGET', KEYS[1], ARGV[1]) or '0')
+local new = tonumber(ARGV[2])
+if old == new then
+    return 0
+end
+for i = 2, #KEYS do
+    local bit = 2 ^ (i - 2)
+    local was = math.floor(old / bit) % 2
+    local now = math.floor(new / bit) % 2
+    if was ~= now then
+        redis.call('INCRBY', KEYS[i], now - was)
+    end
+end
+if new == 0 then
+    redis.call('HDEL', KEYS[1], ARGV[1])
+else
+    redis.call('HSET', KEYS[1], ARGV[1], new)
+end
+return 1
+"""
+
+
+def enabled() -> bool:
+    try:
+        return bool(int(frappe.conf.get("telephony_kpi_live_counters") or 0))
+    except Exception:
+        return False
+
+
+def counter_key(counter: str) -> str:
+    return f"{KEY_PREFIX}:{counter}"
+
+
+def ticket_mask(ticket) -> int:
+    """COUNTERS bit mask for one ticket state (dict/doc with STATE_FIELDS)."""
+    status = ticket.get("status") or ""
+    if not status or status in EXCLUDED_STATUSES:
+        return 0
+
+    active = status in ACTIVE_STATUSES
+    unclaimed = (ticket.get("_assign") or "").strip() in ("", "[]")
+    partner = ticket.get("custom_fulfilment_party") == "Partner"
+
+    flags = (
+        active,
+        active and unclaimed,
+        active and partner,
+        partner,
+        ticket.get("custom_request_source") == "Partner",
+    )
+    return sum(1 << bit for bit, flag in enumerate(flags) if flag)
+
+
+def get_count(counter: str):
+    """Live value of one counter, or None when counters are off or not seeded yet."""
+    if not enabled():
+        return None
+
+    try:
+        cache = frappe.cache()
+        seeded, value = cache.mget([cache.make_key(SEEDED_KEY), cache.make_key(counter_key(counter))])
+    except Exception:
+        return None
+
+    if not seeded:
+        return None
+    return max(int(value or 0), 0)
+
+
+# ------------------
+# Deltas
+# ------------------
+
+def apply_states(states: dict):
+    """
+    telephony.ticket_state_sync consumer: {ticket: state row or None}. Swaps each ticket's
+    mask and applies the difference to the counters.
+    """
+    if not enabled() or not states:
+        return
+
+    cache = frappe.cache()
+    keys = [cache.make_key(MEMBERSHIP_KEY), *(cache.make_key(counter_key(c)) for c in COUNTERS)]
+
+    pipe = cache.pipeline()
+    for name, row in states.items():
+        pipe.eval(_APPLY_SCRIPT, len(keys), *keys, name, ticket_mask(row) if row else 0)
+    pipe.execute()
+
+
+# ------------------
+# Reconcile
+# ------------------
+
+def _expected_state() -> tuple[dict, dict]:
+    rows = frappe.db.sql(
+        f"""
+        select {", ".join(STATE_FIELDS)}
+        from `tabHD Ticket`
+        where status not in %(excluded)s
+        """,
+        {"excluded": EXCLUDED_STATUSES},
+        as_dict=True,
+    )
+
+    membership = {}
+    counts = {counter: 0 for counter in COUNTERS}
+    for row in rows:
+        mask = ticket_mask(row)
+        if not mask:
+            continue
+        membership[row.name] = mask
+        for bit, counter in enumerate(COUNTERS):
+            if mask & (1 << bit):
+                counts[counter] += 1
+    return membership, counts
+
+
+def reconcile() -> dict:
+    """
+    Scheduler job: recompute every counter from SQL, log drift against Redis and rewrite
+    counters and memberships in one MULTI. A delta landing between the read and the write
+    is overwritten; the next run settles it.
+    """
+    if not enabled():
+        return {"enabled": False}
+
+    membership, expected = _expected_state()
+
+    cache = frappe.cache()
+    raw = cache.mget([cache.make_key(counter_key(c)) for c in COUNTERS])
+    actual = {counter: int(value or 0) for counter, value in zip(COUNTERS, raw)}
+    drift = {c: actual[c] - expected[c] for c in COUNTERS if actual[c] != expected[c]}
+
+    pipe = cache.pipeline(transaction=True)
+    pipe.delete(cache.make_key(MEMBERSHIP_KEY))
+    if membership:
+        pipe.hset(cache.make_key(MEMBERSHIP_KEY), mapping=membership)
+    for counter in COUNTERS:
+        pipe.set(cache.make_key(counter_key(counter)), expected[counter])
+    pipe.set(cache.make_key(SEEDED_KEY), 1)
+    pipe.execute()
+
+    if drift:
+        frappe.logger("telephony").warning("KPI counter drift corrected: %s", drift)
+
+    return {"enabled": True, "counts": expected, "drift": drift}
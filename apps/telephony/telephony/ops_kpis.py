@@ -1,40 +1,125 @@
+"""
+Ops and partner KPI number cards.
+
+The cards share one snapshot: get_kpi_snapshot() computes all counts with a single
+conditional-aggregate query over non-terminal HD Tickets and caches the result in Redis
+for SNAPSHOT_TTL_SECONDS. HD Ticket writes that touch a counted field, and ToDo writes on
+tickets (which rewrite _assign with db.set_value), drop the cached snapshot.
+telephony_kpi_snapshot_ttl_seconds = 0 turns the cache off.
+
+Count-only cards go through get_count(), which prefers the live Redis counters of
+telephony.kpi_counters when telephony_kpi_live_counters is on and seeded. The unclaimed
+age cards go through get_unclaimed_over(), which reads the telephony.unclaimed_pool sorted
+set (idle = time since the ticket entered the pool) once it is seeded.
+"""
+
 import frappe
 
+from telephony import kpi_counters, unclaimed_pool
+
 _ACTIVE_STATUSES = ("Open", "Replied")
 
+_PARTNER_EXCLUDED_STATUSES = ("Closed", "Archived", "Resolved")
+
 _UNCLAIMED_SQL = "(IFNULL(_assign, '') IN ('', '[]'))"
 
-def _count_sql(where_sql: str, params: tuple = ()) -> int:
+SNAPSHOT_KEY = "telephony:ops_kpis:snapshot"
+
+SNAPSHOT_TTL_SECONDS = 5
+
+# HD Ticket fields the snapshot counts on; other ticket writes leave it cached.
+COUNTED_FIELDS = ("status", "_assign", "custom_fulfilment_party", "custom_request_source")
+
+
+def _snapshot_ttl() -> int:
+    try:
+        value = frappe.conf.get("telephony_kpi_snapshot_ttl_seconds")
+    except Exception:
+        value = None
+    if value is None:
+        return SNAPSHOT_TTL_SECONDS
+    try:
+        return max(0, int(value))
+    except (TypeError, ValueError):
+        return SNAPSHOT_TTL_SECONDS
+
+
+def _query_snapshot() -> dict:
     row = frappe.db.sql(
         f"""
-        SELECT COUNT(*) AS c
+        SELECT
+            SUM(status IN %(active)s) AS total_active,
+            SUM(status IN %(active)s AND {_UNCLAIMED_SQL}) AS unclaimed_now,
+            SUM(
+                status IN %(active)s AND {_UNCLAIMED_SQL}
+                AND modified <= NOW() - INTERVAL 60 MINUTE
+            ) AS unclaimed_over_60m,
+            SUM(
+                status IN %(active)s AND {_UNCLAIMED_SQL}
+                AND modified <= NOW() - INTERVAL 240 MINUTE
+            ) AS unclaimed_over_4h,
+            SUM(status IN %(active)s AND custom_fulfilment_party = 'Partner') AS partner_queue,
+            SUM(custom_fulfilment_party = 'Partner') AS assigned_to_partner,
+            SUM(custom_request_source = 'Partner') AS submitted_by_partner
         FROM `tabHD Ticket`
-        WHERE {where_sql}
+        WHERE status NOT IN %(excluded)s
         """,
-        params,
+        {"active": _ACTIVE_STATUSES, "excluded": _PARTNER_EXCLUDED_STATUSES},
         as_dict=True,
     )[0]
 
-    return int(row.get("c") or 0)
+    return {key: int(value or 0) for key, value in row.items()}
+
+
+def get_kpi_snapshot() -> dict:
+    """Every KPI card count, from Redis when a snapshot younger than the TTL exists."""
+    ttl = _snapshot_ttl()
+    if ttl:
+        try:
+            snapshot = frappe.cache().get_value(SNAPSHOT_KEY)
+        except Exception:
+            snapshot = None
+        if snapshot:
+            return snapshot
+
+    snapshot = _query_snapshot()
+    if ttl:
+        try:
+            frappe.cache().set_value(SNAPSHOT_KEY, snapshot, expires_in_sec=ttl)
+        except Exception:
+            pass
+    return snapshot
+
 
+def get_count(counter: str) -> int:
+    """One count-only card: the live counter when available, else the snapshot."""
+    live = kpi_counters.get_count(counter)
+    if live is not None:
+        return live
+    return get_kpi_snapshot()[counter]
 
-def _count_active(extra_where_sql: str = "", extra_params: tuple = ()) -> int:
-    where_sql = "status IN %s"
-    params = [_ACTIVE_STATUSES]
 
-    if extra_where_sql:
-        where_sql += f" AND {extra_where_sql}"
-        params.extend(extra_params)
+def get_unclaimed_over(min_idle_minutes: int, snapshot_key: str) -> int:
+    """Unclaimed age card: a pool range count when the pool is seeded, else the snapshot."""
+    pooled = unclaimed_pool.count_over(min_idle_minutes)
+    if pooled is not None:
+        return pooled
+    return get_kpi_snapshot()[snapshot_key]
 
-    return _count_sql(where_sql, tuple(params))
 
+def invalidate(doc=None, method=None):
+    """doc_events hook (HD Ticket, ToDo): drop the cached snapshot when a counted value moved."""
+    if doc is not None:
+        if doc.get("doctype") == "ToDo":
+            if doc.get("reference_type") != "HD Ticket":
+                return
+        elif method != "on_trash" and not any(doc.has_value_changed(f) for f in COUNTED_FIELDS):
+            return
 
-def _count_unclaimed(min_idle_minutes: int) -> int:
-    mins = int(min_idle_minutes)
-    return _count_active(
-        f"{_UNCLAIMED_SQL} AND TIMESTAMPDIFF(MINUTE, modified, NOW()) >= %s",
-        (mins,),
-    )
+    try:
+        frappe.cache().delete_value(SNAPSHOT_KEY)
+    except Exception:
+        pass
 
 
 def _card(value: int, report_name: str) -> dict:
@@ -46,30 +131,27 @@ def _card(value: int, report_name: str) -> dict:
 # Keep method names for compatibility (optional), but route to the new report names
 @frappe.whitelist()
 def unassigned_now() -> dict:
-    return _card(_count_unclaimed(0), "TELECTRO Ops Unclaimed Now")
+    return _card(get_count("unclaimed_now"), "TELECTRO Ops Unclaimed Now")
 
 
 @frappe.whitelist()
 def unassigned_over_60m() -> dict:
-    return _card(_count_unclaimed(60), "TELECTRO Ops Unclaimed Over 60m")
+    return _card(get_unclaimed_over(60, "unclaimed_over_60m"), "TELECTRO Ops Unclaimed Over 60m")
 
 
 @frappe.whitelist()
 def unassigned_over_4h() -> dict:
-    return _card(_count_unclaimed(240), "TELECTRO Ops Unclaimed Over 4h")
+    return _card(get_unclaimed_over(240, "unclaimed_over_4h"), "TELECTRO Ops Unclaimed Over 4h")
 
 
 @frappe.whitelist()
 def total_active_now() -> dict:
-    return _card(_count_active(), "TELECTRO Ops Total Active")
+    return _card(get_count("total_active"), "TELECTRO Ops Total Active")
 
 
 @frappe.whitelist()
 def partner_queue_now() -> dict:
-    return _card(
-        _count_active("COALESCE(custom_fulfilment_party, '') = %s", ("Partner",)),
-        "TELECTRO Ops Partner Queue",
-    )
+    return _card(get_count("partner_queue"), "TELECTRO Ops Partner Queue")
 
 
 # Optional: add “properly named” aliases for later cleanup
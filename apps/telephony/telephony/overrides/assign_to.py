@@ -1,4 +1,6 @@
 import json
+import os
+import random
 
 import frappe
 from frappe.desk.form import assign_to as core_assign_to
@@ -6,6 +8,9 @@ from frappe.desk.form import assign_to as core_assign_to
 
 POOL_USER = "helpdesk@local.test"
 
+# Open ToDos read per ticket by the lean state loader (matches the previous cap).
+OPEN_TODO_LIMIT = 200
+
 
 def _dbg(*args, **kwargs):
     return
@@ -74,85 +79,67 @@ def _is_regular_agent_user(user: str) -> bool:
     )
 
 
-def _get_hd_ticket_assignment_state(name: str) -> dict:
-    doc = frappe.get_doc("HD Ticket", name)
-
-    raw_assign = doc.get("_assign")
+def _parse_assign_value(raw_assign) -> list[str]:
     if isinstance(raw_assign, str):
         s = raw_assign.strip()
         if not s:
-            assign_users = []
-        else:
-            try:
-                parsed = json.loads(s)
-                if isinstance(parsed, list):
-                    assign_users = [str(x).strip() for x in parsed if str(x).strip()]
-                else:
-                    assign_users = [s]
-            except Exception:
-                assign_users = [s]
-    elif isinstance(raw_assign, list):
-        assign_users = [str(x).strip() for x in raw_assign if str(x).strip()]
-    else:
-        assign_users = []
+            return []
+        try:
+            parsed = json.loads(s)
+            if isinstance(parsed, list):
+                return [str(x).strip() for x in parsed if str(x).strip()]
+            return [s]
+        except Exception:
+            return [s]
 
-    open_todo_users = frappe.get_all(
-        "ToDo",
-        filters={
-            "reference_type": "HD Ticket",
-            "reference_name": name,
-            "status": "Open",
-        },
-        pluck="allocated_to",
-        ignore_permissions=True,
-        limit_page_length=200,
+    if isinstance(raw_assign, list):
+        return [str(x).strip() for x in raw_assign if str(x).strip()]
+
+    return []
+
+
+def _get_hd_ticket_assignment_state(name: str) -> dict:
+    """
+    Lean assignment state: _assign, fulfilment party and open ToDos (newest first) in one
+    query. add() reuses open_todos for its owner cleanup instead of reading them again.
+    """
+    rows = frappe.db.sql(
+        """
+        select t._assign, t.custom_fulfilment_party,
+               td.name as todo, td.allocated_to, td.creation
+        from `tabHD Ticket` t
+        left join `tabToDo` td
+          on td.reference_type = 'HD Ticket'
+         and td.reference_name = t.name
+         and td.status = 'Open'
+        where t.name = %(name)s
+        order by td.creation desc
+        limit %(limit)s
+        """,
+        {"name": name, "limit": OPEN_TODO_LIMIT},
+        as_dict=True,
     )
-    open_todo_users = sorted({(u or "").strip() for u in (open_todo_users or []) if (u or "").strip()})
 
-    fulfilment_party = (doc.get("custom_fulfilment_party") or "").strip()
+    if not rows:
+        frappe.throw(f"HD Ticket {name} not found", frappe.DoesNotExistError)
+
+    assign_users = _parse_assign_value(rows[0].get("_assign"))
+    open_todos = [
+        {"name": row.todo, "allocated_to": row.allocated_to, "creation": row.creation}
+        for row in rows
+        if row.todo
+    ]
+    open_todo_users = sorted(
+        {(r["allocated_to"] or "").strip() for r in open_todos if (r["allocated_to"] or "").strip()}
+    )
 
     return {
-        "doc": doc,
         "assign_users": assign_users,
+        "open_todos": open_todos,
         "open_todo_users": open_todo_users,
         "effective_users": open_todo_users or assign_users,
         "is_pool": not open_todo_users and not assign_users,
-        "fulfilment_party": fulfilment_party,
-    }
-
-def _get_hd_ticket_state(name: str) -> dict:
-    doc = frappe.get_doc("HD Ticket", name)
-
-    current_assign = doc.get("_assign")
-    if isinstance(current_assign, str):
-        try:
-            current_assign = json.loads(current_assign)
-        except Exception:
-            current_assign = [current_assign] if current_assign.strip() else []
-    elif not isinstance(current_assign, list):
-        current_assign = []
-
-    current_assign = [str(x).strip() for x in current_assign if str(x).strip()]
-
-    open_todos = frappe.get_all(
-        "ToDo",
-        filters={
-            "reference_type": "HD Ticket",
-            "reference_name": name,
-            "status": "Open",
-        },
-        fields=["name", "allocated_to"],
-        ignore_permissions=True,
-        limit_page_length=50,
-    )
-    open_users = sorted({(r.get("allocated_to") or "").strip() for r in open_todos if (r.get("allocated_to") or "").strip()})
-
-    return {
-        "doc": doc,
-        "assign": current_assign,
-        "open_users": open_users,
-        "is_pool": not open_users and not current_assign,
-        "fulfilment_party": (doc.get("custom_fulfilment_party") or "").strip(),
+        "fulfilment_party": (rows[0].get("custom_fulfilment_party") or "").strip(),
     }
 
 
@@ -160,7 +147,8 @@ def _throw_assign_block(msg: str):
     frappe.throw(msg)
 
 
-def _block_if_needed(d, action: str):
+def _block_if_needed(d, action: str) -> dict | None:
+    """Apply the pilot assignment policy; returns the HD Ticket state it checked (else None)."""
     payload = _ensure_core_assign_to_shape(d)
     doctype = payload.get("doctype")
     name = payload.get("name")
@@ -168,7 +156,7 @@ def _block_if_needed(d, action: str):
     target_users = [str(x).strip() for x in target_users if str(x).strip()]
 
     if doctype != "HD Ticket" or not name:
-        return
+        return None
 
     current_user = getattr(getattr(frappe, "session", None), "user", None) or ""
     state = _get_hd_ticket_assignment_state(name)
@@ -189,7 +177,7 @@ def _block_if_needed(d, action: str):
     # Administrator remains a development escape hatch.
     # This avoids self-lockout while the pilot rules are still evolving.
     if current_user == "Administrator":
-        return
+        return state
 
     # Pilot accountability rule:
     # Generic Assign To may only assign an HD Ticket from a true zero-owner base.
@@ -226,11 +214,11 @@ def _block_if_needed(d, action: str):
     # Because the single-owner guard above already blocked owned tickets, this only
     # allows supervisor/coordinator assignment when the ticket is currently unowned.
     if _is_operational_intervention_user(current_user):
-        return
+        return state
 
     # Conservative: only enforce technician/agent restrictions for regular agents.
     if not _is_regular_agent_user(current_user):
-        return
+        return state
 
     # Partner-owned tickets: regular agents must not mutate generic assignment state.
     if state["fulfilment_party"] == "Partner":
@@ -240,7 +228,7 @@ def _block_if_needed(d, action: str):
     # allow only self-claim through generic assign.
     if state["is_pool"]:
         if len(target_users) == 1 and target_users[0] == current_user:
-            return
+            return state
         frappe.throw("Tickets in pool can only be claimed by yourself.")
 
     # Existing assigned ticket:
@@ -257,6 +245,8 @@ def _block_if_needed(d, action: str):
 
         frappe.throw("You cannot reassign existing tickets from this dialog. Use the approved actions.")
 
+    return state
+
 
 def _parse_assign_to_users(assign_to):
     if not assign_to:
@@ -296,10 +286,33 @@ def _should_raise() -> bool:
     return int(frappe.conf.get("telephony_assign_guard_raise", 0) or 0) == 1
 
 
+def _diagnostics_sampled() -> bool:
+    """
+    Whether this call takes the before/final sequence snapshots, written to the telephony
+    log by _log_assign_diagnostics. Off by default: on when TELECTRO_DEBUG or
+    telephony_assign_diagnostics is set, otherwise for a
+    telephony_assign_diagnostics_sample_rate fraction (0..1) of calls. Failures always
+    snapshot in the exception handler.
+    """
+    if os.getenv("TELECTRO_DEBUG", "").strip().lower() in ("1", "true", "yes", "on"):
+        return True
+
+    if _cfg_bool("telephony_assign_diagnostics"):
+        return True
+
+    try:
+        rate = float(frappe.conf.get("telephony_assign_diagnostics_sample_rate") or 0)
+    except Exception:
+        rate = 0
+
+    return rate > 0 and random.random() < rate
+
+
 def _snap_ticket_seq_state() -> dict:
     """
     Snapshot ID allocator state for HD Ticket.
     Useful to prove: "sequence advanced, but ticket row rolled back".
+    Two queries; only taken on failures or sampled calls (_diagnostics_sampled).
     """
     out = {
         "site": getattr(getattr(frappe, "local", None), "site", None),
@@ -348,6 +361,22 @@ def _log_assign_error(title: str, payload, exc: Exception, extra: dict | None =
         pass
 
 
+def _log_assign_diagnostics(action: str, payload, snap_before: dict, snap_final: dict):
+    """Sampled/debug calls: write the before/final sequence snapshots to the telephony log."""
+    try:
+        msg = {
+            "action": action,
+            "site": getattr(getattr(frappe, "local", None), "site", None),
+            "user": getattr(getattr(frappe, "session", None), "user", None),
+            "payload": payload,
+            "snap_before": snap_before,
+            "snap_final": snap_final,
+        }
+        frappe.logger("telephony").info(json.dumps(msg, default=str))
+    except Exception:
+        pass
+
+
 def _ensure_core_assign_to_shape(d: dict) -> dict:
     payload = dict(d or {})
 
@@ -514,11 +543,11 @@ def add(*args, **kwargs):
         d.update(args[0])
 
     _dbg("add:enter", d, args=args, kwargs=kwargs)
-    snap_before = _snap_ticket_seq_state()
+    snap_before = _snap_ticket_seq_state() if _diagnostics_sampled() else None
     _dbg("add:snap_before", snap_before)
 
     try:
-        _block_if_needed(d, "assignment")
+        state = _block_if_needed(d, "assignment")
 
         payload = _ensure_core_assign_to_shape(d)
         doctype = payload["doctype"]
@@ -592,18 +621,8 @@ def add(*args, **kwargs):
         target_user = uniq_users[0]
 
         # Cancel every currently-open ToDo that is not the target owner.
-        open_todos = frappe.get_all(
-            "ToDo",
-            filters={
-                "reference_type": "HD Ticket",
-                "reference_name": name,
-                "status": "Open",
-            },
-            fields=["name", "allocated_to", "creation"],
-            order_by="creation desc",
-            ignore_permissions=True,
-            limit_page_length=200,
-        )
+        # The guard already loaded them (newest first); nothing has written since.
+        open_todos = state["open_todos"] if state else []
 
         target_open = None
 
@@ -706,8 +725,10 @@ def add(*args, **kwargs):
         raise
 
     finally:
-        snap_final = _snap_ticket_seq_state()
-        _dbg("add:snap_final", snap_final)
+        if snap_before is not None:
+            snap_final = _snap_ticket_seq_state()
+            _dbg("add:snap_final", snap_final)
+            _log_assign_diagnostics("assign_to.add", d, snap_before, snap_final)
         
 @frappe.whitelist()
 def remove(*args, **kwargs):
@@ -716,7 +737,7 @@ def remove(*args, **kwargs):
         d.update(args[0])
 
     _dbg("remove:enter", d, args=args, kwargs=kwargs)
-    snap_before = _snap_ticket_seq_state()
+    snap_before = _snap_ticket_seq_state() if _diagnostics_sampled() else None
     _dbg("remove:snap_before", snap_before)
 
     try:
@@ -805,5 +826,7 @@ def remove(*args, **kwargs):
         raise
 
     finally:
-        snap_final = _snap_ticket_seq_state()
-        _dbg("remove:snap_final", snap_final)
\ No newline at end of file
+        if snap_before is not None:
+            snap_final = _snap_ticket_seq_state()
+            _dbg("remove:snap_final", snap_final)
+            _log_assign_diagnostics("assign_to.remove", d, snap_before, snap_final)
\ No newline at end of file
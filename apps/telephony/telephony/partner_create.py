@@ -1,6 +1,4 @@
 import frappe
-import re
-from html import unescape
 import base64
 import mimetypes
 from pathlib import Path
@@ -10,6 +8,8 @@ from telephony.partner_identity import (
     resolve_partner_name_for_user,
     user_has_partner_ticket_membership,
 )
+from telephony import partner_notes
+from telephony.ticket_context import get_ticket_context
 
 
 PARTNER_ROLE = "TELECTRO-POC Role - Partner"
@@ -54,8 +54,6 @@ PARTNER_DETAIL_FIELDS = [
     "custom_partner_work_completed",
 ]
 
-_COMMENT_TAG_RE = re.compile(r"<[^>]+>")
-
 TICKET_EVIDENCE_MAX_BYTES = 10 * 1024 * 1024
 
 TICKET_EVIDENCE_ALLOWED_EXTENSIONS = {
@@ -295,11 +293,6 @@ def _format_partner_work_rework_comment(user: str, note: str) -> str:
 
     return f"Partner Work Rework Required | Reason: Telectro rework requested by {user}: {note}"
 
-def _comment_to_text(content: str | None) -> str:
-    text = content or ""
-    text = _COMMENT_TAG_RE.sub("", text)
-    return unescape(text).strip()
-
 def _add_ticket_evidence_upload_comment(ticket_name: str, actor_label: str, file_name: str):
     try:
         ticket_name = (ticket_name or "").strip()
@@ -399,64 +392,14 @@ def _create_private_ticket_evidence_file(
         "creation": file_doc.creation,
     }
 
-def _get_latest_ticket_comment_text(ticket_name: str, startswith: str) -> str:
-    rows = frappe.get_all(
-        "Comment",
-        filters={
-            "reference_doctype": "HD Ticket",
-            "reference_name": ticket_name,
-            "comment_type": "Comment",
-        },
-        fields=["content", "creation"],
-        order_by="creation desc",
-        limit_page_length=20,
-    )
-
-    prefix = (startswith or "").strip()
-
-    for row in rows:
-        text = _comment_to_text(row.get("content"))
-        if text.startswith(prefix):
-            return text
-
-    return ""
+def get_partner_note_summaries(ticket_names) -> dict:
+    """{ticket: note summary} for many tickets, read from the TELECTRO Partner Note store."""
+    return partner_notes.get_summaries(ticket_names)
 
 
 def get_partner_note_summary(ticket_name: str) -> dict:
-    return {
-        "latest_partner_acceptance_note": _get_latest_ticket_comment_text(
-            ticket_name,
-            "Partner acceptance note by",
-        ),
-        "latest_partner_work_done_note": _get_latest_ticket_comment_text(
-            ticket_name,
-            "Partner work done note by",
-        ),
-        "latest_partner_review_note": _get_latest_ticket_comment_text(
-            ticket_name,
-            "Partner Acceptance Review | Outcome:",
-        ),
-        "latest_partner_rework_note": _get_latest_ticket_comment_text(
-            ticket_name,
-            "Partner Acceptance Rework Required | Reason:",
-        ),
-        "latest_partner_work_rework_note": _get_latest_ticket_comment_text(
-            ticket_name,
-            "Partner Work Rework Required | Reason:",
-        ),
-        "latest_partner_work_review_note": _get_latest_ticket_comment_text(
-            ticket_name,
-            "Partner Work Review | Outcome:",
-        ),
-        "latest_partner_acceptance_request_note": _get_latest_ticket_comment_text(
-            ticket_name,
-            "Partner Acceptance Requested",
-        ),
-        "latest_partner_acceptance_request_note": _get_latest_ticket_comment_text(
-            ticket_name,
-            "Partner Acceptance Requested",
-        ),
-    }
+    summary = get_partner_note_summaries([ticket_name]).get((ticket_name or "").strip())
+    return summary or partner_notes.empty_summary()
     
 def apply_partner_work_state(doc, method=None):
     fulfilment_party = (doc.get("custom_fulfilment_party") or "").strip()
@@ -710,7 +653,11 @@ def _format_partner_acceptance_review_comment(outcome_label: str, note: str | No
 
 def enforce_partner_create_v1(doc, method=None):
     user = frappe.session.user
-    if not _is_partner_creator(user):
+    if not user or user == "Guest":
+        return
+
+    ctx = get_ticket_context(doc)
+    if PARTNER_CREATOR_ROLE not in ctx.roles(user):
         return
 
     if not doc.is_new():
@@ -724,7 +671,7 @@ def enforce_partner_create_v1(doc, method=None):
     _set_if_field_exists(doc, "custom_partner_work_state", "")
     _set_if_field_exists(doc, "custom_partner_work_completed", None)
 
-    if not doc.ticket_type and frappe.db.exists("HD Ticket Type", SERVICE_REQUEST):
+    if not doc.ticket_type and ctx.exists("HD Ticket Type", SERVICE_REQUEST):
         doc.ticket_type = SERVICE_REQUEST
 
     doc.agent_group = None
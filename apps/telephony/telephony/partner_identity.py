@@ -1,3 +1,20 @@
+"""
+Partner organisation identity: memberships, tenant resolution and dispatch users.
+
+The Partner org graph (partners with enabled flag and Default Dispatch User, enabled
+memberships per user, and the enabled flag / Partner capability of each dispatch user)
+is loaded with four queries into a per-process graph, so the helpers below are dict
+lookups. The graph is tagged with a Redis generation token and also stored in Redis under
+that token with its build time, so other workers pick it up without touching the
+database. TELECTRO Partner writes (members are child rows saved with it) and writes to a
+dispatch User bump the token once they commit, so no worker can store the pre-write graph
+under the new token; each request checks it once. A graph older than MAX_AGE_SECONDS,
+whether held in process or in Redis, is rebuilt from the database, which bounds staleness
+for writes that bypass the hooks.
+"""
+
+import time
+
 import frappe
 from frappe.utils import cint
 
@@ -7,55 +24,188 @@ PARTNER_ROLES = {
     "TELECTRO-POC Role - Partner Creator",
 }
 
+GEN_KEY = "telephony:partner_graph:gen"
+
+GRAPH_KEY_PREFIX = "telephony:partner_graph:v"
+
+MAX_AGE_SECONDS = 15 * 60
+
+_LOCAL_ATTR = "telectro_partner_graph"
+
+_GRAPHS: dict = {}
+
 
 def _clean(value) -> str:
     return str(value or "").strip()
 
 
-def get_enabled_partner_names_for_user(user: str) -> list[str]:
-    """
-    Return enabled TELECTRO Partner organisations for which the User has an
-    enabled membership.
-
-    Membership determines organisation / tenant identity. Roles are checked
-    separately when evaluating capability.
-    """
-    user = _clean(user)
+# ------------------
+# Partner org graph
+# ------------------
 
-    if not user or user == "Guest":
-        return []
+def _build_graph() -> dict:
+    partners = {
+        row.name: {
+            "enabled": cint(row.enabled),
+            "default_dispatch_user": _clean(row.default_dispatch_user),
+        }
+        for row in frappe.get_all(
+            "TELECTRO Partner",
+            fields=["name", "enabled", "default_dispatch_user"],
+            limit_page_length=0,
+            ignore_permissions=True,
+        )
+    }
 
-    partner_names = frappe.get_all(
+    members = {}
+    user_partners = {}
+    for row in frappe.get_all(
         "TELECTRO Partner Member",
         filters={
-            "user": user,
             "enabled": 1,
             "parenttype": "TELECTRO Partner",
             "parentfield": "members",
         },
-        pluck="parent",
+        fields=["parent", "user"],
+        limit_page_length=0,
+        ignore_permissions=True,
+    ):
+        partner_name = _clean(row.parent)
+        user = _clean(row.user)
+        if not partner_name or not user:
+            continue
+        members.setdefault(partner_name, set()).add(user)
+        if cint((partners.get(partner_name) or {}).get("enabled")):
+            user_partners.setdefault(user, set()).add(partner_name)
+
+    dispatch_names = sorted(
+        {p["default_dispatch_user"] for p in partners.values() if p["default_dispatch_user"]}
     )
+    dispatch_users = {}
+    if dispatch_names:
+        partner_role_users = set(
+            frappe.get_all(
+                "Has Role",
+                filters={
+                    "parenttype": "User",
+                    "parent": ["in", dispatch_names],
+                    "role": ["in", sorted(PARTNER_ROLES)],
+                },
+                pluck="parent",
+                limit_page_length=0,
+                ignore_permissions=True,
+            )
+        )
+        for row in frappe.get_all(
+            "User",
+            filters={"name": ["in", dispatch_names]},
+            fields=["name", "enabled"],
+            limit_page_length=0,
+            ignore_permissions=True,
+        ):
+            dispatch_users[row.name] = {
+                "enabled": cint(row.enabled),
+                "partner_role": row.name in partner_role_users,
+            }
+
+    return {
+        "partners": partners,
+        "members": members,
+        "user_partners": {user: sorted(names) for user, names in user_partners.items()},
+        "dispatch_users": dispatch_users,
+    }
+
+
+def _current_gen():
+    try:
+        return str(frappe.cache().get_value(GEN_KEY) or "0")
+    except Exception:
+        return None
+
+
+def _load_graph(gen) -> dict:
+    """{"built_at": epoch seconds, "graph": ...}: the Redis copy while fresh, else a rebuild."""
+    key = f"{GRAPH_KEY_PREFIX}{gen}"
+    if gen is not None:
+        try:
+            entry = frappe.cache().get_value(key)
+        except Exception:
+            entry = None
+        if entry is not None and time.time() - entry["built_at"] < MAX_AGE_SECONDS:
+            return entry
+
+    entry = {"built_at": time.time(), "graph": _build_graph()}
+    if gen is not None:
+        try:
+            frappe.cache().set_value(key, entry, expires_in_sec=MAX_AGE_SECONDS)
+        except Exception:
+            pass
+    return entry
+
+
+def get_partner_graph() -> dict:
+    """The Partner org graph (see module docstring); one generation check per request."""
+    graph = getattr(frappe.local, _LOCAL_ATTR, None)
+    if graph is not None:
+        return graph
+
+    site = getattr(frappe.local, "site", None)
+    gen = _current_gen()
+    entry = _GRAPHS.get(site)
+    if (
+        entry is None
+        or (gen is not None and entry["gen"] != gen)
+        or time.time() - entry["built_at"] >= MAX_AGE_SECONDS
+    ):
+        entry = {"gen": gen, **_load_graph(gen)}
+        _GRAPHS[site] = entry
+
+    setattr(frappe.local, _LOCAL_ATTR, entry["graph"])
+    return entry["graph"]
+
+
+def _bump_gen():
+    try:
+        frappe.cache().set_value(GEN_KEY, frappe.generate_hash(length=12))
+    except Exception:
+        pass
+
+
+def invalidate_partner_graph(doc=None, method=None):
+    """
+    doc_events hook (TELECTRO Partner, User): force a rebuild in every worker. User writes
+    only matter when the User is a dispatch user in the current graph. This worker drops
+    its graph now; the token is bumped after commit (and after rollback, retiring any graph
+    this request built from its uncommitted rows).
+    """
+    if doc is not None and doc.get("doctype") == "User":
+        if doc.name not in get_partner_graph()["dispatch_users"]:
+            return
 
-    partner_names = sorted(
-        {
-            _clean(partner_name)
-            for partner_name in partner_names
-            if _clean(partner_name)
-        }
-    )
+    _GRAPHS.pop(getattr(frappe.local, "site", None), None)
+    try:
+        delattr(frappe.local, _LOCAL_ATTR)
+    except AttributeError:
+        pass
 
-    if not partner_names:
+    frappe.db.after_commit.add(_bump_gen)
+    frappe.db.after_rollback.add(_bump_gen)
+
+
+def get_enabled_partner_names_for_user(user: str) -> list[str]:
+    """
+    Return enabled TELECTRO Partner organisations for which the User has an
+    enabled membership.
+
+    Membership determines organisation / tenant identity. Roles are checked
+    separately when evaluating capability.
+    """
+    user = _clean(user)
+
+    if not user or user == "Guest":
         return []
 
-    return frappe.get_all(
-        "TELECTRO Partner",
-        filters={
-            "name": ["in", partner_names],
-            "enabled": 1,
-        },
-        pluck="name",
-        order_by="name asc",
-    )
+    return list(get_partner_graph()["user_partners"].get(user, []))
 
 
 def is_enabled_partner_member(
@@ -91,16 +241,8 @@ def resolve_partner_dispatch_user(partner_name: str) -> str:
             frappe.ValidationError,
         )
 
-    partner = frappe.db.get_value(
-        "TELECTRO Partner",
-        partner_name,
-        [
-            "name",
-            "enabled",
-            "default_dispatch_user",
-        ],
-        as_dict=True,
-    )
+    graph = get_partner_graph()
+    partner = graph["partners"].get(partner_name)
 
     if not partner:
         frappe.throw(
@@ -108,13 +250,13 @@ def resolve_partner_dispatch_user(partner_name: str) -> str:
             frappe.ValidationError,
         )
 
-    if not cint(partner.enabled):
+    if not cint(partner["enabled"]):
         frappe.throw(
             f"Partner organisation {frappe.bold(partner_name)} is disabled.",
             frappe.ValidationError,
         )
 
-    dispatch_user = _clean(partner.default_dispatch_user)
+    dispatch_user = partner["default_dispatch_user"]
 
     if not dispatch_user:
         frappe.throw(
@@ -123,44 +265,23 @@ def resolve_partner_dispatch_user(partner_name: str) -> str:
             frappe.ValidationError,
         )
 
-    membership_exists = frappe.db.exists(
-        "TELECTRO Partner Member",
-        {
-            "parent": partner_name,
-            "parenttype": "TELECTRO Partner",
-            "parentfield": "members",
-            "user": dispatch_user,
-            "enabled": 1,
-        },
-    )
-
-    if not membership_exists:
+    if dispatch_user not in graph["members"].get(partner_name, ()):
         frappe.throw(
             f"Default Dispatch User {frappe.bold(dispatch_user)} "
             f"is not an enabled member of {frappe.bold(partner_name)}.",
             frappe.ValidationError,
         )
 
-    user = frappe.db.get_value(
-        "User",
-        dispatch_user,
-        [
-            "name",
-            "enabled",
-        ],
-        as_dict=True,
-    )
+    user = graph["dispatch_users"].get(dispatch_user)
 
-    if not user or not cint(user.enabled):
+    if not user or not cint(user["enabled"]):
         frappe.throw(
             f"Default Dispatch User {frappe.bold(dispatch_user)} "
             "is not an enabled User.",
             frappe.ValidationError,
         )
 
-    roles = set(frappe.get_roles(dispatch_user))
-
-    if not roles & PARTNER_ROLES:
+    if not user["partner_role"]:
         frappe.throw(
             f"Default Dispatch User {frappe.bold(dispatch_user)} "
             "does not have a Partner capability role.",
@@ -1,30 +1,13 @@
 import frappe
 
-
-ACTIVE_EXCLUDED_STATUSES = ("Closed", "Archived", "Resolved")
+from telephony.ops_kpis import get_count
 
 
 @frappe.whitelist()
 def assigned_to_partner_now() -> int:
-    return frappe.db.sql(
-        """
-        select count(*)
-        from `tabHD Ticket` t
-        where coalesce(t.custom_fulfilment_party, '') = 'Partner'
-          and coalesce(t.status, '') not in %s
-        """,
-        (ACTIVE_EXCLUDED_STATUSES,),
-    )[0][0]
+    return get_count("assigned_to_partner")
 
 
 @frappe.whitelist()
 def submitted_by_partner_now() -> int:
-    return frappe.db.sql(
-        """
-        select count(*)
-        from `tabHD Ticket` t
-        where coalesce(t.custom_request_source, '') = 'Partner'
-          and coalesce(t.status, '') not in %s
-        """,
-        (ACTIVE_EXCLUDED_STATUSES,),
-    )[0][0]
\ No newline at end of file
+    return get_count("submitted_by_partner")
@@ -0,0 +1,237 @@
+"""
+Materialised partner notes: the latest note per (HD Ticket, note kind).
+
+Partner actions write their note as a ticket Comment. The Comment hooks below upsert
+the matching TELECTRO Partner Note row inside the same insert, so the store commits or
+rolls back with the partner action itself. Readers get every summary for a page of
+tickets with one indexed query instead of scanning and un-HTML-ing recent Comments.
+
+Rows are named TPN-<ticket>-<kind>. Comment edits and deletes re-derive that ticket's
+rows from its Comments. backfill() seeds the store from existing Comments; after_migrate
+runs it once while the store is empty, and `bench --site <site>
+telectro-backfill-partner-notes` re-runs it on demand.
+"""
+
+import re
+from html import unescape
+
+import frappe
+
+DOCTYPE = "TELECTRO Partner Note"
+
+# (summary key, note kind, comment prefix)
+NOTE_KINDS = (
+    ("latest_partner_acceptance_note", "acceptance", "Partner acceptance note by"),
+    ("latest_partner_work_done_note", "work_done", "Partner work done note by"),
+    ("latest_partner_review_note", "review", "Partner Acceptance Review | Outcome:"),
+    ("latest_partner_rework_note", "rework", "Partner Acceptance Rework Required | Reason:"),
+    ("latest_partner_work_rework_note", "work_rework", "Partner Work Rework Required | Reason:"),
+    ("latest_partner_work_review_note", "work_review", "Partner Work Review | Outcome:"),
+    ("latest_partner_acceptance_request_note", "acceptance_request", "Partner Acceptance Requested"),
+)
+
+_KEY_BY_KIND = {kind: key for key, kind, _prefix in NOTE_KINDS}
+
+_TICKET_CHUNK = 500
+
+_COMMENT_TAG_RE = re.compile(r"<[^>]+>")
+
+
+def comment_to_text(content: str | None) -> str:
+    text = content or ""
+    text = _COMMENT_TAG_RE.sub("", text)
+    return unescape(text).strip()
+
+
+def note_kind_for_text(text: str | None) -> str | None:
+    text = text or ""
+    for _key, kind, prefix in NOTE_KINDS:
+        if text.startswith(prefix):
+            return kind
+    return None
+
+
+def note_name(ticket: str, kind: str) -> str:
+    return f"TPN-{ticket}-{kind}"
+
+
+def empty_summary() -> dict:
+    return {key: "" for key, _kind, _prefix in NOTE_KINDS}
+
+
+def _is_ticket_comment(doc) -> bool:
+    return (
+        doc.get("reference_doctype") == "HD Ticket"
+        and doc.get("comment_type") == "Comment"
+        and bool(doc.get("reference_name"))
+    )
+
+
+def upsert_note(ticket: str, kind: str, text: str, comment: str | None = None, noted_on=None) -> str:
+    name = note_name(ticket, kind)
+    values = {"note_text": text, "comment": comment, "noted_on": noted_on}
+
+    if frappe.db.exists(DOCTYPE, name):
+        frappe.db.set_value(DOCTYPE, name, values)
+        return name
+
+    try:
+        frappe.get_doc(
+            {"doctype": DOCTYPE, "ticket": ticket, "note_kind": kind, **values}
+        ).insert(ignore_permissions=True)
+    except frappe.DuplicateEntryError:
+        # A concurrent note on the same ticket and kind inserted the row first; the
+        # note refresh must never abort the partner action that triggered it.
+        frappe.db.set_value(DOCTYPE, name, values)
+    return name
+
+
+def get_summaries(ticket_names) -> dict:
+    """{ticket: summary} with every NOTE_KINDS key; one query per 500 tickets."""
+    names = sorted({(n or "").strip() for n in (ticket_names or []) if (n or "").strip()})
+    summaries = {name: empty_summary() for name in names}
+
+    for i in range(0, len(names), _TICKET_CHUNK):
+        rows = frappe.get_all(
+            DOCTYPE,
+            filters={"ticket": ["in", names[i : i + _TICKET_CHUNK]]},
+            fields=["ticket", "note_kind", "note_text"],
+            limit_page_length=0,
+            ignore_permissions=True,
+        )
+        for row in rows:
+            key = _KEY_BY_KIND.get(row.note_kind)
+            if key and row.ticket in summaries:
+                summaries[row.ticket][key] = row.note_text or ""
+
+    return summaries
+
+
+# ------------------
+# Comment hooks
+# ------------------
+
+def on_comment_update(doc, method=None):
+    """doc_events hook (Comment on_update): record new notes, re-derive on edits."""
+    if not _is_ticket_comment(doc):
+        return
+
+    if doc.flags.in_insert:
+        text = comment_to_text(doc.content)
+        kind = note_kind_for_text(text)
+        if kind:
+            upsert_note(doc.reference_name, kind, text, comment=doc.name, noted_on=doc.creation)
+        return
+
+    rebuild_tickets([doc.reference_name])
+
+
+def on_comment_trash(doc, method=None):
+    """doc_events hook (Comment on_trash): drop or replace a note whose Comment is going away."""
+    if not _is_ticket_comment(doc):
+        return
+    if frappe.db.exists(DOCTYPE, {"comment": doc.name}):
+        rebuild_tickets([doc.reference_name], exclude_comment=doc.name)
+
+
+def on_ticket_trash(doc, method=None):
+    """doc_events hook (HD Ticket on_trash): the notes go with the ticket."""
+    frappe.db.delete(DOCTYPE, {"ticket": doc.name})
+
+
+# ------------------
+# Rebuild / backfill
+# ------------------
+
+def _note_comment_conditions() -> tuple[str, dict]:
+    clauses = []
+    params = {}
+    for idx, (_key, _kind, prefix) in enumerate(NOTE_KINDS):
+        clauses.append(f"c.content like %(prefix_{idx})s")
+        params[f"prefix_{idx}"] = f"%{prefix}%"
+    return "(" + " or ".join(clauses) + ")", params
+
+
+def rebuild_tickets(ticket_names, exclude_comment: str | None = None) -> int:
+    """Re-derive the notes of these tickets from their Comments. Returns rows written."""
+    names = sorted({(n or "").strip() for n in (ticket_names or []) if (n or "").strip()})
+    written = 0
+
+    for i in range(0, len(names), _TICKET_CHUNK):
+        chunk = names[i : i + _TICKET_CHUNK]
+        like_sql, params = _note_comment_conditions()
+        rows = frappe.db.sql(
+            f"""
+            select c.name, c.reference_name, c.content, c.creation
+            from `tabComment` c
+            where c.reference_doctype = 'HD Ticket'
+              and c.comment_type = 'Comment'
+              and c.reference_name in %(tickets)s
+              and c.name != %(exclude)s
+              and {like_sql}
+            order by c.creation asc
+            """,
+            {"tickets": tuple(chunk), "exclude": exclude_comment or "", **params},
+            as_dict=True,
+        )
+
+        latest = {}
+        for row in rows:
+            text = comment_to_text(row.content)
+            kind = note_kind_for_text(text)
+            if kind:
+                latest[(row.reference_name, kind)] = (text, row.name, row.creation)
+
+        keep = {note_name(ticket, kind) for ticket, kind in latest}
+        for name in frappe.get_all(
+            DOCTYPE,
+            filters={"ticket": ["in", chunk]},
+            pluck="name",
+            limit_page_length=0,
+            ignore_permissions=True,
+        ):
+            if name not in keep:
+                frappe.db.delete(DOCTYPE, {"name": name})
+
+        for (ticket, kind), (text, comment, creation) in latest.items():
+            upsert_note(ticket, kind, text, comment=comment, noted_on=creation)
+            written += 1
+
+    return written
+
+
+def backfill(commit: bool = True) -> dict:
+    """Seed the store from every HD Ticket Comment that carries a partner note."""
+    like_sql, params = _note_comment_conditions()
+    tickets = frappe.db.sql_list(
+        f"""
+        select distinct c.reference_name
+        from `tabComment` c
+        where c.reference_doctype = 'HD Ticket'
+          and c.comment_type = 'Comment'
+          and {like_sql}
+        """,
+        params,
+    )
+
+    written = 0
+    for i in range(0, len(tickets), _TICKET_CHUNK):
+        written += rebuild_tickets(tickets[i : i + _TICKET_CHUNK])
+        if commit:
+            frappe.db.commit()
+
+    return {"tickets": len(tickets), "notes": written}
+
+
+def after_migrate():
+    """Seed the store once, on the first migrate after the DocType is installed."""
+    if frappe.db.count(DOCTYPE):
+        return None
+
+    result = backfill()
+    frappe.logger("telephony").info(
+        "Partner note store seeded: %s note(s) across %s ticket(s)",
+        result["notes"],
+        result["tickets"],
+    )
+    return result
@@ -1,3 +1,14 @@
+"""
+HD Ticket permission query conditions and Partner report tenant conditions.
+
+Everything a condition needs about a user is compiled once into a permission context
+(roles, role class, enabled Partner organisations, linked Customers and the rendered
+HD Ticket condition). Contexts are memoised on frappe.local for the request and cached in
+Redis for CONTEXT_TTL_SECONDS under a version number; User, Role Profile, Contact (with
+its Contact Email / Dynamic Link rows) and TELECTRO Partner (with its members) writes bump
+the version after commit, which retires every cached context at once.
+"""
+
 import frappe
 
 from telephony.partner_identity import get_enabled_partner_names_for_user
@@ -33,10 +44,123 @@ INTERNAL_PARTNER_REPORT_ROLES = {
 }
 
 
+CONTEXT_KEY_PREFIX = "telephony:permission_context"
+
+CONTEXT_VERSION_KEY = f"{CONTEXT_KEY_PREFIX}:version"
+
+CONTEXT_TTL_SECONDS = 300
+
+_LOCAL_ATTR = "telectro_permission_contexts"
+
+
+def _context_version() -> int:
+    try:
+        cache = frappe.cache()
+        return int(cache.get(cache.make_key(CONTEXT_VERSION_KEY)) or 0)
+    except Exception:
+        return 0
+
+
+def _role_class(user: str, roles: set[str]) -> str:
+    if user == "Administrator" or roles & INTERNAL_BYPASS_ROLES:
+        return "internal"
+    if user == "Guest":
+        return "other"
+    if roles & PARTNER_ROLES:
+        return "partner"
+    if roles & CUSTOMER_PORTAL_ROLES:
+        return "customer"
+    return "other"
+
+
+def _build_permission_context(user: str) -> dict:
+    roles = set(frappe.get_roles(user)) if user else set()
+    role_class = _role_class(user, roles) if user else "other"
+
+    partner_orgs = []
+    if user and user != "Guest" and roles & PARTNER_ROLES:
+        partner_orgs = get_enabled_partner_names_for_user(user)
+
+    customer_orgs = []
+    hd_ticket_condition = ""
+
+    if role_class == "partner":
+        # Conservative v1 rule:
+        # Partner users only see tickets they own through generic HD Ticket access.
+        hd_ticket_condition = f"`tabHD Ticket`.`owner` = {frappe.db.escape(user)}"
+    elif role_class == "customer":
+        # Customer users are contained by Customer organisation, not only by
+        # individual ticket ownership. This allows multiple named Customer-side
+        # users linked to the same Customer to see that Customer's tickets.
+        customer_orgs = get_customer_names_for_user(user)
+        hd_ticket_condition = _customer_ticket_query_conditions(user, customer_orgs)
+
+    return {
+        "user": user,
+        "roles": sorted(roles),
+        "role_class": role_class,
+        "partner_orgs": partner_orgs,
+        "customer_orgs": customer_orgs,
+        "hd_ticket_condition": hd_ticket_condition,
+    }
+
+
+def get_permission_context(user: str | None = None) -> dict:
+    """Compiled permission context for a user (see module docstring)."""
+    user = user if user is not None else frappe.session.user
+
+    contexts = getattr(frappe.local, _LOCAL_ATTR, None)
+    if contexts is None:
+        contexts = {}
+        setattr(frappe.local, _LOCAL_ATTR, contexts)
+    if user in contexts:
+        return contexts[user]
+
+    key = f"{CONTEXT_KEY_PREFIX}:v{_context_version()}:{user}"
+    try:
+        context = frappe.cache().get_value(key)
+    except Exception:
+        context = None
+
+    if context is None:
+        context = _build_permission_context(user)
+        try:
+            frappe.cache().set_value(key, context, expires_in_sec=CONTEXT_TTL_SECONDS)
+        except Exception:
+            pass
+
+    contexts[user] = context
+    return context
+
+
+def _bump_context_version():
+    try:
+        cache = frappe.cache()
+        cache.incr(cache.make_key(CONTEXT_VERSION_KEY))
+    except Exception:
+        pass
+
+
+def invalidate_permission_contexts(doc=None, method=None):
+    """
+    doc_events hook (User, Role Profile, Contact, TELECTRO Partner): retire every cached
+    context. The request memo goes now; the version is bumped once the write commits, so
+    no other request can cache the pre-write context under the new version. A rollback
+    bumps it too, retiring anything this request cached from its uncommitted rows.
+    """
+    try:
+        delattr(frappe.local, _LOCAL_ATTR)
+    except AttributeError:
+        pass
+
+    frappe.db.after_commit.add(_bump_context_version)
+    frappe.db.after_rollback.add(_bump_context_version)
+
+
 def _get_roles(user: str) -> set[str]:
     if not user:
         return set()
-    return set(frappe.get_roles(user))
+    return set(get_permission_context(user)["roles"])
 
 
 def _is_internal_bypass_user(user: str) -> bool:
@@ -118,7 +242,7 @@ def get_partner_ticket_report_condition(
             f"t.owner = {frappe.db.escape(user)}"
         )
 
-    partner_names = get_enabled_partner_names_for_user(user)
+    partner_names = get_permission_context(user)["partner_orgs"]
 
     if not partner_names:
         return "1 = 0"
@@ -209,9 +333,8 @@ def get_customer_names_for_user(user: str | None = None) -> list[str]:
     return sorted({row.link_name for row in links if row.link_name})
 
 
-def _customer_ticket_query_conditions(user: str) -> str:
+def _customer_ticket_query_conditions(user: str, customer_names: list[str]) -> str:
     escaped_user = frappe.db.escape(user)
-    customer_names = get_customer_names_for_user(user)
 
     # Safe fallback:
     # If the Customer user is not linked to a Customer organisation yet, they
@@ -236,19 +359,4 @@ def _customer_ticket_query_conditions(user: str) -> str:
 
 def hd_ticket_query_conditions(user: str | None = None) -> str:
     user = user or frappe.session.user
-
-    if _is_internal_bypass_user(user):
-        return ""
-
-    if _is_partner_user(user):
-        # Conservative v1 rule:
-        # Partner users only see tickets they own through generic HD Ticket access.
-        return f"`tabHD Ticket`.`owner` = {frappe.db.escape(user)}"
-
-    if _is_customer_portal_user(user):
-        # Customer users are contained by Customer organisation, not only by
-        # individual ticket ownership. This allows multiple named Customer-side
-        # users linked to the same Customer to see that Customer's tickets.
-        return _customer_ticket_query_conditions(user)
-
-    return ""
+    return get_permission_context(user)["hd_ticket_condition"]
@@ -0,0 +1,196 @@
+import statistics
+import time
+
+import frappe
+
+from telephony.setup.db_indexes import DECLARED_INDEXES
+from telephony.ticket_report_data import TERMINAL_STATUSES
+
+ACTIVE_STATUSES = ("Open", "Replied", "Paused")
+
+# (label, doctype, report query). {hint} sits right after the table reference so the
+# "before" run can IGNORE INDEX the declared composite indexes of that doctype.
+QUERIES = (
+    (
+        "active ticket scan (ticket_report_data)",
+        "HD Ticket",
+        """
+        select t.name, t.status, t._assign, t.modified
+        from `tabHD Ticket` t {hint}
+        where t.status not in %(terminal_statuses)s
+        order by t.modified desc
+        """,
+    ),
+    (
+        "partner fulfilment queue",
+        "HD Ticket",
+        """
+        select t.name
+        from `tabHD Ticket` t {hint}
+        where t.status in %(active_statuses)s
+          and t.custom_fulfilment_party = 'Partner'
+        """,
+    ),
+    (
+        "partner request queue",
+        "HD Ticket",
+        """
+        select t.name
+        from `tabHD Ticket` t {hint}
+        where t.status in %(active_statuses)s
+          and t.custom_request_source = 'Partner'
+        """,
+    ),
+    (
+        "open ToDos for a ticket page (ticket_assignees)",
+        "ToDo",
+        """
+        select td.reference_name, td.allocated_to
+        from `tabToDo` td {hint}
+        where td.reference_type = 'HD Ticket'
+          and td.reference_name in %(tickets)s
+          and td.status = 'Open'
+        order by td.creation asc
+        """,
+    ),
+    (
+        "open ToDos for a user (team load / claim)",
+        "ToDo",
+        """
+        select td.reference_name
+        from `tabToDo` td {hint}
+        where td.allocated_to = %(user)s
+          and td.status = 'Open'
+        """,
+    ),
+    (
+        "recent ticket Comments (partner notes backfill)",
+        "Comment",
+        """
+        select c.reference_name, c.content
+        from `tabComment` c {hint}
+        where c.reference_doctype = 'HD Ticket'
+          and c.reference_name in %(tickets)s
+          and c.comment_type = 'Comment'
+        order by c.creation desc
+        """,
+    ),
+    (
+        "tickets shared with a user (my_current_work)",
+        "DocShare",
+        """
+        select ds.share_name
+        from `tabDocShare` ds {hint}
+        where ds.share_doctype = 'HD Ticket'
+          and ds.share_name in %(tickets)s
+          and ds.user = %(user)s
+        """,
+    ),
+)
+
+
+def _params(sample_tickets: int) -> dict:
+    tickets = frappe.get_all(
+        "HD Ticket",
+        fields=["name"],
+        order_by="modified desc",
+        limit_page_length=sample_tickets,
+        pluck="name",
+    ) or ["-"]
+
+    busiest = frappe.db.sql(
+        """
+        select allocated_to
+        from `tabToDo`
+        where status = 'Open' and ifnull(allocated_to, '') != ''
+        group by allocated_to
+        order by count(*) desc
+        limit 1
+        """
+    )
+
+    return {
+        "terminal_statuses": TERMINAL_STATUSES,
+        "active_statuses": ACTIVE_STATUSES,
+        "tickets": tuple(tickets),
+        "user": busiest[0][0] if busiest else "Administrator",
+    }
+
+
+def _ignore_hint(doctype: str) -> str:
+    table = f"tab{doctype}"
+    names = [
+        index_name
+        for dt, index_name, _columns in DECLARED_INDEXES
+        if dt == doctype and frappe.db.has_index(table, index_name)
+    ]
+    if not names:
+        return ""
+    return "ignore index (" + ", ".join(f"`{n}`" for n in names) + ")"
+
+
+def _measure(sql: str, params: dict, repeat: int) -> dict:
+    plan = frappe.db.sql("explain " + sql, params, as_dict=True)
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        frappe.db.sql(sql, params)
+        timings.append(time.perf_counter() - started)
+
+    return {
+        "median_ms": round(1000 * statistics.median(timings), 2),
+        "plan": [
+            {
+                "table": row.get("table"),
+                "type": row.get("type"),
+                "key": row.get("key"),
+                "rows": row.get("rows"),
+                "extra": row.get("Extra"),
+            }
+            for row in plan
+        ],
+    }
+
+
+def run(repeat=5, sample_tickets=200):
+    """
+    EXPLAIN plan and median timing for each hot report query, without ("before") and with
+    ("after") the composite indexes declared in telephony.setup.db_indexes. "Before" uses
+    IGNORE INDEX, so nothing is dropped. Create missing indexes first with bench migrate or
+    telephony.setup.db_indexes.ensure_indexes.
+
+    Run via:
+      bench --site frontend execute telephony.scripts.bench_report_indexes.run --kwargs '{"repeat":5}'
+    """
+    if frappe.db.db_type != "mariadb":
+        print("IGNORE INDEX comparison needs MariaDB; db_type =", frappe.db.db_type)
+        return {}
+
+    repeat = max(int(repeat or 1), 1)
+    params = _params(max(int(sample_tickets or 1), 1))
+
+    print("site:", frappe.local.site)
+    print("repeat:", repeat, "sample tickets:", len(params["tickets"]), "user:", params["user"])
+
+    results = {}
+    for label, doctype, sql in QUERIES:
+        hint = _ignore_hint(doctype)
+        before = _measure(sql.format(hint=hint), params, repeat)
+        after = _measure(sql.format(hint=""), params, repeat)
+        results[label] = {"before": before, "after": after}
+
+        print(f"\n[{label}] before={before['median_ms']}ms after={after['median_ms']}ms")
+        if not hint:
+            print("  (no declared index present for", doctype, "- before/after are identical)")
+        for mode, r in (("before", before), ("after", after)):
+            for row in r["plan"]:
+                print(
+                    f"  {mode:6} table={row['table']} type={row['type']} key={row['key']}"
+                    f" rows={row['rows']} extra={row['extra']}"
+                )
+
+    return {
+        label: {mode: r["median_ms"] for mode, r in modes.items()}
+        for label, modes in results.items()
+    }
@@ -0,0 +1,82 @@
+import time
+from collections import Counter
+
+import frappe
+
+from telephony import ticket_context
+
+
+def _ticket_payload(i: int, email_account: str) -> dict:
+    return {
+        "doctype": "HD Ticket",
+        "subject": f"Query benchmark {i}",
+        "description": "SITE: Query benchmark\nASSET: BENCH-1",
+        "raised_by": "bench.sender@local.test",
+        "email_account": email_account,
+        "custom_request_source": "Email",
+    }
+
+
+def _measure(count: int, email_account: str) -> dict:
+    statements = Counter()
+    orig_sql = frappe.db.sql
+
+    def counting_sql(query, *args, **kwargs):
+        statements[" ".join(str(query).split())[:90]] += 1
+        return orig_sql(query, *args, **kwargs)
+
+    per_ticket = []
+    elapsed = []
+    frappe.db.sql = counting_sql
+    try:
+        for i in range(count):
+            before = sum(statements.values())
+            started = time.perf_counter()
+            frappe.get_doc(_ticket_payload(i, email_account)).insert(ignore_permissions=True)
+            elapsed.append(time.perf_counter() - started)
+            per_ticket.append(sum(statements.values()) - before)
+    finally:
+        frappe.db.sql = orig_sql
+
+    return {
+        "queries_per_ticket": per_ticket,
+        "avg_queries": round(sum(per_ticket) / max(len(per_ticket), 1), 1),
+        "avg_ms": round(1000 * sum(elapsed) / max(len(elapsed), 1), 1),
+        "top_statements": statements.most_common(10),
+    }
+
+
+def run(count=5, email_account="Faults", rollback=1):
+    """
+    Count SQL queries per inserted HD Ticket, with the shared ticket context off ("before")
+    and on ("after"). Inserts are rolled back unless rollback=0.
+
+    Run via:
+      bench --site frontend execute telephony.scripts.bench_ticket_insert_queries.run --kwargs '{"count":5}'
+    """
+    count = max(int(count or 1), 1)
+    frappe.flags.mute_emails = True
+
+    results = {}
+    try:
+        for label, disabled in (("before", True), ("after", False)):
+            ticket_context.DISABLED = disabled
+            results[label] = _measure(count, email_account)
+    finally:
+        ticket_context.DISABLED = False
+        if int(rollback):
+            frappe.db.rollback()
+        else:
+            frappe.db.commit()
+
+    print("site:", frappe.local.site)
+    print("tickets per mode:", count, "email_account:", email_account, "rollback:", int(rollback))
+    for label, r in results.items():
+        print(f"\n[{label}] avg_queries={r['avg_queries']} avg_ms={r['avg_ms']} per_ticket={r['queries_per_ticket']}")
+        for stmt, n in r["top_statements"]:
+            print(f"  {n:4d}  {stmt}")
+
+    before = results["before"]["avg_queries"]
+    after = results["after"]["avg_queries"]
+    print(f"\nqueries saved per ticket: {round(before - after, 1)}")
+    return {k: {kk: v for kk, v in r.items() if kk != "top_statements"} for k, r in results.items()}
@@ -3,10 +3,11 @@ import frappe
 def run(emails=None):
     """
     Harness: test _customer_from_sender(email) and show contact+dynamic-link chain.
+    Uses the uncached resolver so results always reflect the database.
     Run via:
       bench --site frontend execute telephony.scripts.harness_customer_from_sender.run --kwargs '{"emails":["a@b.com"]}'
     """
-    from telephony.telectro_intake import _customer_from_sender
+    from telephony.telectro_intake import _customer_from_sender_uncached as _customer_from_sender
 
     if emails is None:
         emails = [
@@ -7,6 +7,8 @@ import frappe
 import hashlib
 import json
 
+from telephony import telectro_site_label_index
+
 def _parse_gx_coords(texts: list[str]):
     # gx:coord is "lon lat alt" (space-separated)
     pts = []
@@ -451,6 +453,8 @@ def run(
 
     if commit:
         frappe.db.commit()
+        # db.set_value skips Location hooks; rebuild the SITE: label index explicitly
+        telectro_site_label_index.invalidate()
 
     print("KMZ import complete")
     print("site_group:", site_group)
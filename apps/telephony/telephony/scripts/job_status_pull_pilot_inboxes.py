@@ -4,6 +4,7 @@ BASE = "telephony:pull_pilot_inboxes"
 
 KEYS = [
   "fingerprint",
+  "mode",
   "stage",
   "lock_acquired",
   "last_run",
@@ -17,6 +18,32 @@ KEYS = [
   "last_comm",
   "last_ticket",
   "per_account",
+  "dispatched",
+  "backlog",
+]
+
+ACCOUNTS = ["Faults", "Routing", "PABX", "Helpdesk"]
+
+# Parallel mode: each account job writes its own breadcrumbs under {BASE}:acct:<name>:*
+ACCOUNT_KEYS = [
+  "stage",
+  "lock_acquired",
+  "last_run",
+  "last_start",
+  "last_skip",
+  "last_ok",
+  "last_err",
+  "processed_last_run",
+  "backlog",
+  "sec_per_mail",
+  "entry",
+]
+
+# IMAP IDLE worker (telephony.jobs.imap_idle_worker) breadcrumbs under {BASE}:idle:*
+IDLE_KEYS = [
+  "started",
+  "last_trigger",
+  "watchers",
 ]
 
 OK_STALE_AFTER_S = 180
@@ -70,7 +97,7 @@ def run():
             out[k] = f"<err: {repr(e)[:120]}>"
 
     print("\nPilot inbox config")
-    for acct_name in ["Faults", "Routing", "PABX", "Helpdesk"]:
+    for acct_name in ACCOUNTS:
         try:
             acc = frappe.get_doc("Email Account", acct_name)
             print({
@@ -130,4 +157,43 @@ def run():
     for k in KEYS:
         print(f"{k}: {out.get(k)}")
 
+    idle = {}
+    for k in IDLE_KEYS:
+        try:
+            idle[k] = cache.get_value(f"{BASE}:idle:{k}")
+        except Exception as e:
+            idle[k] = f"<err: {repr(e)[:120]}>"
+
+    if idle.get("started"):
+        print(f"\nIMAP IDLE worker keyspace: {BASE}:idle:*")
+        for k in IDLE_KEYS:
+            print(f"  {k}: {idle.get(k)}")
+
+    if out.get("mode") == "parallel" or idle.get("started"):
+        print("\nPer-account job breadcrumbs")
+        for acct_name in ACCOUNTS:
+            print(f"\n[{acct_name}] {BASE}:acct:{acct_name}:*")
+            for k in ACCOUNT_KEYS:
+                try:
+                    val = cache.get_value(f"{BASE}:acct:{acct_name}:{k}")
+                except Exception as e:
+                    val = f"<err: {repr(e)[:120]}>"
+                print(f"  {k}: {val}")
+
+    try:
+        from telephony import inbox_metrics
+
+        snap = inbox_metrics.snapshot(ACCOUNTS)
+        print(f"\nPoller metrics keyspace: {inbox_metrics.BASE}:*")
+        print(f"  mails_last_hour: {snap['mails_last_hour']}")
+        for acct_name, acct in snap["accounts"].items():
+            stages = acct["stages"]
+            print(
+                f"  [{acct_name}] mails_last_hour={acct['mails_last_hour']}"
+                f" fetch_p95={stages['fetch']['p95']} process_p95={stages['process']['p95']}"
+                f" commit_p95={stages['commit']['p95']}"
+            )
+    except Exception as e:
+        print(f"\nPoller metrics: <err: {repr(e)[:120]}>")
+
     print("\nDone.\n")
\ No newline at end of file
@@ -3,6 +3,8 @@ from typing import Any
 
 import frappe
 
+from telephony import telectro_site_label_index
+
 
 DUP_SUFFIX_RE = re.compile(r"^(?P<base>.+) \((?P<num>\d+)\)$")
 
@@ -268,6 +270,8 @@ def run(
 
     if commit_bool:
         frappe.db.commit()
+        # db.set_value skips Location hooks; rebuild the SITE: label index explicitly
+        telectro_site_label_index.invalidate()
         print()
         print("committed")
 
@@ -73,4 +73,18 @@ def run(site=None):
         print("  supported: no")
         print("  error:", bc.get("error"))
 
+    # 4) Poller metrics (best-effort)
+    try:
+        from telephony import inbox_metrics
+
+        snap = inbox_metrics.snapshot()
+        print("\nPoller metrics (last hour):")
+        print("  mails processed:", snap["mails_last_hour"])
+        for acct_name, acct in snap["accounts"].items():
+            fetch = acct["stages"]["fetch"]
+            process = acct["stages"]["process"]
+            print(f"  {acct_name}: mails={acct['mails_last_hour']} fetch p95={fetch['p95']}s process p95={process['p95']}s")
+    except Exception as e:
+        print("\nPoller metrics unavailable:", repr(e)[:200])
+
     print("\nDone. If intake still feels silent, next step is a controlled test email and checking Communication creation.")
\ No newline at end of file
@@ -5,6 +5,7 @@ import xml.etree.ElementTree as ET
 from pathlib import Path
 
 import frappe
+from telephony import telectro_site_label_index
 import telephony.scripts.import_kmz_locations as imp
 
 importlib.reload(imp)
@@ -283,6 +284,8 @@ def repair_location_names(
 
     if not dry_run:
         frappe.db.commit()
+        # db.set_value skips Location hooks; rebuild the SITE: label index explicitly
+        telectro_site_label_index.invalidate()
 
     print("repair done. updated:", updated, "missing:", missing)
 
@@ -1,8 +1,47 @@
+"""
+TELECTRO Service Coverage lookup.
+
+Every enabled coverage row is loaded by one query into a per-process index, bucketed by
+(scope, customer, campus, service_area) and pre-sorted by priority, coverage role, user
+and row name, so matching a ticket context is at most four dict hits. Keys are
+casefolded and stripped, like the database collation the per-rank filters relied on.
+
+The index is tagged with a Redis generation token bumped after TELECTRO Service Coverage
+writes commit; every worker rebuilds on its next lookup after a change. MAX_AGE_SECONDS bounds
+staleness for writes that bypass hooks.
+"""
+
+import json
+import time
+
 import frappe
 
 
 COVERAGE_DOCTYPE = "TELECTRO Service Coverage"
 
+GEN_KEY = "telephony:service_coverage:gen"
+
+MAX_AGE_SECONDS = 15 * 60
+
+# (match rank, coverage scope, uses customer, uses campus), in matching order
+MATCH_SPECS = (
+    (1, "Customer/Campus", True, True),
+    (2, "Campus", False, True),
+    (3, "Customer", True, False),
+    (4, "Default", False, False),
+)
+
+TICKET_FIELDS = [
+    "name",
+    "customer",
+    "custom_customer",
+    "custom_site_group",
+    "custom_service_area",
+    "_assign",
+]
+
+_INDEX: dict = {}
+
 ROLE_ORDER = {
     "Primary": 0,
     "Eligible": 1,
@@ -30,6 +69,10 @@ def _row_sort_key(row: dict):
     )
 
 
+def _key(value) -> str:
+    return _clean(value).casefold()
+
+
 def _coverage_fields() -> list[str]:
     return [
         "name",
@@ -45,6 +88,131 @@ def _coverage_fields() -> list[str]:
     ]
 
 
+class _CoverageIndex:
+    def __init__(self, rows, gen):
+        self.gen = gen
+        self.built_at = time.monotonic()
+        self.rows = len(rows)
+
+        scopes = {scope: (uses_customer, uses_campus) for _, scope, uses_customer, uses_campus in MATCH_SPECS}
+        buckets = {}
+        by_user = {}
+        for row in rows:
+            by_user.setdefault(_key(row.get("user")), []).append(row)
+
+            scope = _clean(row.get("coverage_scope"))
+            if scope not in scopes:
+                continue
+            # a scope only matches on its own fields, like the per-rank filters did
+            uses_customer, uses_campus = scopes[scope]
+            key = (
+                scope,
+                _key(row.get("customer")) if uses_customer else "",
+                _key(row.get("campus")) if uses_campus else "",
+                _key(row.get("service_area")),
+            )
+            buckets.setdefault(key, []).append(row)
+
+        self.buckets = {
+            key: tuple(sorted(bucket, key=lambda row: _row_sort_key(row)[1:]))
+            for key, bucket in buckets.items()
+        }
+        self.by_user = {
+            user: tuple(
+                sorted(
+                    user_rows,
+                    key=lambda row: (
+                        int(row.get("priority") or 100),
+                        _key(row.get("service_area")),
+                        _key(row.get("coverage_scope")),
+                    ),
+                )
+            )
+            for user, user_rows in by_user.items()
+        }
+
+    def match(self, customer, campus, service_area):
+        """(match rank, rows) for the first rank with rows, else (None, ())."""
+        customer, campus, service_area = _key(customer), _key(campus), _key(service_area)
+
+        for match_rank, scope, uses_customer, uses_campus in MATCH_SPECS:
+            if (uses_customer and not customer) or (uses_campus and not campus):
+                continue
+
+            rows = self.buckets.get(
+                (
+                    scope,
+                    customer if uses_customer else "",
+                    campus if uses_campus else "",
+                    service_area,
+                )
+            )
+            if rows:
+                return match_rank, rows
+
+        return None, ()
+
+
+def _current_gen():
+    try:
+        return str(frappe.cache().get_value(GEN_KEY) or "0")
+    except Exception:
+        return None
+
+
+def get_coverage_index() -> _CoverageIndex:
+    site = getattr(frappe.local, "site", None)
+    gen = _current_gen()
+    index = _INDEX.get(site)
+    if (
+        index is not None
+        and (gen is None or index.gen == gen)
+        and time.monotonic() - index.built_at < MAX_AGE_SECONDS
+    ):
+        return index
+
+    rows = frappe.get_all(
+        COVERAGE_DOCTYPE,
+        filters={"enabled": 1},
+        fields=_coverage_fields(),
+        limit_page_length=0,
+        ignore_permissions=True,
+    )
+    index = _CoverageIndex(rows, gen)
+    _INDEX[site] = index
+    return index
+
+
+def _bump_gen():
+    try:
+        frappe.cache().set_value(GEN_KEY, frappe.generate_hash(length=12))
+    except Exception:
+        pass
+
+
+def invalidate(doc=None, method=None):
+    """doc_events hook (TELECTRO Service Coverage): force a rebuild in every worker.
+
+    This worker's index goes now; the generation is bumped once the write commits (or
+    rolls back), so no worker rebuilds from the pre-commit rows under the new token.
+    """
+    _INDEX.pop(getattr(frappe.local, "site", None), None)
+    frappe.db.after_commit.add(_bump_gen)
+    frappe.db.after_rollback.add(_bump_gen)
+
+
+def stats() -> dict:
+    """bench execute telephony.service_coverage.stats"""
+    index = get_coverage_index()
+    return {
+        "gen": index.gen,
+        "rows": index.rows,
+        "buckets": len(index.buckets),
+        "users": len(index.by_user),
+        "age_seconds": int(time.monotonic() - index.built_at),
+    }
+
+
 def get_matching_coverage_rows(
     *,
     customer: str | None = None,
@@ -70,74 +238,14 @@ def get_matching_coverage_rows(
     if not service_area:
         return []
 
-    customer = _clean(customer)
-    campus = _clean(campus)
-
-    all_rows: list[dict] = []
-
-    match_specs = [
-        (
-            1,
-            {
-                "enabled": 1,
-                "coverage_scope": "Customer/Campus",
-                "customer": customer,
-                "campus": campus,
-                "service_area": service_area,
-            },
-            bool(customer and campus),
-        ),
-        (
-            2,
-            {
-                "enabled": 1,
-                "coverage_scope": "Campus",
-                "campus": campus,
-                "service_area": service_area,
-            },
-            bool(campus),
-        ),
-        (
-            3,
-            {
-                "enabled": 1,
-                "coverage_scope": "Customer",
-                "customer": customer,
-                "service_area": service_area,
-            },
-            bool(customer),
-        ),
-        (
-            4,
-            {
-                "enabled": 1,
-                "coverage_scope": "Default",
-                "service_area": service_area,
-            },
-            True,
-        ),
-    ]
-
-    for match_rank, filters, should_run in match_specs:
-        if not should_run:
-            continue
-
-        rows = frappe.get_all(
-            COVERAGE_DOCTYPE,
-            filters=filters,
-            fields=_coverage_fields(),
-            order_by="priority asc, user asc",
-        )
-
-        for row in rows:
-            row["_match_rank"] = match_rank
+    match_rank, rows = get_coverage_index().match(customer, campus, service_area)
 
-        if rows:
-            all_rows.extend(rows)
-            break
-
-    all_rows.sort(key=_row_sort_key)
-    return all_rows
+    matched = []
+    for row in rows:
+        row = row.copy()
+        row["_match_rank"] = match_rank
+        matched.append(row)
+    return matched
 
 
 def get_user_coverage_rows(user: str) -> list[dict]:
@@ -148,38 +256,21 @@ def get_user_coverage_rows(user: str) -> list[dict]:
     if not user:
         return []
 
-    rows = frappe.get_all(
-        COVERAGE_DOCTYPE,
-        filters={
-            "enabled": 1,
-            "user": user,
-        },
-        fields=_coverage_fields(),
-        order_by="priority asc, service_area asc, coverage_scope asc",
-    )
+    return [row.copy() for row in get_coverage_index().by_user.get(_key(user), ())]
 
-    return rows
+
+def _load_ticket(ticket_or_name):
+    """HD Ticket row (TICKET_FIELDS, including _assign) for a name; documents/dicts as given."""
+    if isinstance(ticket_or_name, str):
+        return frappe.db.get_value("HD Ticket", ticket_or_name, TICKET_FIELDS, as_dict=True)
+    return ticket_or_name
 
 
 def get_ticket_context(ticket_or_name) -> dict:
     """
     Extract the coverage-relevant context from an HD Ticket document or name.
     """
-    if isinstance(ticket_or_name, str):
-        ticket = frappe.db.get_value(
-            "HD Ticket",
-            ticket_or_name,
-            [
-                "name",
-                "customer",
-                "custom_customer",
-                "custom_site_group",
-                "custom_service_area",
-            ],
-            as_dict=True,
-        )
-    else:
-        ticket = ticket_or_name
+    ticket = _load_ticket(ticket_or_name)
 
     if not ticket:
         return {
@@ -224,8 +315,6 @@ def _parse_assign_users(assign_val) -> list[str]:
         return []
 
     try:
-        import json
-
         parsed = json.loads(assign_val)
         if isinstance(parsed, list):
             return [str(x).strip() for x in parsed if str(x).strip()]
@@ -236,6 +325,11 @@ def _parse_assign_users(assign_val) -> list[str]:
 
 
 def _current_assignee_for_ticket(ticket_or_name) -> str:
+    # rows loaded with TICKET_FIELDS already carry _assign; documents re-read it
+    if isinstance(ticket_or_name, dict) and "_assign" in ticket_or_name:
+        users = _parse_assign_users(ticket_or_name.get("_assign"))
+        return users[0] if users else ""
+
     ticket_name = ticket_or_name if isinstance(ticket_or_name, str) else ticket_or_name.get("name")
     ticket_name = _clean(ticket_name)
 
@@ -247,6 +341,7 @@ def _current_assignee_for_ticket(ticket_or_name) -> str:
 
     return users[0] if users else ""
 
+
 def resolve_ticket_coverage_owner(ticket_or_name) -> dict:
     """
     Read-only owner discovery helper for ticket coverage.
@@ -264,9 +359,17 @@ def resolve_ticket_coverage_owner(ticket_or_name) -> dict:
     - if the current assignee is already present in the matching coverage rows,
       keep that user as the effective owner candidate
     """
-    context = get_ticket_context(ticket_or_name)
-    rows = get_matching_coverage_rows_for_ticket(ticket_or_name)
-    current_assignee = _current_assignee_for_ticket(ticket_or_name)
+    ticket = _load_ticket(ticket_or_name) or {"_assign": ""}
+    return _resolve_owner(ticket, _current_assignee_for_ticket(ticket))
+
+
+def _resolve_owner(ticket, current_assignee: str) -> dict:
+    context = get_ticket_context(ticket)
+    rows = get_matching_coverage_rows(
+        customer=context["customer"],
+        campus=context["campus"],
+        service_area=context["service_area"],
+    )
 
     if not rows:
         return {
@@ -327,6 +430,47 @@ def resolve_ticket_coverage_owner(ticket_or_name) -> dict:
         ),
     }
 
+
+def resolve_coverage_owners(tickets) -> dict:
+    """
+    Bulk resolve_ticket_coverage_owner for reports and rebalancers: {ticket: result}, in
+    input order. Accepts names or rows; names and rows without _assign are loaded with one
+    query per 500 tickets (ignoring permissions, like resolve_ticket_coverage_owner), and
+    every ticket is matched against the same coverage index. Names that do not exist get
+    the same "no coverage" result as in the single-ticket path.
+    """
+    loaded = {}
+    to_load = []
+    for ticket in tickets or []:
+        if isinstance(ticket, dict) and "_assign" in ticket:
+            name = _clean(ticket.get("name"))
+            loaded[name] = ticket
+        else:
+            name = _clean(ticket if isinstance(ticket, str) else ticket.get("name"))
+            loaded[name] = None
+            to_load.append(name)
+
+    to_load = [name for name in dict.fromkeys(to_load) if name]
+    for i in range(0, len(to_load), 500):
+        for row in frappe.get_all(
+            "HD Ticket",
+            filters={"name": ["in", to_load[i : i + 500]]},
+            fields=TICKET_FIELDS,
+            limit_page_length=0,
+            # like db.get_value in the single-ticket path
+            ignore_permissions=True,
+        ):
+            loaded[row.name] = row
+
+    results = {}
+    for name, ticket in loaded.items():
+        if not name:
+            continue
+        ticket = ticket or {"_assign": ""}
+        results[name] = _resolve_owner(ticket, _current_assignee_for_ticket(ticket))
+    return results
+
+
 def user_has_ticket_coverage(user: str, ticket_or_name) -> bool:
     """
     Return True when user appears in the matched coverage rows for a ticket.
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from typing import Any
+
+import frappe
+
+
+# (doctype, index name, columns) for the access paths the pilot hits on every
+# report load, assignment sync and partner note read. Framework tables are
+# included on purpose: their standard indexes do not cover these column sets.
+DECLARED_INDEXES: tuple[tuple[str, str, tuple[str, ...]], ...] = (
+    (
+        "ToDo",
+        "telectro_todo_reference_status",
+        ("reference_type", "reference_name", "status"),
+    ),
+    (
+        "ToDo",
+        "telectro_todo_allocated_status",
+        ("allocated_to", "status"),
+    ),
+    (
+        "Comment",
+        "telectro_comment_reference_type_creation",
+        ("reference_doctype", "reference_name", "comment_type", "creation"),
+    ),
+    (
+        "DocShare",
+        "telectro_docshare_doc_user",
+        ("share_doctype", "share_name", "user"),
+    ),
+    (
+        "HD Ticket",
+        "telectro_ticket_status_fulfilment",
+        ("status", "custom_fulfilment_party"),
+    ),
+    (
+        "HD Ticket",
+        "telectro_ticket_status_request_source",
+        ("status", "custom_request_source"),
+    ),
+    (
+        "HD Ticket",
+        "telectro_ticket_status_modified",
+        ("status", "modified"),
+    ),
+)
+
+
+def _table_name(doctype: str) -> str:
+    return f"tab{doctype}"
+
+
+def _missing_columns(doctype: str, columns: tuple[str, ...]) -> list[str]:
+    return [
+        column
+        for column in columns
+        if not frappe.db.has_column(doctype, column)
+    ]
+
+
+def verify_indexes() -> dict[str, Any]:
+    """Report which declared indexes exist, are missing, or cannot be built yet."""
+
+    present: list[dict[str, Any]] = []
+    missing: list[dict[str, Any]] = []
+    blocked: list[dict[str, Any]] = []
+
+    for doctype, index_name, columns in DECLARED_INDEXES:
+        entry = {
+            "doctype": doctype,
+            "index": index_name,
+            "columns": list(columns),
+        }
+
+        if not frappe.db.table_exists(doctype):
+            blocked.append({**entry, "reason": "missing_table"})
+            continue
+
+        absent_columns = _missing_columns(doctype, columns)
+        if absent_columns:
+            blocked.append(
+                {
+                    **entry,
+                    "reason": "missing_columns",
+                    "missing_columns": absent_columns,
+                }
+            )
+            continue
+
+        if frappe.db.has_index(_table_name(doctype), index_name):
+            present.append(entry)
+        else:
+            missing.append(entry)
+
+    return {
+        "ok": not missing and not blocked,
+        "site": frappe.local.site,
+        "declared_count": len(DECLARED_INDEXES),
+        "present": present,
+        "missing": missing,
+        "blocked": blocked,
+    }
+
+
+def ensure_indexes() -> dict[str, Any]:
+    """Create every missing declared index whose table and columns exist."""
+
+    before = verify_indexes()
+    created: list[dict[str, Any]] = []
+
+    for entry in before["missing"]:
+        frappe.db.add_index(
+            entry["doctype"],
+            entry["columns"],
+            index_name=entry["index"],
+        )
+        created.append(entry)
+
+    verification = verify_indexes()
+
+    return {
+        "ok": verification["ok"],
+        "created_count": len(created),
+        "created": created,
+        "verification": verification,
+    }
+
+
+def after_migrate() -> dict[str, Any]:
+    """Ensure the declared composite indexes after schema sync."""
+
+    result = ensure_indexes()
+    verification = result["verification"]
+
+    frappe.logger("telephony").info(
+        "DB indexes verified: %s created, %s present, %s blocked",
+        result["created_count"],
+        len(verification["present"]),
+        len(verification["blocked"]),
+    )
+
+    return result
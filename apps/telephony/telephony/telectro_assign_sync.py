@@ -1,6 +1,8 @@
 import frappe
 import json
+from telephony import ticket_state_sync
 from telephony.partner_identity import resolve_partner_dispatch_user
+from telephony.ticket_context import get_ticket_context
 
 DOCT = "HD Ticket"
 
@@ -76,25 +78,23 @@ def _validate_site_group_and_leaf(doc) -> None:
     if site_leaf and not site_group:
         frappe.throw("Please select a Site Group first, then a Site Location.")
 
+    ctx = get_ticket_context(doc)
+
     # Validate group is a group
-    group_is_group = frappe.db.get_value("Location", site_group, "is_group")
-    if group_is_group is None:
+    group = ctx.location(site_group)
+    if group is None:
         frappe.throw(f"Site Group '{site_group}' does not exist. Please re-select.")
-    if not group_is_group:
+    if not group.is_group:
         frappe.throw(f"Site Group '{site_group}' must be a group Location.")
 
     # Validate leaf is a leaf and belongs to group (nested set: descendant check)
-    leaf = frappe.db.get_value("Location", site_leaf, ["is_group", "lft", "rgt"], as_dict=True)
+    leaf = ctx.location(site_leaf)
     if not leaf:
         frappe.throw(f"Site Location '{site_leaf}' does not exist. Please re-select.")
     if leaf.get("is_group"):
         frappe.throw(f"Site Location '{site_leaf}' is a group node. Please select a leaf Location.")
 
-    group_lr = frappe.db.get_value("Location", site_group, ["lft", "rgt"], as_dict=True)
-    if not group_lr:
-        frappe.throw(f"Site Group '{site_group}' does not exist. Please re-select.")
-
-    if not (leaf.lft >= group_lr.lft and leaf.rgt <= group_lr.rgt):
+    if not ctx.is_descendant(site_group, site_leaf):
         frappe.throw(
             f"Site Location '{site_leaf}' is not under Site Group '{site_group}'. Please select a valid leaf."
         )
@@ -172,6 +172,7 @@ def _set_assign(ticket: str, users: list[str]) -> None:
     # stable + deduped
     uniq = sorted({(u or "").strip() for u in (users or []) if (u or "").strip()})
     frappe.db.set_value(DOCT, ticket, "_assign", json.dumps(uniq), update_modified=False)
+    ticket_state_sync.mark_ticket(ticket)
     
 def _mirror_assign(ticket: str, users: list[str]) -> None:
     # Mirror/normalize _assign in DB (compat alias used by sync_ticket_assignments)
@@ -191,8 +192,9 @@ def _resolve_partner_assignment_user(doc) -> str:
             "Fulfilment Party is Partner."
         )
 
-    return resolve_partner_dispatch_user(
-        partner_name
+    return get_ticket_context(doc).memo(
+        resolve_partner_dispatch_user,
+        partner_name,
     )
 
 def _enforce_partner_assignment(ticket: str, doc=None) -> None:
@@ -300,7 +302,8 @@ def dedupe_assign_field(doc, method=None) -> None:
         _enforce_partner_assignment(ticket, doc=doc)
         return
 
-    if ticket:
+    # A ticket that is not inserted yet cannot have ToDos (Link validation), skip the read.
+    if ticket and not doc.is_new():
         todos = _open_todos(ticket)
         if todos:
             owner = (todos[0].get("allocated_to") or "").strip()
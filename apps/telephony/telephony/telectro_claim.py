@@ -1,7 +1,9 @@
 import json
 import frappe
 from frappe.utils import now_datetime
+from telephony import ticket_state_sync
 from telephony.telectro_notifications import notify_ticket_action_required
+from telephony.ticket_assignees import distinct_todo_users, get_open_todos, parse_assign
 
 
 def _notify_controlled_handoff_receiver(
@@ -155,6 +157,8 @@ def _normalize_assignment(ticket: str, owner_email: str, note: str | None = None
             }
         ).insert(ignore_permissions=True)
 
+    ticket_state_sync.mark_ticket(ticket)
+
     if note:
         frappe.get_doc(
             {
@@ -195,6 +199,7 @@ def _normalize_to_pool(ticket: str, note: str | None = None):
         frappe.db.set_value("ToDo", t["name"], "status", "Closed", update_modified=False)
 
     frappe.db.set_value("HD Ticket", ticket, "_assign", json.dumps([]), update_modified=False)
+    ticket_state_sync.mark_ticket(ticket)
 
     if note:
         frappe.get_doc(
@@ -416,48 +421,18 @@ def telectro_ticket_assignment_state(ticket: str):
     if not ticket:
         return {"ok": 0, "reason": "missing_ticket"}
 
-    if not frappe.db.exists("HD Ticket", ticket):
-        return {"ok": 0, "reason": "invalid_ticket", "ticket": ticket}
-
-    doc = frappe.get_doc("HD Ticket", ticket)
-
-    open_todos = frappe.get_all(
-        "ToDo",
-        filters={
-            "reference_type": "HD Ticket",
-            "reference_name": ticket,
-            "status": "Open",
-        },
-        fields=["name", "allocated_to", "creation"],
-        order_by="creation asc",
-        ignore_permissions=True,
-        limit_page_length=20,
+    row = frappe.db.get_value(
+        "HD Ticket",
+        ticket,
+        ["name", "status", "custom_fulfilment_party", "_assign"],
+        as_dict=True,
     )
+    if not row:
+        return {"ok": 0, "reason": "invalid_ticket", "ticket": ticket}
 
-    todo_users = []
-    seen = set()
-
-    for td in open_todos:
-        user = (td.get("allocated_to") or "").strip()
-        if not user or user in seen:
-            continue
-        seen.add(user)
-        todo_users.append(user)
-
-    assign_users = []
-    raw_assign = doc.get("_assign")
-
-    if raw_assign:
-        try:
-            parsed = json.loads(raw_assign) if isinstance(raw_assign, str) else raw_assign
-            if isinstance(parsed, list):
-                assign_users = [
-                    str(x).strip()
-                    for x in parsed
-                    if str(x).strip()
-                ]
-        except Exception:
-            assign_users = []
+    open_todos = get_open_todos([ticket]).get(ticket) or []
+    todo_users = distinct_todo_users(open_todos)
+    assign_users = parse_assign(row.get("_assign"))
 
     effective_users = todo_users or assign_users
 
@@ -471,6 +446,6 @@ def telectro_ticket_assignment_state(ticket: str):
         "is_pool": not effective_users,
         "has_assignment_drift": todo_users != assign_users,
         "open_todo_count": len(open_todos),
-        "status": doc.status,
-        "fulfilment_party": doc.get("custom_fulfilment_party"),
+        "status": row.status,
+        "fulfilment_party": row.get("custom_fulfilment_party"),
     }
\ No newline at end of file
@@ -1,7 +1,11 @@
 import re
+import time
 import frappe
 import hashlib
 
+from telephony import telectro_site_label_index
+from telephony.ticket_context import get_ticket_context
+
 # --- Parsing helpers ---------------------------------------------------------
 
 _SITE_RE  = re.compile(r"(?i)\bSITE\s*:\s*([^\r\n]+)")
@@ -89,7 +93,65 @@ def _sender_email(doc) -> str | None:
 
 # --- Customer lookup ---------------------------------------------------------
 
+# Per-process sender -> (customer, reason) map. Entries carry the Redis generation they
+# were resolved under; a Contact/Customer change anywhere bumps the generation, so every
+# worker drops its entries on the next lookup. Repeat senders cost one cache GET, no SQL.
+_CUSTOMER_MAP_GEN_KEY = "telephony:stage_a:customer_map_gen"
+_CUSTOMER_MAP_TTL_DEFAULT = 600
+_CUSTOMER_MAP_MAX_ENTRIES = 2048
+
+_customer_map: dict = {}
+
+def _customer_map_gen() -> str | None:
+    try:
+        return str(frappe.cache().get_value(_CUSTOMER_MAP_GEN_KEY) or "0")
+    except Exception:
+        return None
+
+def _bump_customer_map_gen():
+    try:
+        frappe.cache().set_value(_CUSTOMER_MAP_GEN_KEY, frappe.generate_hash(length=12))
+    except Exception:
+        pass
+
+def invalidate_customer_map(doc=None, method=None):
+    """
+    doc_events hook (Contact / Customer): drop cached sender -> Customer results.
+    Contact Email and Dynamic Link rows are child tables, saved through their Contact.
+    This worker's entries go now; the generation is bumped once the write commits (or
+    rolls back), so no worker can re-cache the pre-commit row under the new generation.
+    """
+    _customer_map.clear()
+    frappe.db.after_commit.add(_bump_customer_map_gen)
+    frappe.db.after_rollback.add(_bump_customer_map_gen)
+
 def _customer_from_sender(email: str) -> tuple[str | None, str]:
+    """
+    Cached _customer_from_sender_uncached(); same (customer, reason_code) contract.
+    TTL via site config `telephony_customer_map_ttl_seconds` (0 disables the cache).
+    """
+    email = (email or "").strip().lower()
+    if not email:
+        return None, "empty_email"
+
+    ttl = _conf_int("telephony_customer_map_ttl_seconds", _CUSTOMER_MAP_TTL_DEFAULT)
+    gen = _customer_map_gen() if ttl > 0 else None
+    if gen is None:
+        return _customer_from_sender_uncached(email)
+
+    key = (getattr(frappe.local, "site", None), email)
+    now = time.monotonic()
+    hit = _customer_map.get(key)
+    if hit and hit[0] == gen and hit[1] > now:
+        return hit[2]
+
+    result = _customer_from_sender_uncached(email)
+    if len(_customer_map) >= _CUSTOMER_MAP_MAX_ENTRIES:
+        _customer_map.clear()
+    _customer_map[key] = (gen, now + ttl, result)
+    return result
+
+def _customer_from_sender_uncached(email: str) -> tuple[str | None, str]:
     """
     Map sender email -> Customer with a reason code.
 
@@ -176,42 +238,9 @@ def _location_from_site_label(site_label: str) -> str | None:
       - name exact
       - location_name exact (if exists)
       - begins-with fallback
+    Served from the precomputed label index (telectro_site_label_index).
     """
-    site_label = (site_label or "").strip()
-    if not site_label:
-        return None
-
-    if not frappe.db.exists("DocType", "Location"):
-        return None
-
-    # Exact name
-    if frappe.db.exists("Location", site_label):
-        return site_label
-
-    # location_name exact (field may exist depending on version)
-    if frappe.db.has_column("Location", "location_name"):
-        loc = frappe.db.get_value("Location", {"location_name": site_label}, "name")
-        if loc:
-            return loc
-
-    # Soft fallback: startswith on name or location_name
-    # (Pilot-friendly; keep it conservative)
-    candidates = []
-    try:
-        candidates = frappe.get_all(
-            "Location",
-            or_filters=(
-                [{"name": ["like", site_label + "%"]}]
-                + ([{"location_name": ["like", site_label + "%"]}] if frappe.db.has_column("Location", "location_name") else [])
-            ),
-            pluck="name",
-            limit_page_length=5,
-            ignore_permissions=True,
-        )
-    except Exception:
-        candidates = []
-
-    return candidates[0] if candidates else None
+    return telectro_site_label_index.resolve(site_label)
 
 # --- Hook -------------------------------------------------------------------
 
@@ -245,7 +274,7 @@ def populate_from_email(doc, method=None):
     if not doc.get("custom_site_group"):
         cust = doc.get("custom_customer")
         if cust:
-            default_campus = frappe.db.get_value("Customer", cust, "custom_default_campus")
+            default_campus = get_ticket_context(doc).customer_default_campus(cust)
             if default_campus:
                 doc.set("custom_site_group", default_campus)
 
@@ -275,56 +304,9 @@ def _resolve_site_to_location(site_label: str) -> str | None:
     Resolve SITE label to Location.
     Pilot-friendly: prefer exact match under "Pilot Sites" (if that exists),
     then global exact match, then conservative startswith.
+    Served from the precomputed label index (telectro_site_label_index).
     """
-    site_label = (site_label or "").strip()
-    if not site_label or not frappe.db.exists("DocType", "Location"):
-        return None
-
-    # If pilot root exists, constrain to it first
-    pilot_root = "Pilot Sites" if frappe.db.exists("Location", "Pilot Sites") else None
-
-    def _find(filters):
-        return frappe.db.get_value("Location", filters, "name")
-
-    # 1) exact by name
-    if frappe.db.exists("Location", site_label):
-        if not pilot_root:
-            return site_label
-        # if pilot_root exists, only accept if it's under pilot tree (best effort)
-        parent = frappe.db.get_value("Location", site_label, "parent_location")
-        if parent == pilot_root or site_label == pilot_root:
-            return site_label
-
-    # 2) exact by location_name (if field exists)
-    if frappe.db.has_column("Location", "location_name"):
-        filters = {"location_name": site_label}
-        if pilot_root:
-            filters["parent_location"] = pilot_root
-        loc = _find(filters)
-        if loc:
-            return loc
-
-    # 3) startswith fallback (conservative)
-    or_filters = [{"name": ["like", site_label + "%"]}]
-    if frappe.db.has_column("Location", "location_name"):
-        or_filters.append({"location_name": ["like", site_label + "%"]})
-
-    filters = {}
-    if pilot_root:
-        filters["parent_location"] = pilot_root
-
-    try:
-        rows = frappe.get_all(
-            "Location",
-            filters=filters,
-            or_filters=or_filters,
-            pluck="name",
-            limit_page_length=5,
-            ignore_permissions=True,
-        )
-        return rows[0] if rows else None
-    except Exception:
-        return None
+    return telectro_site_label_index.resolve_pilot(site_label)
 
 def populate_ticket_from_communication(comm, method=None):
     """
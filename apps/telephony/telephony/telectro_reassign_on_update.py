@@ -6,6 +6,7 @@ from telephony.telectro_claim import _normalize_assignment, _normalize_to_pool
 from telephony.partner_identity import resolve_partner_dispatch_user
 from telephony.telectro_ticket_routing import seed_ticket_routing
 from telephony.telectro_routing_policy import resolve_ticket_routing_policy
+from telephony.ticket_context import get_ticket_context
 
 ROUTING_FIELDS = {
     "ticket_type",
@@ -211,8 +212,9 @@ def reassign_if_routing_changed(doc, method=None):
             doc.get("custom_fulfilment_partner")
         )
 
-        partner_user = resolve_partner_dispatch_user(
-            partner_name
+        partner_user = get_ticket_context(doc).memo(
+            resolve_partner_dispatch_user,
+            partner_name,
         )
 
         _normalize_assignment(
@@ -1,7 +1,9 @@
 import frappe
 import json
 
+from telephony import ticket_state_sync
 from telephony.partner_identity import resolve_partner_dispatch_user
+from telephony.ticket_context import get_ticket_context
 from telephony.telectro_routing_policy import resolve_ticket_routing_policy
 
 def _ensure_open_todo(ticket_name: str, assignee: str, desc: str = "") -> None:
@@ -81,8 +83,9 @@ def assign_after_insert(doc, method=None):
             doc.get("custom_fulfilment_partner") or ""
         ).strip()
 
-        partner_user = resolve_partner_dispatch_user(
-            partner_name
+        partner_user = get_ticket_context(doc).memo(
+            resolve_partner_dispatch_user,
+            partner_name,
         )
 
         # If already has an Open ToDo, don't interfere.
@@ -166,3 +169,4 @@ def _todo_assignees(ticket_name: str) -> list[str]:
 def _mirror_assign_from_todo(doc) -> None:
     users = _todo_assignees(doc.name)
     doc.db_set("_assign", json.dumps(users), update_modified=False)
+    ticket_state_sync.mark_ticket(doc.name)
@@ -1,21 +1,9 @@
 import frappe
 
 
-# Pilot-only hardcoded policy.
-# Keep isolated so it can later become a DocType-backed routing policy.
-#
-# Primary routing anchor is Campus / custom_site_group.
-# telectro_site_guard.py already applies Customer.custom_default_campus
-# before after_insert assignment runs.
-#
-# Current pilot proof:
-# - Customer B.custom_default_campus = Boschendal
-# - Boschendal is the exact Location / custom_site_group value.
-#
-# Replace this user when Telectro confirms the real Boschendal technician.
-CAMPUS_DEDICATED_USERS = {
-    "boschendal": "hendrik@local.test",
-}
+# Campus dedicated users and creator take-ownership eligibility come from the compiled
+# routing table (TELECTRO Routing Rule + technician roles); see telectro_routing_table.
+from telephony.telectro_routing_table import get_routing_table
 
 
 def _clean(val) -> str:
@@ -32,53 +20,6 @@ def _as_bool(val) -> bool:
     return str(val or "").strip().lower() in {"1", "true", "yes", "on"}
 
 
-def _user_exists(user: str) -> bool:
-    user = _clean(user)
-    if not user:
-        return False
-
-    return bool(frappe.db.exists("User", user))
-
-
-def _roles_for(user: str) -> set[str]:
-    user = _clean(user)
-    if not user:
-        return set()
-
-    try:
-        return set(frappe.get_roles(user))
-    except Exception:
-        return set()
-
-
-def _is_partner_user(user: str) -> bool:
-    roles = _roles_for(user)
-
-    return bool(
-        roles
-        & {
-            "TELECTRO-POC Role - Partner",
-            "TELECTRO-POC Role - Partner Creator",
-        }
-    )
-
-
-def _is_internal_technician_user(user: str) -> bool:
-    roles = _roles_for(user)
-
-    if _is_partner_user(user):
-        return False
-
-    return bool(
-        roles
-        & {
-            "TELECTRO-POC Role - Tech",
-            "Agent",
-            "Support Team",
-        }
-    )
-
-
 def _resolve_creator_take_ownership_policy(doc) -> dict | None:
     """
     Route a new internal manual ticket to its creator only when the creator
@@ -104,9 +45,6 @@ def _resolve_creator_take_ownership_policy(doc) -> dict | None:
     if not owner or owner in {"Administrator", "Guest"}:
         return None
 
-    if not _user_exists(owner):
-        return None
-
     fulfilment_party = _clean(doc.get("custom_fulfilment_party"))
     if fulfilment_party == "Partner":
         return None
@@ -115,7 +53,8 @@ def _resolve_creator_take_ownership_policy(doc) -> dict | None:
     if request_source == "Partner":
         return None
 
-    if not _is_internal_technician_user(owner):
+    # existing user with an internal technician role and no Partner role
+    if owner not in get_routing_table().creator_eligible:
         return None
 
     return {
@@ -159,15 +98,17 @@ def resolve_ticket_routing_policy(doc) -> dict | None:
     if not campus_key:
         return None
 
-    target_user = _clean(CAMPUS_DEDICATED_USERS.get(campus_key))
+    table = get_routing_table()
+    target_user = table.campus_users.get(campus_key)
     if not target_user:
-        return None
+        missing_user = table.missing_campus_users.get(campus_key)
+        if not missing_user:
+            return None
 
-    if not _user_exists(target_user):
         frappe.log_error(
             message=(
                 f"Campus routing policy matched campus={campus!r}, "
-                f"but user {target_user!r} does not exist."
+                f"but user {missing_user!r} does not exist."
             ),
             title="TELECTRO routing policy user missing",
         )
@@ -0,0 +1,265 @@
+"""
+Routing table for seed_ticket_routing and resolve_ticket_routing_policy.
+
+Enabled TELECTRO Routing Rule rows (mailbox -> service area, service area -> team,
+campus -> dedicated user) and creator take-ownership eligibility (users holding an
+internal technician role and no Partner role) are compiled by three queries into an
+immutable per-process table, so routing decisions on the HD Ticket validate path are
+dict and set lookups.
+
+The table is tagged with a Redis generation token. Routing Rule and User writes bump it
+after commit (roles are Has Role child rows saved with the User); every worker rebuilds
+on its next lookup after a change. MAX_AGE_SECONDS bounds staleness for writes that
+bypass hooks.
+
+The SEED_* mappings are the pilot policy the rules were created from: after_migrate
+inserts them once, and they are used as-is until the DocType is installed.
+"""
+
+import time
+from types import MappingProxyType
+
+import frappe
+
+RULE_DOCTYPE = "TELECTRO Routing Rule"
+
+SEED_MAILBOX_TO_AREA = {
+    "PABX": "PABX",
+    "Routing": "Routing",
+    "SIM": "SIM",
+    "Fiber": "Internet Connection",  # legacy mailbox name / old service area
+    "Fibre": "Internet Connection",  # spelling compatibility
+    "Internet Connection": "Internet Connection",
+    "Faults": "Faults",
+    # Helpdesk intentionally not mapped -> DEFAULT_AREA
+}
+
+SEED_AREA_TO_TEAM = {
+    "Routing": "Routing",
+    "PABX": "PABX",
+    "SIM": "SIM",
+    "Internet Connection": "Internet Connection",
+    "CCTV": "CCTV",
+    "Faults": "Helpdesk Team",
+    "Quotes & Site Surveys": "Helpdesk Team",
+    "Other": "Helpdesk Team",
+    "Fiber": "Internet Connection",
+}
+
+# Primary campus routing anchor is Campus / custom_site_group (telectro_site_guard.py
+# applies Customer.custom_default_campus before after_insert assignment runs).
+# Pilot proof: Customer B.custom_default_campus = Boschendal.
+# Replace this user when Telectro confirms the real Boschendal technician.
+SEED_CAMPUS_DEDICATED_USERS = {
+    "boschendal": "hendrik@local.test",
+}
+
+DEFAULT_AREA = "Other"
+DEFAULT_TEAM = "Helpdesk Team"
+
+PARTNER_ROLES = frozenset(
+    {
+        "TELECTRO-POC Role - Partner",
+        "TELECTRO-POC Role - Partner Creator",
+    }
+)
+
+TECHNICIAN_ROLES = frozenset(
+    {
+        "TELECTRO-POC Role - Tech",
+        "Agent",
+        "Support Team",
+    }
+)
+
+SEEDED_KEY = "telephony_routing_rules_seeded"
+
+GEN_KEY = "telephony:routing_table:gen"
+
+MAX_AGE_SECONDS = 15 * 60
+
+_TABLE: dict = {}
+
+
+def _clean(val) -> str:
+    if val is None:
+        return ""
+    return str(val).strip()
+
+
+def _norm_key(val) -> str:
+    return _clean(val).casefold()
+
+
+class _RoutingTable:
+    def __init__(self, rules, existing_users, role_rows, gen):
+        self.gen = gen
+        self.built_at = time.monotonic()
+
+        mailbox_to_area = {}
+        area_to_team = {}
+        campus_targets = {}
+        for rule_type, match_value, target in rules:
+            if rule_type == "Mailbox Area":
+                mailbox_to_area.setdefault(match_value, target)
+            elif rule_type == "Area Team":
+                area_to_team.setdefault(match_value, target)
+            elif rule_type == "Campus User":
+                campus_targets.setdefault(_norm_key(match_value), target)
+
+        self.mailbox_to_area = MappingProxyType(mailbox_to_area)
+        self.area_to_team = MappingProxyType(area_to_team)
+        self.campus_users = MappingProxyType(
+            {key: user for key, user in campus_targets.items() if user in existing_users}
+        )
+        # matched campuses whose user is gone; resolve_ticket_routing_policy logs them
+        self.missing_campus_users = MappingProxyType(
+            {key: user for key, user in campus_targets.items() if user not in existing_users}
+        )
+
+        roles_by_user = {}
+        for user, role in role_rows:
+            roles_by_user.setdefault(user, set()).add(role)
+        self.creator_eligible = frozenset(
+            user
+            for user, roles in roles_by_user.items()
+            if roles & TECHNICIAN_ROLES and not roles & PARTNER_ROLES
+        )
+
+    def area_for_mailbox(self, mailbox: str) -> str:
+        return self.mailbox_to_area.get(_clean(mailbox)) or DEFAULT_AREA
+
+    def team_for_area(self, area: str) -> str:
+        return self.area_to_team.get(_clean(area)) or DEFAULT_TEAM
+
+
+def _seed_rules():
+    return [
+        *(("Mailbox Area", k, v) for k, v in SEED_MAILBOX_TO_AREA.items()),
+        *(("Area Team", k, v) for k, v in SEED_AREA_TO_TEAM.items()),
+        *(("Campus User", k, v) for k, v in SEED_CAMPUS_DEDICATED_USERS.items()),
+    ]
+
+
+def _load_rules():
+    if not frappe.db.table_exists(RULE_DOCTYPE):
+        return _seed_rules()
+
+    return [
+        (row.rule_type, _clean(row.match_value), _clean(row.target))
+        for row in frappe.get_all(
+            RULE_DOCTYPE,
+            filters={"enabled": 1},
+            fields=["rule_type", "match_value", "target"],
+            order_by="creation asc",
+            limit_page_length=0,
+            ignore_permissions=True,
+        )
+    ]
+
+
+def _load_users(rules):
+    targets = sorted({target for rule_type, _match, target in rules if rule_type == "Campus User"})
+    existing = set()
+    if targets:
+        existing = set(
+            frappe.get_all(
+                "User",
+                filters={"name": ["in", targets]},
+                pluck="name",
+                limit_page_length=0,
+                ignore_permissions=True,
+            )
+        )
+
+    role_rows = frappe.get_all(
+        "Has Role",
+        filters={
+            "parenttype": "User",
+            "role": ["in", sorted(TECHNICIAN_ROLES | PARTNER_ROLES)],
+        },
+        fields=["parent", "role"],
+        limit_page_length=0,
+        ignore_permissions=True,
+    )
+    return existing, [(row.parent, row.role) for row in role_rows]
+
+
+def _current_gen():
+    try:
+        return str(frappe.cache().get_value(GEN_KEY) or "0")
+    except Exception:
+        return None
+
+
+def get_routing_table() -> _RoutingTable:
+    site = getattr(frappe.local, "site", None)
+    gen = _current_gen()
+    table = _TABLE.get(site)
+    if (
+        table is not None
+        and (gen is None or table.gen == gen)
+        and time.monotonic() - table.built_at < MAX_AGE_SECONDS
+    ):
+        return table
+
+    rules = _load_rules()
+    existing_users, role_rows = _load_users(rules)
+    table = _RoutingTable(rules, existing_users, role_rows, gen)
+    _TABLE[site] = table
+    return table
+
+
+def _bump_gen():
+    try:
+        frappe.cache().set_value(GEN_KEY, frappe.generate_hash(length=12))
+    except Exception:
+        pass
+
+
+def invalidate(doc=None, method=None):
+    """doc_events hook (TELECTRO Routing Rule, User): force a rebuild in every worker.
+
+    This worker's table goes now; the generation is bumped once the write commits (or
+    rolls back), so no worker rebuilds from the pre-commit rows under the new token.
+    """
+    _TABLE.pop(getattr(frappe.local, "site", None), None)
+    frappe.db.after_commit.add(_bump_gen)
+    frappe.db.after_rollback.add(_bump_gen)
+
+
+def after_migrate():
+    """Create the pilot rules once, on the first migrate after the DocType is installed."""
+    if frappe.db.get_global(SEEDED_KEY) or not frappe.db.table_exists(RULE_DOCTYPE):
+        return
+
+    if not frappe.db.count(RULE_DOCTYPE):
+        for rule_type, match_value, target in _seed_rules():
+            frappe.get_doc(
+                {
+                    "doctype": RULE_DOCTYPE,
+                    "enabled": 1,
+                    "rule_type": rule_type,
+                    "match_value": match_value,
+                    "target": target,
+                    "notes": "Seeded from the pilot routing policy.",
+                }
+            ).insert(ignore_permissions=True)
+
+    frappe.db.set_global(SEEDED_KEY, 1)
+    _TABLE.pop(getattr(frappe.local, "site", None), None)
+    _bump_gen()
+
+
+def stats() -> dict:
+    """bench execute telephony.telectro_routing_table.stats"""
+    table = get_routing_table()
+    return {
+        "gen": table.gen,
+        "mailboxes": len(table.mailbox_to_area),
+        "areas": len(table.area_to_team),
+        "campuses": len(table.campus_users),
+        "missing_campus_users": dict(table.missing_campus_users),
+        "creator_eligible": len(table.creator_eligible),
+        "age_seconds": int(time.monotonic() - table.built_at),
+    }
@@ -1,5 +1,7 @@
 import frappe
 
+from telephony.ticket_context import get_ticket_context
+
 # Categories stored by Select field (exact labels)
 CAT_BUILDINGS = "buildings"
 CAT_NETWORK_NODES = "network nodes"
@@ -64,10 +66,12 @@ def _apply_customer_default_campus(doc) -> None:
 
 
 def _get_default_campus_for_ticket(doc) -> str | None:
+    ctx = get_ticket_context(doc)
+
     # Existing internal Desk path.
     cust = _norm(doc.get("custom_customer"))
     if cust:
-        default_campus = frappe.db.get_value("Customer", cust, "custom_default_campus")
+        default_campus = ctx.customer_default_campus(cust)
         if default_campus:
             return default_campus
 
@@ -76,33 +80,23 @@ def _get_default_campus_for_ticket(doc) -> str | None:
     if hd_customer:
         # If an ERPNext Customer with the same name exists, allow its configured
         # default campus to win.
-        if frappe.db.exists("Customer", hd_customer):
-            default_campus = frappe.db.get_value(
-                "Customer",
-                hd_customer,
-                "custom_default_campus",
-            )
-            if default_campus:
-                return default_campus
+        default_campus = ctx.customer_default_campus(hd_customer)
+        if default_campus:
+            return default_campus
 
         # Pilot-safe fallback: HD Customer name matches the top-level campus
         # Location under Pilot Sites.
-        if _is_pilot_campus_location(hd_customer):
+        if _is_pilot_campus_location(ctx, hd_customer):
             return hd_customer
 
     return None
 
 
-def _is_pilot_campus_location(location_name: str) -> bool:
+def _is_pilot_campus_location(ctx, location_name: str) -> bool:
     if not location_name:
         return False
 
-    row = frappe.db.get_value(
-        "Location",
-        location_name,
-        ["is_group", "parent_location"],
-        as_dict=True,
-    )
+    row = ctx.location(location_name)
 
     if not row:
         return False
@@ -136,8 +130,9 @@ def _require_site_within_campus(doc) -> None:
     if not site_group or not site:
         return
 
-    if not _is_descendant(site_group, site):
-        parent = frappe.db.get_value("Location", site, "parent_location") or ""
+    ctx = get_ticket_context(doc)
+    if not ctx.is_descendant(site_group, site):
+        parent = (ctx.location(site) or {}).get("parent_location") or ""
         frappe.throw(
             f"Fault Point must be under Campus '{site_group}'. "
             f"Selected site parent is '{parent}'."
@@ -174,14 +169,6 @@ def _norm(s: str) -> str:
 def _norm_lower(s: str) -> str:
     return _norm(s).lower()
 
-def _is_descendant(root_name: str, node_name: str) -> bool:
-    """Return True if node_name is within root_name subtree (nested set containment)."""
-    root = frappe.db.get_value("Location", root_name, ["lft", "rgt"], as_dict=True)
-    node = frappe.db.get_value("Location", node_name, ["lft", "rgt"], as_dict=True)
-    if not root or not node:
-        return False
-    return node.lft >= root.lft and node.rgt <= root.rgt
-
 def validate_site_fields(doc, method=None):
     """
     Enforce:
@@ -231,20 +218,22 @@ def validate_site_fields(doc, method=None):
     site = _norm(doc.get("custom_site"))
     cat_norm = _norm_lower(doc.get("custom_fault_category"))
 
+    ctx = get_ticket_context(doc)
+
     # --- Site Group must be a group node (if provided) ---
     if site_group:
-        is_group = frappe.db.get_value("Location", site_group, "is_group")
-        if is_group is None:
+        row = ctx.location(site_group)
+        if row is None:
             frappe.throw(f"Site Group does not exist: {site_group}")
-        if not is_group:
+        if not row.is_group:
             frappe.throw(f"Site Group must be a group Location (not a leaf): {site_group}")
 
     # --- Site must be a leaf node (if provided) ---
     if site:
-        is_group = frappe.db.get_value("Location", site, "is_group")
-        if is_group is None:
+        row = ctx.location(site)
+        if row is None:
             frappe.throw(f"Site does not exist: {site}")
-        if is_group:
+        if row.is_group:
             frappe.throw(f"Site must be a leaf Location (not a group): {site}")
             
     # Campus containment (applies when site is present; fault-like already required it)
@@ -270,11 +259,11 @@ def validate_site_fields(doc, method=None):
         )
 
     bucket_root = f"{site_group} - {bucket}"
-    if not frappe.db.exists("Location", bucket_root):
+    if ctx.location(bucket_root) is None:
         frappe.throw(f"Missing bucket Location: '{bucket_root}'")
 
-    if not _is_descendant(bucket_root, site):
-        parent = frappe.db.get_value("Location", site, "parent_location") or ""
+    if not ctx.is_descendant(bucket_root, site):
+        parent = ctx.location(site).parent_location or ""
         frappe.throw(
             f"Site must be under '{bucket_root}'. "
             f"Selected site parent is '{parent}'."
@@ -0,0 +1,185 @@
+"""
+SITE: label -> Location index for Stage A intake.
+
+One query loads every Location (name, location_name, parent_location, modified) into a
+per-process index; lookups are dict hits, and prefix matches are a bisect over a sorted
+label list, memoised per prefix. Matching is casefolded, like the database collation.
+
+The index is tagged with a Redis generation token. Location insert/update/rename/delete
+hooks bump it after commit, and so do the KMZ maintenance scripts (they write with db.set_value, which
+skips hooks). Every worker rebuilds on its next lookup after a change. MAX_AGE_SECONDS
+bounds staleness for writes that bypass both.
+"""
+
+import bisect
+import time
+
+import frappe
+
+PILOT_ROOT = "Pilot Sites"
+
+GEN_KEY = "telephony:site_label_index:gen"
+
+MAX_AGE_SECONDS = 15 * 60
+
+_INDEX: dict = {}
+
+
+def _norm(label: str) -> str:
+    return (label or "").strip().casefold()
+
+
+class _SiteLabelIndex:
+    def __init__(self, rows, gen):
+        self.gen = gen
+        self.built_at = time.monotonic()
+        self.by_name = {}
+        self.by_location_name = {}
+        labels = []
+
+        # rows arrive newest first; rank keeps that order for "first match" semantics
+        for rank, row in enumerate(rows):
+            entry = (row.name, row.get("parent_location"))
+            name_key = _norm(row.name)
+            self.by_name.setdefault(name_key, entry)
+            labels.append((name_key, rank, entry))
+
+            loc_key = _norm(row.get("location_name"))
+            if loc_key:
+                self.by_location_name.setdefault(loc_key, []).append(entry)
+                if loc_key != name_key:
+                    labels.append((loc_key, rank, entry))
+
+        labels.sort(key=lambda x: (x[0], x[1]))
+        self.labels = labels
+        self.label_keys = [x[0] for x in labels]
+        self._prefix_memo = {}
+
+        root = self.by_name.get(_norm(PILOT_ROOT))
+        self.pilot_root = root[0] if root else None
+
+    def prefix(self, key: str, parent=None):
+        memo_key = (key, parent)
+        if memo_key in self._prefix_memo:
+            return self._prefix_memo[memo_key]
+
+        best = None
+        i = bisect.bisect_left(self.label_keys, key)
+        while i < len(self.labels) and self.label_keys[i].startswith(key):
+            _, rank, entry = self.labels[i]
+            if (parent is None or entry[1] == parent) and (best is None or rank < best[0]):
+                best = (rank, entry[0])
+            i += 1
+
+        result = best[1] if best else None
+        self._prefix_memo[memo_key] = result
+        return result
+
+
+def _current_gen():
+    try:
+        return str(frappe.cache().get_value(GEN_KEY) or "0")
+    except Exception:
+        return None
+
+
+def _load_rows():
+    if not frappe.db.exists("DocType", "Location"):
+        return []
+    fields = ["name", "parent_location", "modified"]
+    if frappe.db.has_column("Location", "location_name"):
+        fields.append("location_name")
+    return frappe.get_all(
+        "Location",
+        fields=fields,
+        order_by="modified desc",
+        ignore_permissions=True,
+    )
+
+
+def get_index() -> _SiteLabelIndex:
+    site = getattr(frappe.local, "site", None)
+    gen = _current_gen()
+    index = _INDEX.get(site)
+    if (
+        index is not None
+        and (gen is None or index.gen == gen)
+        and time.monotonic() - index.built_at < MAX_AGE_SECONDS
+    ):
+        return index
+
+    index = _SiteLabelIndex(_load_rows(), gen)
+    _INDEX[site] = index
+    return index
+
+
+def resolve(site_label: str) -> str | None:
+    """Global precedence: exact name, exact location_name, then newest prefix match."""
+    key = _norm(site_label)
+    if not key:
+        return None
+
+    index = get_index()
+
+    hit = index.by_name.get(key)
+    if hit:
+        return hit[0]
+
+    matches = index.by_location_name.get(key)
+    if matches:
+        return matches[0][0]
+
+    return index.prefix(key)
+
+
+def resolve_pilot(site_label: str) -> str | None:
+    """Pilot precedence: as resolve(), but constrained to direct children of Pilot Sites when it exists."""
+    key = _norm(site_label)
+    if not key:
+        return None
+
+    index = get_index()
+    root = index.pilot_root
+
+    hit = index.by_name.get(key)
+    if hit and (not root or hit[1] == root or hit[0] == root):
+        return hit[0]
+
+    for name, parent in index.by_location_name.get(key) or []:
+        if not root or parent == root:
+            return name
+
+    return index.prefix(key, parent=root)
+
+
+def _bump_gen():
+    try:
+        frappe.cache().set_value(GEN_KEY, frappe.generate_hash(length=12))
+    except Exception:
+        pass
+
+
+def on_location_change(doc=None, method=None):
+    """doc_events hook (Location): drop this worker's index now, bump the generation once
+    the write commits (or rolls back) so no worker rebuilds from the pre-commit rows."""
+    _INDEX.pop(getattr(frappe.local, "site", None), None)
+    frappe.db.after_commit.add(_bump_gen)
+    frappe.db.after_rollback.add(_bump_gen)
+
+
+def invalidate():
+    """Script helper, called after the script's own commit: force a rebuild in every worker."""
+    _INDEX.pop(getattr(frappe.local, "site", None), None)
+    _bump_gen()
+
+
+def stats() -> dict:
+    """bench execute telephony.telectro_site_label_index.stats"""
+    index = get_index()
+    return {
+        "gen": index.gen,
+        "locations": len(index.by_name),
+        "labels": len(index.labels),
+        "pilot_root": index.pilot_root,
+        "age_seconds": int(time.monotonic() - index.built_at),
+    }
@@ -3,6 +3,8 @@ import json
 import frappe
 from frappe import _
 
+from telephony.ticket_context import get_ticket_context
+
 TECH_ROLE = "TELECTRO-POC Tech"
 
 
@@ -31,7 +33,7 @@ def validate_ticket_edit_rights(doc, method=None):
     if user == "Administrator":
         return
 
-    roles = frappe.get_roles(user) or []
+    roles = get_ticket_context(doc).roles(user)
     if TECH_ROLE not in roles:
         return
 
@@ -1,31 +1,7 @@
 import frappe
 
-
-MAILBOX_TO_AREA = {
-    "PABX": "PABX",
-    "Routing": "Routing",
-    "SIM": "SIM",
-    "Fiber": "Internet Connection",  # legacy mailbox name / old service area
-    "Fibre": "Internet Connection",  # spelling compatibility
-    "Internet Connection": "Internet Connection",
-    "Faults": "Faults",
-    # Helpdesk intentionally not mapped -> DEFAULT_AREA
-}
-
-AREA_TO_TEAM = {
-    "Routing": "Routing",
-    "PABX": "PABX",
-    "SIM": "SIM",
-    "Internet Connection": "Internet Connection",
-    "CCTV": "CCTV",
-    "Faults": "Helpdesk Team",
-    "Quotes & Site Surveys": "Helpdesk Team",
-    "Other": "Helpdesk Team",
-    "Fiber": "Internet Connection",
-}
-
-DEFAULT_AREA = "Other"
-DEFAULT_TEAM = "Helpdesk Team"
+# Routing rules are TELECTRO Routing Rule rows compiled by telectro_routing_table.
+from telephony.telectro_routing_table import DEFAULT_AREA, DEFAULT_TEAM, get_routing_table
 
 
 def _clean(val) -> str:
@@ -62,10 +38,11 @@ def seed_ticket_routing(doc, method=None) -> None:
     email_acct = _clean(doc.get("email_account"))
     area = _clean(doc.get("custom_service_area"))
     team = _clean(doc.get("agent_group"))
+    table = get_routing_table()
 
     if email_acct:
-        resolved_area = MAILBOX_TO_AREA.get(email_acct) or DEFAULT_AREA
-        resolved_team = AREA_TO_TEAM.get(resolved_area) or DEFAULT_TEAM
+        resolved_area = table.area_for_mailbox(email_acct)
+        resolved_team = table.team_for_area(resolved_area)
 
         if area != resolved_area:
             doc.custom_service_area = resolved_area
@@ -79,7 +56,7 @@ def seed_ticket_routing(doc, method=None) -> None:
         area = DEFAULT_AREA
         doc.custom_service_area = area
 
-    resolved_team = AREA_TO_TEAM.get(area) or DEFAULT_TEAM
+    resolved_team = table.team_for_area(area)
 
     # New doc: seed team only if empty
     if doc.is_new():
@@ -0,0 +1,99 @@
+import types
+import unittest
+from unittest import mock
+
+from telephony.overrides import assign_to
+
+
+class _Row(dict):
+    __getattr__ = dict.get
+
+
+def _frappe_mock(frappe_mock, rows, conf=None):
+    frappe_mock.session = types.SimpleNamespace(user="Administrator")
+    frappe_mock.conf = dict(conf or {})
+    frappe_mock.db.sql.return_value = rows
+
+
+class TestLeanState(unittest.TestCase):
+    def test_one_query_for_assign_and_open_todos(self):
+        rows = [
+            _Row(_assign='["a@x"]', custom_fulfilment_party="Telectro", todo="TD-2", allocated_to="a@x", creation=2),
+            _Row(_assign='["a@x"]', custom_fulfilment_party="Telectro", todo="TD-1", allocated_to="b@x", creation=1),
+        ]
+        with mock.patch.object(assign_to, "frappe") as frappe_mock:
+            _frappe_mock(frappe_mock, rows)
+
+            state = assign_to._get_hd_ticket_assignment_state("T-1")
+
+        frappe_mock.db.sql.assert_called_once()
+        frappe_mock.get_doc.assert_not_called()
+        self.assertEqual(state["assign_users"], ["a@x"])
+        self.assertEqual(state["effective_users"], ["a@x", "b@x"])
+        self.assertEqual([todo["name"] for todo in state["open_todos"]], ["TD-2", "TD-1"])
+        self.assertFalse(state["is_pool"])
+
+    def test_pool_ticket_has_no_todo_rows(self):
+        rows = [_Row(_assign="[]", custom_fulfilment_party=None, todo=None, allocated_to=None, creation=None)]
+        with mock.patch.object(assign_to, "frappe") as frappe_mock:
+            _frappe_mock(frappe_mock, rows)
+
+            state = assign_to._get_hd_ticket_assignment_state("T-1")
+
+        self.assertEqual(state["open_todos"], [])
+        self.assertTrue(state["is_pool"])
+        self.assertEqual(state["fulfilment_party"], "")
+
+
+class TestDiagnostics(unittest.TestCase):
+    def _add(self, conf=None, core_error=None):
+        rows = [_Row(_assign="", custom_fulfilment_party="", todo=None, allocated_to=None, creation=None)]
+        with (
+            mock.patch.object(assign_to, "frappe") as frappe_mock,
+            mock.patch.object(assign_to, "core_assign_to") as core,
+            mock.patch.object(assign_to, "_snap_ticket_seq_state", return_value={}) as snap,
+            mock.patch.object(assign_to, "_sync_ticket_assign_from_open_todos"),
+            mock.patch.object(assign_to, "_cancel_closed_todos_for_ticket"),
+            mock.patch.dict(assign_to.os.environ, {"TELECTRO_DEBUG": ""}),
+        ):
+            _frappe_mock(frappe_mock, rows, conf)
+            frappe_mock.get_all.return_value = []
+            core.add.side_effect = core_error
+            try:
+                assign_to.add(doctype="HD Ticket", name="T-1", assign_to=["a@x"])
+            except RuntimeError:
+                pass
+
+        return frappe_mock, snap
+
+    def test_successful_add_skips_snapshots_and_rereads(self):
+        frappe_mock, snap = self._add()
+
+        snap.assert_not_called()
+        self.assertEqual(frappe_mock.db.sql.call_count, 1)
+        todo_reads = [c for c in frappe_mock.get_all.call_args_list if c.kwargs.get("filters", {}).get("status") == "Open"]
+        self.assertEqual(todo_reads, [])
+
+    def test_debug_flag_logs_before_and_final_snapshots(self):
+        frappe_mock, snap = self._add(conf={"telephony_assign_diagnostics": 1})
+
+        self.assertEqual(snap.call_count, 2)
+        frappe_mock.logger.assert_called_with("telephony")
+        logged = frappe_mock.logger.return_value.info.call_args.args[0]
+        self.assertIn('"action": "assign_to.add"', logged)
+        self.assertIn('"snap_final"', logged)
+
+    def test_unsampled_calls_log_nothing(self):
+        frappe_mock, _ = self._add()
+
+        frappe_mock.logger.return_value.info.assert_not_called()
+
+    def test_failure_always_snapshots(self):
+        frappe_mock, snap = self._add(core_error=RuntimeError("boom"))
+
+        snap.assert_called_once_with()
+        frappe_mock.log_error.assert_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+from unittest import mock
+
+from telephony.setup import db_indexes
+
+
+class TestDeclaredIndexes(unittest.TestCase):
+    def test_ensure_creates_only_missing_indexes_with_existing_columns(self):
+        created = set()
+
+        def has_column(doctype, column):
+            return not (doctype == "HD Ticket" and column == "custom_request_source")
+
+        def has_index(table, index_name):
+            return index_name in created or index_name == "telectro_todo_allocated_status"
+
+        def add_index(doctype, columns, index_name=None):
+            created.add(index_name)
+
+        with mock.patch.object(db_indexes, "frappe") as frappe_mock:
+            frappe_mock.db.table_exists.return_value = True
+            frappe_mock.db.has_column.side_effect = has_column
+            frappe_mock.db.has_index.side_effect = has_index
+            frappe_mock.db.add_index.side_effect = add_index
+
+            result = db_indexes.ensure_indexes()
+
+        declared = {name for _dt, name, _cols in db_indexes.DECLARED_INDEXES}
+        self.assertEqual(
+            created,
+            declared - {"telectro_todo_allocated_status", "telectro_ticket_status_request_source"},
+        )
+        frappe_mock.db.add_index.assert_any_call(
+            "ToDo",
+            ["reference_type", "reference_name", "status"],
+            index_name="telectro_todo_reference_status",
+        )
+
+        verification = result["verification"]
+        self.assertFalse(verification["ok"])
+        self.assertEqual(verification["missing"], [])
+        self.assertEqual(
+            [(b["index"], b["missing_columns"]) for b in verification["blocked"]],
+            [("telectro_ticket_status_request_source", ["custom_request_source"])],
+        )
+        self.assertEqual(result["created_count"], len(created))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,300 @@
+import datetime
+import types
+import unittest
+from unittest import mock
+
+from telephony import fault_rollup
+from telephony.ftelephony.report.telectro_repeat_faults_by_location import (
+    telectro_repeat_faults_by_location as repeat_faults,
+)
+
+
+def _row(day, site, fault_count, last_ticket, severity="Sev3", open_count=0):
+    return {
+        "rollup_date": datetime.date(2026, 10, day),
+        "customer": "CUST-1",
+        "campus": "CAMPUS-1",
+        "site": site,
+        "fault_asset": "",
+        "service_area": "Voice",
+        "fault_category": "No dial tone",
+        "severity": severity,
+        "fault_count": fault_count,
+        "open_count": open_count,
+        "resolved_count": fault_count - open_count,
+        "archived_count": 0,
+        "first_ticket_on": datetime.datetime(2026, 10, day, 8, 0),
+        "last_ticket_on": datetime.datetime(2026, 10, day, 17, 0),
+        "last_ticket": last_ticket,
+    }
+
+
+class TestFaultRollupWindow(unittest.TestCase):
+    def test_day_range_is_half_open(self):
+        start, end = fault_rollup.day_range("2026-10-01", "2026-10-14")
+
+        self.assertEqual(start, datetime.datetime(2026, 10, 1))
+        self.assertEqual(end, datetime.datetime(2026, 10, 15))
+
+    def test_ticket_aggregate_filters_creation_without_date_function(self):
+        with mock.patch.object(fault_rollup, "frappe") as frappe_mock:
+            frappe_mock.db.sql.return_value = []
+            fault_rollup.aggregate_tickets(
+                datetime.datetime(2026, 10, 1),
+                datetime.datetime(2026, 10, 15),
+                {"site": "LOC-1"},
+            )
+
+        sql, values = frappe_mock.db.sql.call_args.args
+        where = sql.split("where", 1)[1]
+        self.assertIn("t.creation >= %(start)s", where)
+        self.assertIn("t.creation < %(end)s", where)
+        self.assertIn("t.custom_site = %(site)s", where)
+        self.assertNotIn("date(", where)
+        self.assertEqual(values["site"], "LOC-1")
+
+    def test_covered_days_come_from_rollup_and_earlier_days_from_tickets(self):
+        with (
+            mock.patch.object(fault_rollup, "built_from", return_value=datetime.date(2026, 9, 1)),
+            mock.patch.object(fault_rollup, "_rollup_rows", return_value=["rollup"]) as rollup_rows,
+            mock.patch.object(fault_rollup, "aggregate_tickets", return_value=["raw"]) as aggregate,
+        ):
+            rows = fault_rollup.get_fault_rows({}, "2026-08-30", "2026-10-16")
+
+        self.assertEqual(rows, ["rollup", "raw"])
+        rollup_rows.assert_called_once_with(
+            datetime.date(2026, 9, 1), datetime.date(2026, 10, 16), {}
+        )
+        aggregate.assert_called_once_with(
+            datetime.datetime(2026, 8, 30), datetime.datetime(2026, 9, 1), {}
+        )
+
+    def test_unbuilt_rollup_falls_back_to_tickets(self):
+        with (
+            mock.patch.object(fault_rollup, "built_from", return_value=None),
+            mock.patch.object(fault_rollup, "_rollup_rows") as rollup_rows,
+            mock.patch.object(fault_rollup, "aggregate_tickets", return_value=["raw"]),
+        ):
+            rows = fault_rollup.get_fault_rows({}, "2026-10-01", "2026-10-14")
+
+        self.assertEqual(rows, ["raw"])
+        rollup_rows.assert_not_called()
+
+    def test_rollup_name_is_stable_per_day_and_dimensions(self):
+        row = _row(3, "LOC-1", 1, "T-1")
+
+        self.assertEqual(
+            fault_rollup.rollup_name("2026-10-03", row),
+            fault_rollup.rollup_name(datetime.date(2026, 10, 3), dict(row, fault_count=5)),
+        )
+        self.assertNotEqual(
+            fault_rollup.rollup_name("2026-10-03", row),
+            fault_rollup.rollup_name("2026-10-03", dict(row, site="LOC-2")),
+        )
+
+
+class _Record(dict):
+    __getattr__ = dict.get
+
+
+class _Ticket(dict):
+    def __init__(self, before=None, in_insert=False, **fields):
+        super().__init__(creation=datetime.datetime(2026, 10, 3, 9, 30), **fields)
+        self.flags = mock.Mock(in_insert=in_insert)
+        self._before = before
+
+    def get_doc_before_save(self):
+        return self._before
+
+
+class TestFaultRollupHooks(unittest.TestCase):
+    def _run(self, hook, doc, start=datetime.date(2026, 9, 1)):
+        with (
+            mock.patch.object(fault_rollup, "built_from", return_value=start),
+            mock.patch.object(fault_rollup, "queue_group") as queue_group,
+        ):
+            hook(doc)
+        return queue_group
+
+    def test_status_change_recounts_its_group(self):
+        before = _Ticket(status="Open", custom_site="LOC-1")
+        doc = _Ticket(before=before, status="Resolved", custom_site="LOC-1")
+
+        refresh_group = self._run(fault_rollup.on_ticket_update, doc)
+
+        self.assertEqual(
+            {fault_rollup.rollup_name(*call.args) for call in refresh_group.call_args_list},
+            {fault_rollup.rollup_name(datetime.date(2026, 10, 3), fault_rollup.ticket_dimensions(doc))},
+        )
+
+    def test_site_change_recounts_old_and_new_group(self):
+        before = _Ticket(status="Open", custom_site="LOC-1")
+        doc = _Ticket(before=before, status="Open", custom_site="LOC-2")
+
+        refresh_group = self._run(fault_rollup.on_ticket_update, doc)
+
+        sites = [call.args[1]["site"] for call in refresh_group.call_args_list]
+        self.assertEqual(sorted(sites), ["LOC-1", "LOC-2"])
+
+    def test_untracked_change_and_insert_save_are_ignored(self):
+        before = _Ticket(status="Open", subject="old")
+        doc = _Ticket(before=before, status="Open", subject="new")
+        self._run(fault_rollup.on_ticket_update, doc).assert_not_called()
+
+        inserting = _Ticket(in_insert=True, status="Open")
+        self._run(fault_rollup.on_ticket_update, inserting).assert_not_called()
+
+    def test_days_before_the_rollup_are_left_alone(self):
+        doc = _Ticket(status="Open")
+
+        refresh_group = self._run(
+            fault_rollup.on_ticket_insert, doc, start=datetime.date(2026, 10, 4)
+        )
+
+        refresh_group.assert_not_called()
+
+
+class TestFaultRollupDeferredRefresh(unittest.TestCase):
+    def test_groups_are_deduplicated_and_recomputed_after_commit(self):
+        dims = fault_rollup.ticket_dimensions(_Ticket(custom_site="LOC-1"))
+
+        with (
+            mock.patch.object(fault_rollup, "frappe") as frappe_mock,
+            mock.patch.object(fault_rollup, "refresh_group") as refresh_group,
+        ):
+            frappe_mock.local = types.SimpleNamespace()
+            fault_rollup.queue_group(datetime.date(2026, 10, 3), dims)
+            fault_rollup.queue_group("2026-10-03", dict(dims))
+
+            frappe_mock.db.after_commit.add.assert_called_once_with(fault_rollup.flush_groups)
+            refresh_group.assert_not_called()
+            fault_rollup.flush_groups()
+
+        refresh_group.assert_called_once_with(datetime.date(2026, 10, 3), dims)
+        frappe_mock.db.commit.assert_called_once_with()
+
+    def test_rollback_discards_the_queue_and_the_next_write_registers_again(self):
+        dims = fault_rollup.ticket_dimensions(_Ticket(custom_site="LOC-1"))
+
+        with mock.patch.object(fault_rollup, "frappe") as frappe_mock:
+            frappe_mock.local = types.SimpleNamespace()
+            fault_rollup.queue_group("2026-10-03", dims)
+            frappe_mock.db.after_rollback.add.assert_called_once_with(fault_rollup.discard_groups)
+
+            fault_rollup.discard_groups()
+            fault_rollup.queue_group("2026-10-04", dims)
+
+        self.assertEqual(frappe_mock.db.after_commit.add.call_count, 2)
+
+    def test_refresh_upserts_instead_of_delete_and_insert(self):
+        with mock.patch.object(fault_rollup, "frappe") as frappe_mock:
+            frappe_mock.db.sql.side_effect = [[_row(3, "LOC-1", 2, "T-2")], None]
+            fault_rollup.refresh_group("2026-10-03", _row(3, "LOC-1", 2, "T-2"))
+
+        frappe_mock.db.delete.assert_not_called()
+        frappe_mock.db.bulk_insert.assert_not_called()
+        self.assertIn("on duplicate key update", frappe_mock.db.sql.call_args.args[0])
+
+
+class TestFaultRollupConsistency(unittest.TestCase):
+    def test_reports_days_with_missing_stale_and_extra_rows(self):
+        ok_row = _row(1, "LOC-1", 2, "T-2")
+        stale_row = _row(2, "LOC-1", 1, "T-3")
+        missing_row = _row(3, "LOC-1", 1, "T-4")
+        extra_row = _row(4, "LOC-9", 1, "T-9")
+
+        def stored(row, **changes):
+            name = fault_rollup.rollup_name(row["rollup_date"], row)
+            return _Record(row, name=name, **changes)
+
+        with (
+            mock.patch.object(
+                fault_rollup,
+                "aggregate_tickets",
+                return_value=[ok_row, stale_row, missing_row],
+            ),
+            mock.patch.object(fault_rollup, "frappe") as frappe_mock,
+        ):
+            frappe_mock.get_all.return_value = [
+                stored(ok_row),
+                stored(stale_row, open_count=1),
+                stored(extra_row),
+            ]
+            result = fault_rollup.check_consistency("2026-10-01", "2026-10-04")
+
+        self.assertFalse(result["ok"])
+        self.assertEqual((result["missing"], result["stale"], result["extra"]), (1, 1, 1))
+        self.assertEqual(
+            result["mismatched_days"],
+            [datetime.date(2026, 10, d) for d in (2, 3, 4)],
+        )
+
+    def test_reconcile_also_checks_older_days_with_modified_tickets(self):
+        recent = {
+            "ok": True, "from_date": datetime.date(2026, 9, 17), "to_date": datetime.date(2026, 10, 17),
+            "rows": 4, "missing": 0, "stale": 0, "extra": 0, "mismatched_days": [],
+        }
+        older = dict(recent, ok=False, rows=1, stale=1, mismatched_days=[datetime.date(2026, 5, 2)])
+
+        with (
+            mock.patch.object(fault_rollup, "frappe") as frappe_mock,
+            mock.patch.object(fault_rollup, "built_from", return_value=datetime.date(2026, 1, 1)),
+            mock.patch.object(fault_rollup, "check_consistency", side_effect=[recent, older]) as check,
+            mock.patch.object(
+                fault_rollup,
+                "changed_days",
+                return_value=[datetime.date(2026, 5, 2), datetime.date(2026, 10, 16)],
+            ),
+            mock.patch.object(fault_rollup, "rebuild") as rebuild,
+        ):
+            frappe_mock.db.get_global.return_value = "2026-10-16 02:00:00"
+            result = fault_rollup.reconcile_recent()
+
+        check.assert_called_with(datetime.date(2026, 5, 2), datetime.date(2026, 5, 2))
+        rebuild.assert_called_once_with(datetime.date(2026, 5, 2), datetime.date(2026, 5, 2), commit=False)
+        self.assertFalse(result["ok"])
+        self.assertEqual((result["stale"], result["older_days_checked"]), (1, 1))
+        frappe_mock.db.set_global.assert_called_once_with(fault_rollup.RECONCILED_AT_KEY, mock.ANY)
+
+
+class TestRepeatFaultsFromRollup(unittest.TestCase):
+    def test_days_merge_into_location_groups(self):
+        rollup_rows = [
+            _row(1, "LOC-1", 2, "T-1", severity="Sev1", open_count=1),
+            _row(5, "LOC-1", 1, "T-5", severity="Sev2"),
+            _row(3, "LOC-2", 1, "T-3"),
+        ]
+        labels = {
+            "Customer": {"CUST-1": "Acme"},
+            "Location": {"": "-", "CAMPUS-1": "Main Campus", "LOC-1": "Block A", "LOC-2": "Block B"},
+        }
+        latest = {
+            "T-5": {"name": "T-5", "subject": "No tone", "status": "Resolved", "owner": "a@x", "_assign": '["b@x"]'},
+        }
+
+        with (
+            mock.patch.object(repeat_faults, "get_display_labels", return_value=labels),
+            mock.patch.object(repeat_faults, "get_latest_tickets", return_value=latest) as latest_tickets,
+        ):
+            rows = repeat_faults.build_rows(rollup_rows, minimum_repeat_count=2)
+
+        latest_tickets.assert_called_once_with(["T-5"])
+        self.assertEqual(len(rows), 1)
+        row = rows[0]
+        self.assertEqual(
+            (row["customer"], row["campus"], row["site"], row["fault_point"]),
+            ("Acme", "Main Campus", "Block A", "-"),
+        )
+        self.assertEqual(row["fault_count"], 3)
+        self.assertEqual(row["open_count"], 1)
+        self.assertEqual(row["resolved_count"], 2)
+        self.assertEqual((row["sev1_count"], row["sev2_count"]), (2, 1))
+        self.assertEqual(row["first_ticket_date"], datetime.datetime(2026, 10, 1, 8, 0))
+        self.assertEqual(row["last_ticket_date"], datetime.datetime(2026, 10, 5, 17, 0))
+        self.assertEqual(row["latest_ticket"], "T-5")
+        self.assertEqual(row["latest_status"], "Resolved")
+        self.assertEqual(row["latest_owner"], "b@x")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+from unittest import mock
+
+from helpdesk.overrides import imap_pool
+
+
+class _Account(dict):
+    __getattr__ = dict.get
+
+    def __init__(self, **kw):
+        super().__init__(**kw)
+        self.servers = []
+
+    def get_incoming_server(self, in_receive=False, email_sync_rule=None):
+        server = mock.Mock()
+        server.settings = {"email_sync_rule": email_sync_rule}
+        server.imap.noop.return_value = ("OK", [b"NOOP completed"])
+        self.servers.append(server)
+        return server
+
+
+class TestImapPool(unittest.TestCase):
+    def setUp(self):
+        imap_pool._SESSIONS.clear()
+        patcher = mock.patch.object(imap_pool, "frappe")
+        self.frappe_mock = patcher.start()
+        self.frappe_mock.local.site = "frontend"
+        self.frappe_mock.safe_decode.side_effect = lambda v: v.decode()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(imap_pool._SESSIONS.clear)
+
+    def test_reuses_live_session_and_refreshes_sync_rule(self):
+        account = _Account(name="Faults", modified="2026-10-01")
+
+        first = imap_pool.acquire(account, "UNSEEN")
+        imap_pool.release(account)
+        second = imap_pool.acquire(account, "UID 10:*")
+
+        self.assertIs(first, second)
+        self.assertEqual(len(account.servers), 1)
+        self.assertEqual(second.settings["email_sync_rule"], "UID 10:*")
+        first.logout.assert_not_called()
+
+    def test_reconnects_when_noop_fails(self):
+        account = _Account(name="Faults", modified="2026-10-01")
+
+        first = imap_pool.acquire(account, "UNSEEN")
+        first.imap.noop.side_effect = OSError("connection reset")
+
+        with mock.patch.object(imap_pool, "NOOP_AFTER_SECONDS", -1):
+            second = imap_pool.acquire(account, "UNSEEN")
+
+        self.assertIsNot(first, second)
+        first.logout.assert_called_once_with()
+
+    def test_reconnects_when_account_changes(self):
+        account = _Account(name="Faults", modified="2026-10-01")
+        first = imap_pool.acquire(account, "UNSEEN")
+
+        account["modified"] = "2026-10-02"
+        second = imap_pool.acquire(account, "UNSEEN")
+
+        self.assertIsNot(first, second)
+
+    def test_uidvalidity_change_is_detected(self):
+        account = _Account(name="Faults", modified="2026-10-01")
+        server = imap_pool.acquire(account, "UNSEEN")
+
+        server.imap.response.return_value = ("UIDVALIDITY", [b"100"])
+        self.assertFalse(imap_pool.check_uidvalidity(account, "INBOX", server))
+
+        server.imap.response.return_value = ("UIDVALIDITY", [b"100"])
+        self.assertFalse(imap_pool.check_uidvalidity(account, "INBOX", server))
+
+        server.imap.response.return_value = ("UIDVALIDITY", [b"200"])
+        self.assertTrue(imap_pool.check_uidvalidity(account, "INBOX", server))
+
+
+if __name__ == "__main__":
+    unittest.main()
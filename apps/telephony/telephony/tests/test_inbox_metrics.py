@@ -0,0 +1,51 @@
+import unittest
+from unittest import mock
+
+from telephony import inbox_metrics
+
+
+class TestInboxMetrics(unittest.TestCase):
+    def test_histogram_percentiles_and_buckets(self):
+        samples = [0.2, 0.04, 3.0, 0.6, 12.0]
+
+        hist = inbox_metrics._histogram(samples)
+
+        self.assertEqual(hist["count"], 5)
+        self.assertEqual(hist["last"], 0.2)
+        self.assertEqual(hist["p50"], 0.6)
+        self.assertEqual(hist["p95"], 12.0)
+        self.assertEqual(hist["max"], 12.0)
+        self.assertEqual(hist["buckets"]["<=0.05"], 1)
+        self.assertEqual(hist["buckets"]["<=1"], 3)
+        self.assertEqual(hist["buckets"]["+inf"], 5)
+
+    def test_record_run_uses_one_pipeline_and_skips_missing_stages(self):
+        with mock.patch.object(inbox_metrics, "frappe") as frappe_mock:
+            cache = frappe_mock.cache.return_value
+            cache.make_key.side_effect = lambda k: k
+            pipe = cache.pipeline.return_value
+
+            inbox_metrics.record_run("Faults", {"fetch": 0.5, "process": 1.25}, mails=3)
+
+        cache.pipeline.assert_called_once_with()
+        pushed = [c.args[0] for c in pipe.lpush.call_args_list]
+        self.assertEqual(
+            pushed,
+            [
+                f"{inbox_metrics.BASE}:latency:Faults:fetch",
+                f"{inbox_metrics.BASE}:latency:Faults:process",
+            ],
+        )
+        pipe.incrby.assert_called_once()
+        self.assertEqual(pipe.incrby.call_args.args[1], 3)
+        pipe.execute.assert_called_once_with()
+
+    def test_record_run_never_raises(self):
+        with mock.patch.object(inbox_metrics, "frappe") as frappe_mock:
+            frappe_mock.cache.side_effect = ConnectionError("redis down")
+
+            inbox_metrics.record_run("Faults", {"fetch": 0.5}, mails=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
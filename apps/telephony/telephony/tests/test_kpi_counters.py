@@ -0,0 +1,120 @@
+import types
+import unittest
+from unittest import mock
+
+from telephony import kpi_counters, ops_kpis
+
+
+class _Row(dict):
+    __getattr__ = dict.get
+
+
+def _bits(*counters):
+    return sum(1 << kpi_counters.COUNTERS.index(c) for c in counters)
+
+
+def _frappe_mock(frappe_mock, enabled=True):
+    frappe_mock.conf.get.return_value = 1 if enabled else None
+    frappe_mock.local = types.SimpleNamespace()
+    cache = frappe_mock.cache.return_value
+    cache.make_key.side_effect = lambda key: f"site|{key}"
+    return cache
+
+
+class TestTicketMask(unittest.TestCase):
+    def test_mask_follows_card_definitions(self):
+        cases = [
+            ({"status": "Open", "_assign": "[]"}, _bits("total_active", "unclaimed_now")),
+            ({"status": "Replied", "_assign": '["a@x"]'}, _bits("total_active")),
+            (
+                {"status": "Open", "_assign": '["p@x"]', "custom_fulfilment_party": "Partner"},
+                _bits("total_active", "partner_queue", "assigned_to_partner"),
+            ),
+            (
+                {"status": "Paused", "custom_fulfilment_party": "Partner", "custom_request_source": "Partner"},
+                _bits("assigned_to_partner", "submitted_by_partner"),
+            ),
+            ({"status": "Resolved", "custom_fulfilment_party": "Partner"}, 0),
+        ]
+        for ticket, mask in cases:
+            with self.subTest(ticket=ticket):
+                self.assertEqual(kpi_counters.ticket_mask(ticket), mask)
+
+
+class TestDeltas(unittest.TestCase):
+    def test_states_become_mask_swaps(self):
+        with mock.patch.object(kpi_counters, "frappe") as frappe_mock:
+            cache = _frappe_mock(frappe_mock)
+            kpi_counters.apply_states(
+                {"T-1": _Row(name="T-1", status="Open", _assign=""), "T-2": None}
+            )
+
+        pipe = cache.pipeline.return_value
+        applied = {call.args[-2]: call.args[-1] for call in pipe.eval.call_args_list}
+        self.assertEqual(applied, {"T-1": _bits("total_active", "unclaimed_now"), "T-2": 0})
+        keys = pipe.eval.call_args.args[2 : 2 + pipe.eval.call_args.args[1]]
+        self.assertEqual(keys[0], f"site|{kpi_counters.MEMBERSHIP_KEY}")
+        pipe.execute.assert_called_once()
+
+    def test_disabled_counters_do_nothing(self):
+        with mock.patch.object(kpi_counters, "frappe") as frappe_mock:
+            cache = _frappe_mock(frappe_mock, enabled=False)
+            kpi_counters.apply_states({"T-1": _Row(name="T-1", status="Open")})
+
+            self.assertIsNone(kpi_counters.get_count("total_active"))
+
+        cache.pipeline.assert_not_called()
+
+
+class TestReconcile(unittest.TestCase):
+    def test_rewrites_counters_and_reports_drift(self):
+        with mock.patch.object(kpi_counters, "frappe") as frappe_mock:
+            cache = _frappe_mock(frappe_mock)
+            frappe_mock.db.sql.return_value = [
+                _Row(name="T-1", status="Open", _assign=""),
+                _Row(name="T-2", status="Paused", custom_request_source="Partner"),
+            ]
+            cache.mget.return_value = [b"3", b"1", None, None, b"1"]
+
+            result = kpi_counters.reconcile()
+
+        self.assertEqual(result["counts"]["total_active"], 1)
+        self.assertEqual(result["drift"], {"total_active": 2})
+        pipe = cache.pipeline.return_value
+        pipe.hset.assert_called_once_with(
+            f"site|{kpi_counters.MEMBERSHIP_KEY}",
+            mapping={
+                "T-1": _bits("total_active", "unclaimed_now"),
+                "T-2": _bits("submitted_by_partner"),
+            },
+        )
+        pipe.set.assert_any_call(f"site|{kpi_counters.SEEDED_KEY}", 1)
+        pipe.execute.assert_called_once()
+
+
+class TestCardsReadCounters(unittest.TestCase):
+    def test_seeded_counter_skips_the_snapshot(self):
+        with (
+            mock.patch.object(kpi_counters, "frappe") as frappe_mock,
+            mock.patch.object(ops_kpis, "get_kpi_snapshot") as snapshot,
+        ):
+            cache = _frappe_mock(frappe_mock)
+            cache.mget.return_value = [b"1", b"4"]
+
+            self.assertEqual(ops_kpis.partner_queue_now()["value"], 4)
+
+        snapshot.assert_not_called()
+
+    def test_unseeded_counter_falls_back_to_the_snapshot(self):
+        with (
+            mock.patch.object(kpi_counters, "frappe") as frappe_mock,
+            mock.patch.object(ops_kpis, "get_kpi_snapshot", return_value={"partner_queue": 2}),
+        ):
+            cache = _frappe_mock(frappe_mock)
+            cache.mget.return_value = [None, b"4"]
+
+            self.assertEqual(ops_kpis.partner_queue_now()["value"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
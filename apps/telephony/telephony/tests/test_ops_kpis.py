@@ -0,0 +1,112 @@
+import unittest
+from unittest import mock
+
+from telephony import ops_kpis, partner_kpis
+
+
+def _frappe_mock(frappe_mock, cached=None, ttl=None):
+    store = {ops_kpis.SNAPSHOT_KEY: cached} if cached else {}
+    frappe_mock.conf.get.return_value = ttl
+    frappe_mock.cache.return_value.get_value.side_effect = store.get
+    frappe_mock.cache.return_value.set_value.side_effect = (
+        lambda key, value, expires_in_sec=None: store.__setitem__(key, value)
+    )
+    frappe_mock.db.sql.return_value = [
+        {
+            "total_active": 7,
+            "unclaimed_now": 3,
+            "unclaimed_over_60m": 2,
+            "unclaimed_over_4h": None,
+            "partner_queue": 1,
+            "assigned_to_partner": 2,
+            "submitted_by_partner": 4,
+        }
+    ]
+    return frappe_mock
+
+
+class TestKpiSnapshot(unittest.TestCase):
+    def setUp(self):
+        # Live counters and the unclaimed pool are covered in their own tests.
+        for target, name in (
+            (ops_kpis.kpi_counters, "get_count"),
+            (ops_kpis.unclaimed_pool, "count_over"),
+        ):
+            patcher = mock.patch.object(target, name, return_value=None)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_every_card_reads_one_query(self):
+        with mock.patch.object(ops_kpis, "frappe") as frappe_mock:
+            _frappe_mock(frappe_mock)
+            cards = [
+                ops_kpis.unassigned_now()["value"],
+                ops_kpis.unassigned_over_60m()["value"],
+                ops_kpis.unassigned_over_4h()["value"],
+                ops_kpis.total_active_now()["value"],
+                ops_kpis.partner_queue_now()["value"],
+            ]
+
+        self.assertEqual(cards, [3, 2, 0, 7, 1])
+        frappe_mock.db.sql.assert_called_once()
+        sql = frappe_mock.db.sql.call_args.args[0]
+        self.assertIn("modified <= NOW() - INTERVAL 60 MINUTE", sql)
+        self.assertNotIn("TIMESTAMPDIFF", sql)
+        frappe_mock.cache.return_value.set_value.assert_called_once_with(
+            ops_kpis.SNAPSHOT_KEY,
+            mock.ANY,
+            expires_in_sec=ops_kpis.SNAPSHOT_TTL_SECONDS,
+        )
+
+    def test_cached_snapshot_skips_the_query(self):
+        cached = {"assigned_to_partner": 5, "submitted_by_partner": 6}
+
+        with mock.patch.object(ops_kpis, "frappe") as frappe_mock:
+            _frappe_mock(frappe_mock, cached=cached)
+            values = (partner_kpis.assigned_to_partner_now(), partner_kpis.submitted_by_partner_now())
+
+        self.assertEqual(values, (5, 6))
+        frappe_mock.db.sql.assert_not_called()
+
+    def test_zero_ttl_turns_the_cache_off(self):
+        with mock.patch.object(ops_kpis, "frappe") as frappe_mock:
+            _frappe_mock(frappe_mock, cached={"total_active": 99}, ttl=0)
+            value = ops_kpis.total_active_now()["value"]
+
+        self.assertEqual(value, 7)
+        frappe_mock.cache.return_value.get_value.assert_not_called()
+        frappe_mock.cache.return_value.set_value.assert_not_called()
+
+
+class TestKpiInvalidation(unittest.TestCase):
+    def _invalidate(self, doc, method="on_change"):
+        with mock.patch.object(ops_kpis, "frappe") as frappe_mock:
+            ops_kpis.invalidate(doc, method)
+        return frappe_mock.cache.return_value.delete_value
+
+    def _ticket(self, changed=()):
+        doc = mock.Mock()
+        doc.get.side_effect = {"doctype": "HD Ticket"}.get
+        doc.has_value_changed.side_effect = lambda field: field in changed
+        return doc
+
+    def test_counted_ticket_field_drops_the_snapshot(self):
+        self._invalidate(self._ticket(changed={"_assign"})).assert_called_once_with(
+            ops_kpis.SNAPSHOT_KEY
+        )
+
+    def test_uncounted_ticket_edit_keeps_the_snapshot(self):
+        self._invalidate(self._ticket(changed={"subject"})).assert_not_called()
+
+    def test_ticket_trash_and_ticket_todos_drop_the_snapshot(self):
+        self._invalidate(self._ticket(), method="on_trash").assert_called_once()
+
+        todo = {"doctype": "ToDo", "reference_type": "HD Ticket"}
+        self._invalidate(todo).assert_called_once()
+
+        other_todo = {"doctype": "ToDo", "reference_type": "Lead"}
+        self._invalidate(other_todo).assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
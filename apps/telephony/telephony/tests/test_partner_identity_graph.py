@@ -0,0 +1,145 @@
+import time
+import types
+import unittest
+from unittest import mock
+
+from telephony import partner_identity
+
+
+class _Row(dict):
+    __getattr__ = dict.get
+
+
+class _Throw(Exception):
+    pass
+
+
+def _get_all(doctype, **kwargs):
+    if doctype == "TELECTRO Partner":
+        return [
+            _Row(name="Acme", enabled=1, default_dispatch_user="d@acme"),
+            _Row(name="Beta", enabled=0, default_dispatch_user="d@beta"),
+            _Row(name="Gamma", enabled=1, default_dispatch_user="outsider@x"),
+        ]
+    if doctype == "TELECTRO Partner Member":
+        return [
+            _Row(parent="Acme", user="d@acme"),
+            _Row(parent="Acme", user="u@x"),
+            _Row(parent="Beta", user="u@x"),
+            _Row(parent="Beta", user="d@beta"),
+        ]
+    if doctype == "Has Role":
+        return ["d@acme"]
+    if doctype == "User":
+        return [_Row(name="d@acme", enabled=1), _Row(name="outsider@x", enabled=1)]
+    return []
+
+
+def _frappe_mock(frappe_mock, gen="g1", cached=None):
+    frappe_mock.local = types.SimpleNamespace(site="site1")
+    frappe_mock.ValidationError = _Throw
+    frappe_mock.bold.side_effect = lambda value: value
+    frappe_mock.throw.side_effect = lambda message, exc=None: (_ for _ in ()).throw(_Throw(message))
+    frappe_mock.get_all.side_effect = _get_all
+    cache = frappe_mock.cache.return_value
+    cache.get_value.side_effect = lambda key: gen if key == partner_identity.GEN_KEY else cached
+    return cache
+
+
+class TestPartnerGraph(unittest.TestCase):
+    def setUp(self):
+        partner_identity._GRAPHS.clear()
+        self.addCleanup(partner_identity._GRAPHS.clear)
+
+    def test_helpers_are_lookups_on_one_graph(self):
+        with mock.patch.object(partner_identity, "frappe") as frappe_mock:
+            cache = _frappe_mock(frappe_mock)
+
+            self.assertEqual(partner_identity.get_enabled_partner_names_for_user("u@x"), ["Acme"])
+            self.assertTrue(partner_identity.is_enabled_partner_member("d@acme", "Acme"))
+            self.assertEqual(partner_identity.resolve_partner_dispatch_user("Acme"), "d@acme")
+            queries = frappe_mock.get_all.call_count
+
+            frappe_mock.local = types.SimpleNamespace(site="site1")
+            partner_identity.resolve_partner_dispatch_user("Acme")
+
+        self.assertEqual(queries, 4)
+        self.assertEqual(frappe_mock.get_all.call_count, 4)
+        cache.set_value.assert_called_once_with(
+            f"{partner_identity.GRAPH_KEY_PREFIX}g1",
+            mock.ANY,
+            expires_in_sec=partner_identity.MAX_AGE_SECONDS,
+        )
+
+    def test_dispatch_errors_keep_their_messages(self):
+        cases = [
+            ("", "Partner organisation is required for Partner dispatch."),
+            ("Nope", "Partner organisation Nope does not exist."),
+            ("Beta", "Partner organisation Beta is disabled."),
+            ("Gamma", "Default Dispatch User outsider@x is not an enabled member of Gamma."),
+        ]
+        with mock.patch.object(partner_identity, "frappe") as frappe_mock:
+            _frappe_mock(frappe_mock)
+            for partner_name, message in cases:
+                with self.subTest(partner_name=partner_name):
+                    with self.assertRaises(_Throw) as raised:
+                        partner_identity.resolve_partner_dispatch_user(partner_name)
+                    self.assertEqual(str(raised.exception), message)
+
+    def test_redis_graph_is_shared_across_workers(self):
+        graph = {
+            "partners": {"Acme": {"enabled": 1, "default_dispatch_user": "d@acme"}},
+            "members": {"Acme": {"d@acme"}},
+            "user_partners": {"d@acme": ["Acme"]},
+            "dispatch_users": {"d@acme": {"enabled": 1, "partner_role": True}},
+        }
+        with mock.patch.object(partner_identity, "frappe") as frappe_mock:
+            _frappe_mock(frappe_mock, cached={"built_at": time.time(), "graph": graph})
+
+            self.assertEqual(partner_identity.resolve_partner_dispatch_user("Acme"), "d@acme")
+
+        frappe_mock.get_all.assert_not_called()
+
+    def test_graphs_older_than_max_age_are_rebuilt_from_the_database(self):
+        stale = {"built_at": 1000.0 - partner_identity.MAX_AGE_SECONDS, "graph": {}}
+        with (
+            mock.patch.object(partner_identity, "frappe") as frappe_mock,
+            mock.patch.object(partner_identity.time, "time", return_value=1000.0) as clock,
+        ):
+            _frappe_mock(frappe_mock, cached=stale)
+
+            # the Redis copy is too old: rebuild instead of reusing it
+            self.assertEqual(partner_identity.get_enabled_partner_names_for_user("u@x"), ["Acme"])
+            self.assertEqual(frappe_mock.get_all.call_count, 4)
+
+            # the process copy expires the same way, even though the token never moved
+            clock.return_value = 1000.0 + partner_identity.MAX_AGE_SECONDS
+            frappe_mock.local = types.SimpleNamespace(site="site1")
+            partner_identity.get_enabled_partner_names_for_user("u@x")
+
+        self.assertEqual(frappe_mock.get_all.call_count, 8)
+
+    def test_invalidation_skips_users_outside_the_graph(self):
+        with mock.patch.object(partner_identity, "frappe") as frappe_mock:
+            cache = _frappe_mock(frappe_mock)
+            frappe_mock.generate_hash.return_value = "g2"
+
+            partner_identity.invalidate_partner_graph(_Row(doctype="User", name="someone@x"))
+            cache.set_value.reset_mock()
+            self.assertIn("site1", partner_identity._GRAPHS)
+
+            partner_identity.invalidate_partner_graph(_Row(doctype="User", name="d@acme"))
+            self.assertNotIn("site1", partner_identity._GRAPHS)
+            self.assertFalse(hasattr(frappe_mock.local, partner_identity._LOCAL_ATTR))
+
+            # the token moves only once the write commits (or rolls back)
+            cache.set_value.assert_not_called()
+            bump = frappe_mock.db.after_commit.add.call_args.args[0]
+            frappe_mock.db.after_rollback.add.assert_called_once_with(bump)
+            bump()
+
+        cache.set_value.assert_called_once_with(partner_identity.GEN_KEY, "g2")
+
+
+if __name__ == "__main__":
+    unittest.main()
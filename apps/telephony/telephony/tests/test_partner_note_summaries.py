@@ -0,0 +1,195 @@
+import unittest
+from datetime import datetime
+from unittest import mock
+
+from telephony import display_names
+from telephony import partner_create
+from telephony import partner_notes
+from telephony.ftelephony.report.partner_workflow_war_room import (
+    partner_workflow_war_room as war_room,
+)
+
+
+class _Row(dict):
+    __getattr__ = dict.get
+
+
+class _Comment(_Row):
+    def __init__(self, in_insert=True, **kw):
+        super().__init__(reference_doctype="HD Ticket", comment_type="Comment", **kw)
+        self.flags = _Row(in_insert=in_insert)
+
+
+class TestPartnerNoteSummaries(unittest.TestCase):
+    def test_summaries_come_from_the_store_in_one_query(self):
+        rows = [
+            _Row(ticket="T-1", note_kind="acceptance", note_text="Partner acceptance note by a@x: newer"),
+            _Row(ticket="T-1", note_kind="review", note_text="Partner Acceptance Review | Outcome: Accepted"),
+            _Row(ticket="T-2", note_kind="work_done", note_text="Partner work done note by b@x & crew"),
+        ]
+
+        with mock.patch.object(partner_notes, "frappe") as frappe_mock:
+            frappe_mock.get_all.return_value = rows
+
+            summaries = partner_create.get_partner_note_summaries(["T-2", "T-1", "T-3", "T-1"])
+
+        frappe_mock.get_all.assert_called_once()
+        frappe_mock.db.sql.assert_not_called()
+        self.assertEqual(
+            frappe_mock.get_all.call_args.kwargs["filters"],
+            {"ticket": ["in", ["T-1", "T-2", "T-3"]]},
+        )
+
+        self.assertEqual(
+            summaries["T-1"]["latest_partner_acceptance_note"],
+            "Partner acceptance note by a@x: newer",
+        )
+        self.assertEqual(
+            summaries["T-1"]["latest_partner_review_note"],
+            "Partner Acceptance Review | Outcome: Accepted",
+        )
+        self.assertEqual(summaries["T-2"]["latest_partner_work_done_note"], "Partner work done note by b@x & crew")
+        self.assertEqual(set(summaries["T-3"].values()), {""})
+        self.assertEqual(len(summaries["T-3"]), len(partner_notes.NOTE_KINDS))
+
+    def test_new_note_comment_upserts_its_kind(self):
+        comment = _Comment(
+            name="C-1",
+            reference_name="T-1",
+            content="<p>Partner work done note by b@x:<br>fixed &amp; tested</p>",
+            creation="2026-10-16 09:00:00",
+        )
+
+        with mock.patch.object(partner_notes, "frappe") as frappe_mock:
+            frappe_mock.db.exists.return_value = "TPN-T-1-work_done"
+
+            partner_notes.on_comment_update(comment)
+
+        frappe_mock.db.set_value.assert_called_once_with(
+            partner_notes.DOCTYPE,
+            "TPN-T-1-work_done",
+            {
+                "note_text": "Partner work done note by b@x:fixed & tested",
+                "comment": "C-1",
+                "noted_on": "2026-10-16 09:00:00",
+            },
+        )
+        frappe_mock.get_doc.assert_not_called()
+
+    def test_concurrent_insert_falls_back_to_update(self):
+        class DuplicateEntryError(Exception):
+            pass
+
+        with mock.patch.object(partner_notes, "frappe") as frappe_mock:
+            frappe_mock.DuplicateEntryError = DuplicateEntryError
+            frappe_mock.db.exists.return_value = None
+            frappe_mock.get_doc.return_value.insert.side_effect = DuplicateEntryError
+
+            name = partner_notes.upsert_note("T-1", "review", "Partner Work Review | Outcome: ok")
+
+        self.assertEqual(name, "TPN-T-1-review")
+        frappe_mock.db.set_value.assert_called_once_with(
+            partner_notes.DOCTYPE,
+            "TPN-T-1-review",
+            {"note_text": "Partner Work Review | Outcome: ok", "comment": None, "noted_on": None},
+        )
+
+    def test_plain_comment_is_ignored(self):
+        comment = _Comment(name="C-2", reference_name="T-1", content="<p>Called the site</p>")
+
+        with mock.patch.object(partner_notes, "frappe") as frappe_mock:
+            partner_notes.on_comment_update(comment)
+
+        frappe_mock.db.exists.assert_not_called()
+        frappe_mock.get_doc.assert_not_called()
+
+    def test_rebuild_keeps_latest_per_kind_and_drops_stale_rows(self):
+        comments = [
+            _Row(name="C-1", reference_name="T-1", content="Partner acceptance note by a@x: older", creation=1),
+            _Row(name="C-2", reference_name="T-1", content="<p>Called the site</p>", creation=2),
+            _Row(name="C-3", reference_name="T-1", content="Partner acceptance note by a@x: newer", creation=3),
+        ]
+
+        with (
+            mock.patch.object(partner_notes, "frappe") as frappe_mock,
+            mock.patch.object(partner_notes, "upsert_note") as upsert,
+        ):
+            frappe_mock.db.sql.return_value = comments
+            frappe_mock.get_all.return_value = ["TPN-T-1-acceptance", "TPN-T-1-review"]
+
+            written = partner_notes.rebuild_tickets(["T-1"], exclude_comment="C-9")
+
+        self.assertEqual(written, 1)
+        self.assertEqual(frappe_mock.db.sql.call_args.args[1]["exclude"], "C-9")
+        upsert.assert_called_once_with(
+            "T-1", "acceptance", "Partner acceptance note by a@x: newer", comment="C-3", noted_on=3
+        )
+        frappe_mock.db.delete.assert_called_once_with(partner_notes.DOCTYPE, {"name": "TPN-T-1-review"})
+
+
+class TestDisplayNames(unittest.TestCase):
+    def test_batched_labels_follow_display_precedence(self):
+        with mock.patch.object(display_names, "frappe") as frappe_mock:
+            meta = frappe_mock.get_meta.return_value
+            meta.has_field.return_value = True
+            meta.title_field = "location_title"
+            frappe_mock.get_all.return_value = [
+                _Row(name="LOC-1", location_name="Hall A", location_title="Title A"),
+                _Row(name="LOC-2", location_name="", location_title="Title B"),
+                _Row(name="LOC-3", location_name="", location_title=""),
+            ]
+
+            labels = display_names.get_display_names(
+                "Location",
+                ["LOC-1", "LOC-2", "LOC-3", "GONE", "", None],
+                ["location_name"],
+            )
+
+        frappe_mock.get_all.assert_called_once()
+        self.assertEqual(
+            labels,
+            {"": "-", "LOC-1": "Hall A", "LOC-2": "Title B", "LOC-3": "LOC-3", "GONE": "GONE"},
+        )
+
+
+class TestWarRoomQueryCount(unittest.TestCase):
+    def test_query_count_does_not_grow_with_rows(self):
+        tickets = [
+            _Row(
+                name=f"T-{i}",
+                custom_request_source="Partner",
+                custom_fulfilment_party="Telectro",
+                custom_partner_acceptance_state="",
+                custom_partner_work_state="",
+                custom_customer="CUST",
+                custom_site_group="Campus",
+                custom_site=f"Site {i}",
+                _assign="[]",
+                modified=datetime(2026, 10, 1, 8, i),
+            )
+            for i in range(25)
+        ]
+
+        with (
+            mock.patch.object(war_room, "get_active_tickets") as active_tickets,
+            mock.patch.object(war_room, "get_partner_note_summaries", return_value={}) as summaries,
+            mock.patch.object(war_room, "resolve_assignees", return_value={"T-0": ["a@x"]}) as assignees,
+            mock.patch.object(war_room, "get_display_names", side_effect=lambda dt, names, f: {
+                (n or "").strip(): n or "-" for n in names
+            }) as display,
+        ):
+            active_tickets.side_effect = lambda predicate: [t for t in tickets if predicate(t)]
+
+            data = war_room.get_data()
+
+        self.assertEqual(len(data), 25)
+        active_tickets.assert_called_once()
+        summaries.assert_called_once()
+        assignees.assert_called_once()
+        self.assertEqual(display.call_count, 2)
+        self.assertEqual({row["assigned_to"] for row in data}, {"a@x", "-"})
+        self.assertEqual(data[0]["action_bucket"], "New Ticket from Partner")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import types
+import unittest
+from unittest import mock
+
+from telephony import permissions
+
+
+def _frappe_mock(frappe_mock, roles, cached=None, version=b"3"):
+    frappe_mock.local = types.SimpleNamespace()
+    frappe_mock.session.user = "someone@x"
+    frappe_mock.get_roles.side_effect = lambda user: list(roles)
+    frappe_mock.db.escape.side_effect = lambda value: f"'{value}'"
+    cache = frappe_mock.cache.return_value
+    cache.make_key.side_effect = lambda key: f"site|{key}"
+    cache.get.return_value = version
+    cache.get_value.return_value = cached
+    return cache
+
+
+class TestPermissionContext(unittest.TestCase):
+    def test_customer_context_compiles_once_per_request(self):
+        with (
+            mock.patch.object(permissions, "frappe") as frappe_mock,
+            mock.patch.object(
+                permissions, "get_customer_names_for_user", return_value=["ACME"]
+            ) as customers,
+        ):
+            cache = _frappe_mock(frappe_mock, roles=["Customer"])
+
+            first = permissions.hd_ticket_query_conditions("c@x")
+            second = permissions.hd_ticket_query_conditions("c@x")
+            self.assertTrue(permissions._is_customer_portal_user("c@x"))
+            self.assertFalse(permissions._is_partner_user("c@x"))
+
+        self.assertEqual(first, second)
+        self.assertIn("`tabHD Ticket`.`customer` IN ('ACME')", first)
+        frappe_mock.get_roles.assert_called_once_with("c@x")
+        customers.assert_called_once_with("c@x")
+        cache.set_value.assert_called_once_with(
+            f"{permissions.CONTEXT_KEY_PREFIX}:v3:c@x",
+            mock.ANY,
+            expires_in_sec=permissions.CONTEXT_TTL_SECONDS,
+        )
+
+    def test_redis_context_is_shared_across_requests(self):
+        cached = {
+            "user": "p@x",
+            "roles": ["TELECTRO-POC Role - Partner"],
+            "role_class": "partner",
+            "partner_orgs": ["Partner A"],
+            "customer_orgs": [],
+            "hd_ticket_condition": "`tabHD Ticket`.`owner` = 'p@x'",
+        }
+
+        with mock.patch.object(permissions, "frappe") as frappe_mock:
+            _frappe_mock(frappe_mock, roles=[], cached=cached)
+
+            condition = permissions.hd_ticket_query_conditions("p@x")
+            report_condition = permissions.get_partner_ticket_report_condition("p@x", side="request")
+
+        self.assertEqual(condition, cached["hd_ticket_condition"])
+        self.assertIn("t.custom_request_partner in ('Partner A')", report_condition)
+        frappe_mock.get_roles.assert_not_called()
+
+    def test_role_classes_match_the_previous_precedence(self):
+        cases = [
+            ("Administrator", [], ""),
+            ("ops@x", ["TELECTRO-POC Role - Coordinator Ops", "Customer"], ""),
+            ("p@x", ["TELECTRO-POC Role - Partner", "Customer"], "`tabHD Ticket`.`owner` = 'p@x'"),
+            ("Guest", ["Guest", "Customer"], ""),
+            ("tech@x", ["TELECTRO-POC Role - Tech"], ""),
+        ]
+        for user, roles, expected in cases:
+            with self.subTest(user=user):
+                with (
+                    mock.patch.object(permissions, "frappe") as frappe_mock,
+                    mock.patch.object(permissions, "get_enabled_partner_names_for_user", return_value=[]),
+                ):
+                    _frappe_mock(frappe_mock, roles=roles)
+                    self.assertEqual(permissions.hd_ticket_query_conditions(user), expected)
+
+    def test_invalidation_drops_the_memo_now_and_bumps_the_version_after_commit(self):
+        with mock.patch.object(permissions, "frappe") as frappe_mock:
+            cache = _frappe_mock(frappe_mock, roles=[])
+            frappe_mock.local.telectro_permission_contexts = {"x@x": {}}
+
+            permissions.invalidate_permission_contexts()
+
+            self.assertFalse(hasattr(frappe_mock.local, "telectro_permission_contexts"))
+            cache.incr.assert_not_called()
+            bump = frappe_mock.db.after_commit.add.call_args.args[0]
+            frappe_mock.db.after_rollback.add.assert_called_once_with(bump)
+            bump()
+
+        cache.incr.assert_called_once_with(f"site|{permissions.CONTEXT_VERSION_KEY}")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,322 @@
+import unittest
+from unittest import mock
+
+from helpdesk.overrides import email_account
+from telephony.jobs import pull_pilot_inboxes as poller
+
+
+class _Comm:
+    def __init__(self, name, ticket):
+        self.name = name
+        self.reference_doctype = "HD Ticket"
+        self.reference_name = ticket
+
+
+class _Mail:
+    def __init__(self, uid, subject="Fault report", from_email="user@example.com", fail=False):
+        self.uid = uid
+        self.subject = subject
+        self.from_email = from_email
+        self.fail = fail
+
+    def process(self):
+        if self.fail:
+            raise ValueError("bad mail")
+        return _Comm(f"COMM-{self.uid}", f"T-{self.uid}")
+
+
+class TestBatchedCommit(unittest.TestCase):
+    def test_commits_every_n_and_rolls_back_bad_mail_to_savepoint(self):
+        mails = [
+            _Mail(1),
+            _Mail(2),
+            _Mail(3, fail=True),
+            _Mail(4),
+            _Mail(5),
+        ]
+
+        with (
+            mock.patch.object(poller, "frappe") as frappe_mock,
+            mock.patch.object(
+                poller,
+                "_dedupe_seen_many",
+                return_value={"uid:2"},
+            ) as seen_many,
+            mock.patch.object(poller, "_dedupe_mark_many") as mark_many,
+            mock.patch.object(poller, "_dedupe_seen") as dedupe_seen,
+        ):
+            frappe_mock.conf.get.return_value = 2
+
+            entry = poller._process_mails("Faults", mails)
+
+        seen_many.assert_called_once_with(
+            "Faults",
+            ["uid:1", "uid:2", "uid:3", "uid:4", "uid:5"],
+        )
+        dedupe_seen.assert_not_called()
+
+        self.assertEqual(entry["processed"], 3)
+        self.assertEqual(entry["skipped_dedupe"], 1)
+        self.assertEqual(entry["mail_errors"], 1)
+        self.assertEqual(entry["commits"], 2)
+        self.assertEqual(entry["_last_ticket"], "T-5")
+
+        frappe_mock.db.rollback.assert_called_once_with(
+            save_point="pull_pilot_mail_2"
+        )
+        self.assertEqual(frappe_mock.db.commit.call_count, 2)
+        self.assertEqual(
+            mark_many.call_args_list,
+            [
+                mock.call("Faults", ["uid:1", "uid:4"]),
+                mock.call("Faults", ["uid:5"]),
+            ],
+        )
+
+        # The Communication is never reloaded just to find the ticket.
+        frappe_mock.get_doc.assert_not_called()
+        frappe_mock.db.get_value.assert_not_called()
+
+    def test_lost_savepoint_keeps_mails_that_were_implicitly_committed(self):
+        mails = [_Mail(1), _Mail(2), _Mail(3, fail=True)]
+        for mail in mails:
+            mail.message_id = f"<m{mail.uid}@example.com>"
+
+        with (
+            mock.patch.object(poller, "frappe") as frappe_mock,
+            mock.patch.object(poller, "_dedupe_seen_many", return_value=set()),
+            mock.patch.object(poller, "_dedupe_mark_many") as mark_many,
+        ):
+            frappe_mock.conf.get.return_value = 5
+
+            def rollback(save_point=None):
+                if save_point:
+                    raise RuntimeError("SAVEPOINT does not exist")
+
+            frappe_mock.db.rollback.side_effect = rollback
+            # mail 1 reached the database before the savepoint vanished; mail 2 did not
+            frappe_mock.get_all.return_value = ["<m1@example.com>"]
+
+            entry = poller._process_mails("Faults", mails)
+
+        self.assertEqual(
+            frappe_mock.get_all.call_args.kwargs["filters"],
+            {"message_id": ["in", ["<m1@example.com>", "<m2@example.com>"]]},
+        )
+        self.assertEqual(entry["processed"], 1)
+        self.assertEqual(entry["batch_lost"], 1)
+        self.assertEqual(entry["mail_errors"], 1)
+        mark_many.assert_called_once_with("Faults", ["uid:1"])
+        frappe_mock.db.commit.assert_not_called()
+
+    def test_default_mode_commits_each_mail(self):
+        mails = [_Mail(1), _Mail(2)]
+
+        with (
+            mock.patch.object(poller, "frappe") as frappe_mock,
+            mock.patch.object(poller, "_dedupe_seen", return_value=False),
+            mock.patch.object(poller, "_dedupe_mark") as dedupe_mark,
+            mock.patch.object(poller, "_dedupe_seen_many") as seen_many,
+        ):
+            frappe_mock.conf.get.return_value = None
+
+            entry = poller._process_mails("PABX", mails)
+
+        seen_many.assert_not_called()
+        self.assertEqual(entry["processed"], 2)
+        self.assertEqual(frappe_mock.db.commit.call_count, 2)
+        frappe_mock.db.savepoint.assert_not_called()
+        self.assertEqual(
+            dedupe_mark.call_args_list,
+            [
+                mock.call("PABX", "uid:1"),
+                mock.call("PABX", "uid:2"),
+            ],
+        )
+
+
+class _FakeImap:
+    """Local IMAP stand-in: answers header and STORE commands, records what was asked."""
+
+    def __init__(self, headers):
+        self.headers = headers
+        self.commands = []
+
+    def uid(self, command, uids, *args):
+        self.commands.append((command, uids, *args))
+        if command == "fetch":
+            data = []
+            for uid in uids.split(b","):
+                data.append(
+                    (
+                        b"1 (UID " + uid + b" BODY[HEADER.FIELDS (FROM SUBJECT)] {64}",
+                        self.headers[uid],
+                    )
+                )
+                data.append(b")")
+            return "OK", data
+        return "OK", [None]
+
+
+class _Settings(dict):
+    __getattr__ = dict.get
+
+
+class _FakeEmailServer:
+    def __init__(self, headers, sync_rule="UNSEEN"):
+        self.imap = _FakeImap(headers)
+        self.settings = _Settings(email_sync_rule=sync_rule)
+        self.retrieved = []
+
+    def get_new_mails(self, folder):
+        return list(self.imap.headers)
+
+    def retrieve_message(self, uid, msg_num):
+        self.retrieved.append(uid)
+        self.latest_messages.append(b"full body " + uid)
+        self.seen_status[uid] = "UNSEEN"
+
+
+class TestHeaderPrefetch(unittest.TestCase):
+    def test_parse_header_fetch_decodes_envelope(self):
+        data = [
+            (
+                b"1 (UID 42 BODY[HEADER.FIELDS (FROM SUBJECT MESSAGE-ID)] {90}",
+                b"From: Mailer Daemon <MAILER-DAEMON@example.com>\r\n"
+                b"Subject: =?utf-8?q?Undelivered_Mail?=\r\n"
+                b"Message-ID: <abc@example.com>\r\n\r\n",
+            ),
+            b")",
+        ]
+
+        metas = email_account.parse_header_fetch(data)
+
+        self.assertEqual(
+            metas,
+            [
+                {
+                    "uid": "42",
+                    "message_id": "abc@example.com",
+                    "from": "MAILER-DAEMON@example.com",
+                    "subject": "Undelivered Mail",
+                    "auto_generated": False,
+                }
+            ],
+        )
+
+    def test_only_survivors_are_downloaded(self):
+        server = _FakeEmailServer(
+            {
+                b"10": b"From: user@example.com\r\nSubject: Line down\r\n\r\n",
+                b"11": b"From: mailer-daemon@example.com\r\nSubject: Bounce\r\n\r\n",
+                b"12": b"From: user@example.com\r\nSubject: Seen before\r\n\r\n",
+                b"13": b"From: bot@example.com\r\nX-Auto-Generated: yes\r\n\r\n",
+            }
+        )
+        counters = {"skipped_blocked": 0, "skipped_dedupe": 0, "last_skip_meta": None}
+
+        with (
+            mock.patch.object(email_account, "frappe") as frappe_mock,
+            mock.patch.object(
+                poller,
+                "_dedupe_seen_many",
+                return_value={"uid:12"},
+            ),
+        ):
+            frappe_mock.safe_decode.side_effect = lambda v: v.decode()
+
+            messages = email_account.CustomEmailAccount._get_imap_messages_selective(
+                None,
+                server,
+                '"INBOX"',
+                poller._make_prefilter("Faults", counters),
+            )
+
+        self.assertEqual(server.retrieved, [b"10"])
+        self.assertEqual(messages["uid_list"], [b"10"])
+        self.assertEqual(messages["latest_messages"], [b"full body 10"])
+        self.assertEqual(counters["skipped_blocked"], 1)
+        self.assertEqual(counters["skipped_dedupe"], 1)
+        self.assertIn(
+            ("STORE", b"11,12,13", "+FLAGS", "(\\SEEN)"),
+            server.imap.commands,
+        )
+
+
+class TestAdaptiveDrain(unittest.TestCase):
+    def test_fetch_limit_leaves_the_rest_unread_as_backlog(self):
+        server = _FakeEmailServer(
+            {
+                b"20": b"From: a@example.com\r\n\r\n",
+                b"21": b"From: b@example.com\r\n\r\n",
+                b"22": b"From: c@example.com\r\n\r\n",
+                b"23": b"From: d@example.com\r\n\r\n",
+            }
+        )
+
+        with mock.patch.object(email_account, "frappe") as frappe_mock:
+            frappe_mock.safe_decode.side_effect = lambda v: v.decode()
+
+            messages = email_account.CustomEmailAccount._get_imap_messages_selective(
+                None,
+                server,
+                '"INBOX"',
+                limit=2,
+            )
+
+        self.assertEqual(server.retrieved, [b"20", b"21"])
+        self.assertEqual(messages["backlog"], 2)
+        # No header pass and nothing flagged: unread mail stays for the next run.
+        self.assertEqual(server.imap.commands, [])
+
+    def test_retrieve_timeout_keeps_fetched_mail_and_counts_rest_as_backlog(self):
+        server = _FakeEmailServer(
+            {
+                b"30": b"From: a@example.com\r\n\r\n",
+                b"31": b"From: b@example.com\r\n\r\n",
+                b"32": b"From: c@example.com\r\n\r\n",
+            }
+        )
+        retrieve = server.retrieve_message
+
+        def flaky_retrieve(uid, msg_num):
+            if uid == b"31":
+                raise TimeoutError("timed out")
+            retrieve(uid, msg_num)
+
+        server.retrieve_message = flaky_retrieve
+
+        with mock.patch.object(email_account, "frappe") as frappe_mock:
+            frappe_mock.safe_decode.side_effect = lambda v: v.decode()
+
+            messages = email_account.CustomEmailAccount._get_imap_messages_selective(
+                None,
+                server,
+                '"INBOX"',
+            )
+
+        self.assertEqual(server.retrieved, [b"30"])
+        self.assertEqual(messages["uid_list"], [b"30"])
+        self.assertEqual(messages["latest_messages"], [b"full body 30"])
+        self.assertEqual(messages["backlog"], 2)
+
+    def test_drain_limit_follows_measured_throughput(self):
+        with mock.patch.object(poller, "_sec_per_mail", return_value=0.5):
+            self.assertEqual(poller._drain_limit("Faults", 20), 40)
+            self.assertEqual(poller._drain_limit("Faults", 1), poller.DRAIN_MIN_FETCH)
+            self.assertEqual(poller._drain_limit("Faults", 500), poller.DRAIN_MAX_FETCH)
+
+    def test_account_is_deferred_once_budget_is_spent(self):
+        acc = mock.Mock(enable_incoming=1)
+
+        with mock.patch.object(poller, "frappe") as frappe_mock:
+            frappe_mock.get_doc.return_value = acc
+
+            entry = poller._poll_account("Helpdesk", deadline=poller.time.monotonic() - 1)
+
+        self.assertEqual(entry["deferred"], 1)
+        acc.get_inbound_mails.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
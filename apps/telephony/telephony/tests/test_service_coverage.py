@@ -0,0 +1,133 @@
+import types
+import unittest
+from unittest import mock
+
+from telephony import service_coverage
+
+
+class _Row(dict):
+    __getattr__ = dict.get
+
+    def copy(self):
+        return _Row(self)
+
+
+def _coverage(name, scope, service_area, user, customer="", campus="", role="Eligible", priority=100):
+    return _Row(
+        name=name,
+        enabled=1,
+        coverage_scope=scope,
+        customer=customer,
+        campus=campus,
+        service_area=service_area,
+        user=user,
+        coverage_role=role,
+        priority=priority,
+    )
+
+
+COVERAGE = [
+    _coverage("TSC-1", "Default", "PABX", "default@x"),
+    _coverage("TSC-2", "Campus", "PABX", "backup@x", customer="Other Co", campus="Boschendal", role="Backup"),
+    _coverage("TSC-3", "Campus", "PABX", "primary@x", campus="Boschendal", role="Primary"),
+    _coverage("TSC-4", "Campus", "PABX", "early@x", campus="Boschendal", priority=10),
+    _coverage("TSC-5", "Customer/Campus", "SIM", "cc@x", customer="ACME", campus="Boschendal"),
+    _coverage("TSC-6", "Customer", "SIM", "cust@x", customer="ACME"),
+]
+
+
+class TestCoverageIndex(unittest.TestCase):
+    def setUp(self):
+        service_coverage._INDEX.clear()
+        self.addCleanup(service_coverage._INDEX.clear)
+        patcher = mock.patch.object(service_coverage, "frappe")
+        self.frappe = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.frappe.local = types.SimpleNamespace(site="site1")
+        self.frappe.cache.return_value.get_value.return_value = "g1"
+
+        def get_all(doctype, **kwargs):
+            if doctype == service_coverage.COVERAGE_DOCTYPE:
+                return COVERAGE
+            tickets = [
+                _Row(name="T-1", custom_site_group="boschendal", custom_service_area="PABX", _assign='["primary@x"]'),
+                _Row(name="T-2", custom_customer="ACME", custom_site_group="Boschendal", custom_service_area="SIM", _assign=""),
+            ]
+            names = kwargs["filters"]["name"][1]
+            return [ticket for ticket in tickets if ticket.name in names]
+
+        self.frappe.get_all.side_effect = get_all
+
+    def test_first_matching_rank_sorted_by_priority_role_user(self):
+        rows = service_coverage.get_matching_coverage_rows(
+            customer="ACME", campus=" BOSCHENDAL ", service_area="pabx"
+        )
+
+        self.assertEqual([row.name for row in rows], ["TSC-4", "TSC-3", "TSC-2"])
+        self.assertEqual({row["_match_rank"] for row in rows}, {2})
+        self.assertEqual(
+            [row.name for row in service_coverage.get_matching_coverage_rows(service_area="PABX")],
+            ["TSC-1"],
+        )
+        self.assertEqual(
+            [row.name for row in service_coverage.get_matching_coverage_rows(customer="ACME", service_area="SIM")],
+            ["TSC-6"],
+        )
+        self.assertEqual(service_coverage.get_matching_coverage_rows(campus="Boschendal", service_area=""), [])
+        self.assertEqual(self.frappe.get_all.call_count, 1)
+        self.assertNotIn("_match_rank", COVERAGE[2])
+
+    def test_single_ticket_is_read_once(self):
+        self.frappe.db.get_value.return_value = _Row(
+            name="T-1", custom_site_group="Boschendal", custom_service_area="PABX", _assign='["primary@x"]'
+        )
+
+        result = service_coverage.resolve_ticket_coverage_owner("T-1")
+
+        self.frappe.db.get_value.assert_called_once_with(
+            "HD Ticket", "T-1", service_coverage.TICKET_FIELDS, as_dict=True
+        )
+        self.assertEqual(result["recommended_user"], "early@x")
+        self.assertTrue(result["current_assignee_is_covered"])
+        self.assertEqual(result["effective_owner_candidate"], "primary@x")
+
+    def test_bulk_resolution_loads_tickets_in_one_query(self):
+        results = service_coverage.resolve_coverage_owners(["T-1", "T-2"])
+
+        self.assertEqual(list(results), ["T-1", "T-2"])
+        self.assertEqual(results["T-1"]["effective_owner_candidate"], "primary@x")
+        self.assertEqual(results["T-2"]["recommended_user"], "cc@x")
+        self.assertEqual(results["T-2"]["match_rank"], 1)
+        self.assertEqual(self.frappe.get_all.call_count, 2)
+        self.assertTrue(self.frappe.get_all.call_args.kwargs["ignore_permissions"])
+        self.frappe.db.get_value.assert_not_called()
+
+    def test_bulk_names_the_loader_does_not_return_match_the_single_path(self):
+        results = service_coverage.resolve_coverage_owners(["T-404", "T-1"])
+
+        self.assertEqual(list(results), ["T-404", "T-1"])
+        self.assertEqual(results["T-404"]["ok"], 0)
+        self.assertEqual(results["T-404"]["effective_owner_candidate"], "")
+
+        self.frappe.db.get_value.return_value = None
+        single = service_coverage.resolve_ticket_coverage_owner("T-404")
+        self.assertEqual(results["T-404"], single)
+
+    def test_invalidate_bumps_the_generation(self):
+        service_coverage.get_user_coverage_rows("early@x")
+        self.frappe.generate_hash.return_value = "g2"
+
+        service_coverage.invalidate()
+
+        self.assertNotIn("site1", service_coverage._INDEX)
+        set_value = self.frappe.cache.return_value.set_value
+        set_value.assert_not_called()
+
+        bump = self.frappe.db.after_commit.add.call_args.args[0]
+        self.frappe.db.after_rollback.add.assert_called_once_with(bump)
+        bump()
+        set_value.assert_called_once_with(service_coverage.GEN_KEY, "g2")
+
+
+if __name__ == "__main__":
+    unittest.main()
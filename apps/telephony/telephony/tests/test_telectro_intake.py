@@ -0,0 +1,72 @@
+import unittest
+from unittest import mock
+
+from telephony import telectro_intake
+
+
+class TestCustomerFromSenderCache(unittest.TestCase):
+    def setUp(self):
+        telectro_intake._customer_map.clear()
+        self.addCleanup(telectro_intake._customer_map.clear)
+
+        patcher = mock.patch.object(telectro_intake, "frappe")
+        self.frappe_mock = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.frappe_mock.local.site = "frontend"
+        self.frappe_mock.conf.get.return_value = None
+
+        self.gen = {"value": "1"}
+        self.frappe_mock.cache.return_value.get_value.side_effect = lambda key: self.gen["value"]
+        self.frappe_mock.generate_hash.return_value = "2"
+
+        resolver = mock.patch.object(
+            telectro_intake,
+            "_customer_from_sender_uncached",
+            return_value=("CUST-1", "contact_email_id_match"),
+        )
+        self.uncached = resolver.start()
+        self.addCleanup(resolver.stop)
+
+    def test_repeat_sender_is_resolved_once(self):
+        first = telectro_intake._customer_from_sender(" User@Example.com ")
+        second = telectro_intake._customer_from_sender("user@example.com")
+
+        self.assertEqual(first, ("CUST-1", "contact_email_id_match"))
+        self.assertEqual(second, first)
+        self.uncached.assert_called_once_with("user@example.com")
+
+    def test_generation_bump_invalidates_other_processes(self):
+        telectro_intake._customer_from_sender("user@example.com")
+
+        # Another worker saved a Contact: only the shared generation changed.
+        self.gen["value"] = "2"
+        telectro_intake._customer_from_sender("user@example.com")
+
+        self.assertEqual(self.uncached.call_count, 2)
+
+    def test_invalidate_hook_clears_local_entries(self):
+        telectro_intake._customer_from_sender("user@example.com")
+
+        telectro_intake.invalidate_customer_map(mock.Mock(doctype="Contact"))
+
+        self.assertEqual(telectro_intake._customer_map, {})
+        set_value = self.frappe_mock.cache.return_value.set_value
+        set_value.assert_not_called()
+
+        bump = self.frappe_mock.db.after_commit.add.call_args.args[0]
+        self.frappe_mock.db.after_rollback.add.assert_called_once_with(bump)
+        bump()
+        set_value.assert_called_once_with(telectro_intake._CUSTOMER_MAP_GEN_KEY, "2")
+
+    def test_zero_ttl_bypasses_cache(self):
+        self.frappe_mock.conf.get.return_value = 0
+
+        telectro_intake._customer_from_sender("user@example.com")
+        telectro_intake._customer_from_sender("user@example.com")
+
+        self.assertEqual(self.uncached.call_count, 2)
+        self.assertEqual(telectro_intake._customer_map, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
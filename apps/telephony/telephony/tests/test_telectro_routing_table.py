@@ -0,0 +1,152 @@
+import types
+import unittest
+from unittest import mock
+
+from telephony import telectro_routing_policy, telectro_routing_table, telectro_ticket_routing
+
+
+class _Row(dict):
+    __getattr__ = dict.get
+
+
+class _Doc(dict):
+    def __init__(self, new=True, before=None, **fields):
+        super().__init__(**fields)
+        self._new = new
+        self._before = before
+
+    __getattr__ = dict.get
+
+    def __setattr__(self, key, value):
+        if key.startswith("_"):
+            object.__setattr__(self, key, value)
+        else:
+            self[key] = value
+
+    def is_new(self):
+        return self._new
+
+    def get_doc_before_save(self):
+        return self._before
+
+
+RULES = [
+    _Row(rule_type="Mailbox Area", match_value="Fibre", target="Internet Connection"),
+    _Row(rule_type="Area Team", match_value="Internet Connection", target="Internet Connection"),
+    _Row(rule_type="Area Team", match_value="Other", target="Helpdesk Team"),
+    _Row(rule_type="Campus User", match_value="Boschendal", target="hendrik@x"),
+    _Row(rule_type="Campus User", match_value="Stellenbosch", target="gone@x"),
+]
+
+
+def _get_all(doctype, **kwargs):
+    if doctype == telectro_routing_table.RULE_DOCTYPE:
+        return RULES
+    if doctype == "User":
+        return ["hendrik@x"]
+    if doctype == "Has Role":
+        return [
+            _Row(parent="tech@x", role="TELECTRO-POC Role - Tech"),
+            _Row(parent="agent-partner@x", role="Agent"),
+            _Row(parent="agent-partner@x", role="TELECTRO-POC Role - Partner"),
+        ]
+    return []
+
+
+def _frappe_mock(frappe_mock):
+    frappe_mock.local = types.SimpleNamespace(site="site1")
+    frappe_mock.db.table_exists.return_value = True
+    frappe_mock.get_all.side_effect = _get_all
+    frappe_mock.cache.return_value.get_value.return_value = "g1"
+
+
+class TestRoutingTable(unittest.TestCase):
+    def setUp(self):
+        telectro_routing_table._TABLE.clear()
+        self.addCleanup(telectro_routing_table._TABLE.clear)
+        patcher = mock.patch.object(telectro_routing_table, "frappe")
+        self.frappe = patcher.start()
+        self.addCleanup(patcher.stop)
+        _frappe_mock(self.frappe)
+
+    def test_email_ticket_routes_mailbox_then_area(self):
+        doc = _Doc(email_account="Fibre", custom_service_area="", agent_group="")
+        telectro_ticket_routing.seed_ticket_routing(doc)
+
+        self.assertEqual(doc.custom_service_area, "Internet Connection")
+        self.assertEqual(doc.agent_group, "Internet Connection")
+
+        unmapped = _Doc(email_account="Helpdesk", custom_service_area="", agent_group="")
+        telectro_ticket_routing.seed_ticket_routing(unmapped)
+
+        self.assertEqual(unmapped.custom_service_area, telectro_routing_table.DEFAULT_AREA)
+        self.assertEqual(unmapped.agent_group, telectro_routing_table.DEFAULT_TEAM)
+
+    def test_manual_area_change_refreshes_team(self):
+        doc = _Doc(
+            new=False,
+            before=_Row(custom_service_area="Other"),
+            custom_service_area="Internet Connection",
+            agent_group="Helpdesk Team",
+        )
+        telectro_ticket_routing.seed_ticket_routing(doc)
+
+        self.assertEqual(doc.agent_group, "Internet Connection")
+
+    def test_decisions_cost_no_queries_after_compile(self):
+        with mock.patch.object(telectro_routing_policy, "frappe") as policy_frappe:
+            first = telectro_routing_policy.resolve_ticket_routing_policy(_Doc(custom_site_group="BOSCHENDAL"))
+            queries = self.frappe.get_all.call_count
+            second = telectro_routing_policy.resolve_ticket_routing_policy(_Doc(custom_site_group="Boschendal"))
+            missing = telectro_routing_policy.resolve_ticket_routing_policy(_Doc(custom_site_group="Stellenbosch"))
+
+        self.assertEqual(first["target_user"], "hendrik@x")
+        self.assertEqual(first["policy_key"], "campus:boschendal")
+        self.assertEqual(second["target_user"], "hendrik@x")
+        self.assertIsNone(missing)
+        self.assertEqual(queries, 3)
+        self.assertEqual(self.frappe.get_all.call_count, 3)
+        policy_frappe.log_error.assert_called_once()
+        policy_frappe.db.exists.assert_not_called()
+        policy_frappe.get_roles.assert_not_called()
+
+    def test_creator_take_ownership_needs_technician_without_partner_role(self):
+        cases = [
+            ("tech@x", "creator_take_ownership"),
+            ("agent-partner@x", None),
+            ("nobody@x", None),
+        ]
+        for owner, policy_key in cases:
+            with self.subTest(owner=owner):
+                doc = _Doc(owner=owner, custom_take_ownership_on_create=1)
+                policy = telectro_routing_policy.resolve_ticket_routing_policy(doc)
+                self.assertEqual((policy or {}).get("policy_key"), policy_key)
+
+    def test_invalidate_bumps_the_generation(self):
+        telectro_routing_table.get_routing_table()
+        self.frappe.generate_hash.return_value = "g2"
+
+        telectro_routing_table.invalidate()
+
+        self.assertNotIn("site1", telectro_routing_table._TABLE)
+        set_value = self.frappe.cache.return_value.set_value
+        set_value.assert_not_called()
+
+        bump = self.frappe.db.after_commit.add.call_args.args[0]
+        self.frappe.db.after_rollback.add.assert_called_once_with(bump)
+        bump()
+        set_value.assert_called_once_with(telectro_routing_table.GEN_KEY, "g2")
+
+    def test_seed_rules_until_the_doctype_exists(self):
+        self.frappe.db.table_exists.return_value = False
+
+        table = telectro_routing_table.get_routing_table()
+
+        self.assertEqual(table.area_for_mailbox("PABX"), "PABX")
+        self.assertEqual(table.team_for_area("Faults"), "Helpdesk Team")
+        queried = [call.args[0] for call in self.frappe.get_all.call_args_list]
+        self.assertNotIn(telectro_routing_table.RULE_DOCTYPE, queried)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+from unittest import mock
+
+from telephony import telectro_site_label_index as site_index
+
+
+class _Row(dict):
+    __getattr__ = dict.get
+
+
+# newest first, as _load_rows() orders them
+ROWS = [
+    _Row(name="Stray Hall B", parent_location="Elsewhere", location_name="Hall B"),
+    _Row(name="Buildings: Hall B", parent_location="Pilot Sites", location_name="Hall B"),
+    _Row(name="Hall A", parent_location="Pilot Sites", location_name="Main Hall"),
+    _Row(name="Harbour Gate", parent_location="Elsewhere", location_name="Harbour Gate"),
+    _Row(name="Pilot Sites", parent_location=None, location_name="Pilot Sites"),
+]
+
+
+class TestSiteLabelIndex(unittest.TestCase):
+    def setUp(self):
+        site_index._INDEX.clear()
+        self.addCleanup(site_index._INDEX.clear)
+
+        patcher = mock.patch.object(site_index, "frappe")
+        self.frappe_mock = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.frappe_mock.local.site = "frontend"
+        self.frappe_mock.cache.return_value.get_value.return_value = "1"
+        self.frappe_mock.get_all.return_value = ROWS
+
+    def test_global_precedence(self):
+        self.assertEqual(site_index.resolve("hall a"), "Hall A")
+        self.assertEqual(site_index.resolve("Main Hall"), "Hall A")
+        # location_name shared by two rows: newest wins
+        self.assertEqual(site_index.resolve("HALL B"), "Stray Hall B")
+        # prefix over name or location_name, newest wins
+        self.assertEqual(site_index.resolve("Ha"), "Stray Hall B")
+        self.assertEqual(site_index.resolve("harb"), "Harbour Gate")
+        self.assertIsNone(site_index.resolve("Nowhere"))
+        self.assertIsNone(site_index.resolve("  "))
+
+    def test_pilot_precedence_is_scoped_to_pilot_root(self):
+        self.assertEqual(site_index.resolve_pilot("Hall A"), "Hall A")
+        self.assertEqual(site_index.resolve_pilot("Pilot Sites"), "Pilot Sites")
+        self.assertEqual(site_index.resolve_pilot("Hall B"), "Buildings: Hall B")
+        self.assertEqual(site_index.resolve_pilot("Ha"), "Buildings: Hall B")
+        # exists globally but not under the pilot root
+        self.assertIsNone(site_index.resolve_pilot("Harbour Gate"))
+
+    def test_index_is_built_once_per_generation(self):
+        site_index.resolve("Hall A")
+        site_index.resolve_pilot("Hall B")
+        self.assertEqual(self.frappe_mock.get_all.call_count, 1)
+
+        self.frappe_mock.cache.return_value.get_value.return_value = "2"
+        site_index.resolve("Hall A")
+        self.assertEqual(self.frappe_mock.get_all.call_count, 2)
+
+    def test_location_hook_bumps_the_generation_after_commit(self):
+        site_index.resolve("Hall A")
+        set_value = self.frappe_mock.cache.return_value.set_value
+
+        site_index.on_location_change(mock.Mock(doctype="Location"))
+
+        self.assertEqual(site_index._INDEX, {})
+        set_value.assert_not_called()
+        bump = self.frappe_mock.db.after_commit.add.call_args.args[0]
+        self.frappe_mock.db.after_rollback.add.assert_called_once_with(bump)
+        bump()
+        set_value.assert_called_once()
+        self.assertEqual(set_value.call_args.args[0], site_index.GEN_KEY)
+
+
+if __name__ == "__main__":
+    unittest.main()
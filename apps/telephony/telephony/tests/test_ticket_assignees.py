@@ -0,0 +1,118 @@
+import unittest
+from datetime import datetime
+from unittest import mock
+
+from telephony import telectro_claim
+from telephony import ticket_assignees
+from telephony.ftelephony.report.customer_ticket_oversight import (
+    customer_ticket_oversight as oversight,
+)
+from telephony.ftelephony.report.my_team_load import my_team_load
+
+
+class _Row(dict):
+    __getattr__ = dict.get
+
+
+class TestResolveAssignees(unittest.TestCase):
+    def test_empty_assign_rows_share_one_todo_query(self):
+        rows = [
+            _Row(name="T-1", _assign='["a@x"]'),
+            _Row(name="T-2", _assign="[]"),
+            _Row(name="T-3", _assign=None),
+            _Row(name="T-4", _assign=""),
+        ]
+
+        with mock.patch.object(ticket_assignees, "frappe") as frappe_mock:
+            frappe_mock.get_all.return_value = [
+                _Row(reference_name="T-2", allocated_to="b@x"),
+                _Row(reference_name="T-2", allocated_to="b@x"),
+                _Row(reference_name="T-3", allocated_to="c@x"),
+                _Row(reference_name="T-2", allocated_to="d@x"),
+            ]
+
+            assignees = ticket_assignees.resolve_assignees(rows)
+
+        frappe_mock.get_all.assert_called_once()
+        filters = frappe_mock.get_all.call_args.kwargs["filters"]
+        self.assertEqual(filters["reference_name"], ["in", ["T-2", "T-3", "T-4"]])
+        self.assertEqual(filters["status"], "Open")
+        self.assertEqual(
+            assignees,
+            {"T-1": ["a@x"], "T-2": ["b@x", "d@x"], "T-3": ["c@x"], "T-4": []},
+        )
+
+    def test_no_todo_query_when_every_row_has_assign(self):
+        with mock.patch.object(ticket_assignees, "frappe") as frappe_mock:
+            assignees = ticket_assignees.resolve_assignees([_Row(name="T-1", _assign="a@x")])
+
+        frappe_mock.get_all.assert_not_called()
+        self.assertEqual(assignees, {"T-1": ["a@x"]})
+
+
+class TestAdopters(unittest.TestCase):
+    def test_oversight_query_count_does_not_grow_with_unassigned_rows(self):
+        rows = [_Row(name=f"T-{i}", _assign="", modified=datetime(2026, 10, 1, 8, i)) for i in range(30)]
+
+        with (
+            mock.patch.object(oversight, "frappe") as frappe_mock,
+            mock.patch.object(oversight, "_is_oversight_user", return_value=True),
+            mock.patch.object(oversight, "now_datetime", return_value=datetime(2026, 10, 2)),
+            mock.patch.object(oversight, "get_active_tickets", return_value=rows),
+            mock.patch.object(ticket_assignees, "frappe") as todo_frappe,
+        ):
+            todo_frappe.get_all.return_value = [_Row(reference_name="T-7", allocated_to="a@x")]
+
+            data = oversight.get_data({})
+
+        todo_frappe.get_all.assert_called_once()
+        frappe_mock.get_all.assert_not_called()
+        by_name = {row["name"]: row["assigned_to"] for row in data}
+        self.assertEqual(by_name["T-7"], "a@x")
+        self.assertEqual(by_name["T-8"], "")
+
+    def test_my_team_load_lists_ticket_under_every_open_todo_owner(self):
+        rows = [_Row(name="T-1", _assign='["z@x"]'), _Row(name="T-2", _assign="")]
+
+        with (
+            mock.patch.object(my_team_load, "get_active_tickets", return_value=rows),
+            mock.patch.object(
+                my_team_load,
+                "get_open_todo_users",
+                return_value={"T-1": ["a@x", "b@x"], "T-2": []},
+            ) as todo_users,
+        ):
+            result = my_team_load._get_rows()
+
+        todo_users.assert_called_once_with(["T-1", "T-2"])
+        self.assertEqual(
+            [(row["name"], row["todo_owner"]) for row in result],
+            [("T-1", "a@x"), ("T-1", "b@x"), ("T-2", None)],
+        )
+        buckets = {row["owner"]: row["open_tickets"] for row in my_team_load._build_summary_rows(result)}
+        self.assertEqual(buckets, {"a@x": 1, "b@x": 1, my_team_load.POOL_LABEL: 1})
+
+    def test_assignment_state_reads_ticket_fields_without_loading_the_doc(self):
+        with (
+            mock.patch.object(telectro_claim, "frappe") as frappe_mock,
+            mock.patch.object(ticket_assignees, "frappe") as todo_frappe,
+        ):
+            frappe_mock.db.get_value.return_value = _Row(
+                name="T-1", status="Open", custom_fulfilment_party="Telectro", _assign='["a@x"]'
+            )
+            todo_frappe.get_all.return_value = [
+                _Row(name="TD-1", reference_name="T-1", allocated_to="a@x"),
+                _Row(name="TD-2", reference_name="T-1", allocated_to="a@x"),
+            ]
+
+            state = telectro_claim.telectro_ticket_assignment_state("T-1")
+
+        frappe_mock.get_doc.assert_not_called()
+        self.assertEqual(state["todo_users"], ["a@x"])
+        self.assertEqual(state["open_todo_count"], 2)
+        self.assertFalse(state["has_assignment_drift"])
+        self.assertEqual(state["status"], "Open")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+from unittest import mock
+
+from telephony import telectro_site_guard as site_guard
+from telephony import ticket_context
+
+
+class _Flags(dict):
+    __getattr__ = dict.get
+
+
+class _TicketDoc(dict):
+    __getattr__ = dict.get
+
+    def __init__(self, **kw):
+        super().__init__(**kw)
+        self.flags = _Flags()
+
+    def is_new(self):
+        return True
+
+
+class _Row(dict):
+    __getattr__ = dict.get
+
+
+LOCATIONS = {
+    "Boschendal": _Row(name="Boschendal", is_group=1, parent_location="Pilot Sites", lft=10, rgt=40),
+    "Boschendal - Buildings": _Row(name="Boschendal - Buildings", is_group=1, parent_location="Boschendal", lft=11, rgt=20),
+    "Buildings: Hall A": _Row(name="Buildings: Hall A", is_group=0, parent_location="Boschendal - Buildings", lft=12, rgt=13),
+}
+
+
+class TestTicketContext(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(ticket_context, "frappe")
+        self.frappe_mock = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.frappe_mock.db.get_value.side_effect = lambda dt, name, *a, **kw: LOCATIONS.get(name)
+
+    def test_context_is_shared_per_doc_and_released(self):
+        doc = _TicketDoc(name="T-1")
+
+        ctx = ticket_context.get_ticket_context(doc)
+        self.assertIs(ticket_context.get_ticket_context(doc), ctx)
+
+        ticket_context.release(doc)
+        self.assertIsNot(ticket_context.get_ticket_context(doc), ctx)
+
+    def test_site_guard_reads_each_location_once(self):
+        doc = _TicketDoc(
+            name="T-2",
+            ticket_type="Faults",
+            custom_request_source="Email",
+            custom_site_group="Boschendal",
+            custom_site="Buildings: Hall A",
+            custom_fault_category="Buildings",
+        )
+
+        with mock.patch.object(site_guard, "frappe"):
+            site_guard.validate_site_fields(doc)
+
+        fetched = [c.args[1] for c in self.frappe_mock.db.get_value.call_args_list]
+        self.assertEqual(sorted(fetched), sorted(LOCATIONS))
+
+    def test_memo_does_not_cache_failures(self):
+        ctx = ticket_context.TicketContext(_TicketDoc())
+        resolver = mock.Mock(side_effect=[ValueError("disabled partner"), "dispatch@local.test"])
+
+        with self.assertRaises(ValueError):
+            ctx.memo(resolver, "CN Services")
+        self.assertEqual(ctx.memo(resolver, "CN Services"), "dispatch@local.test")
+        self.assertEqual(ctx.memo(resolver, "CN Services"), "dispatch@local.test")
+        self.assertEqual(resolver.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
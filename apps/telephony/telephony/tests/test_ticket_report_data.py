@@ -0,0 +1,123 @@
+import datetime
+import types
+import unittest
+from unittest import mock
+
+from telephony import ticket_report_data as report_data
+from telephony.ftelephony.report.my_current_work import my_current_work
+from telephony.ftelephony.report.partner_acceptance_review_queue import (
+    partner_acceptance_review_queue as acceptance_queue,
+)
+
+
+class _Row(dict):
+    __getattr__ = dict.get
+
+
+def _frappe_mock(frappe_mock, cached=None):
+    frappe_mock.local = types.SimpleNamespace()
+    frappe_mock._dict = _Row
+    frappe_mock.conf.get.return_value = None
+    frappe_mock.cache.return_value.get_value.return_value = cached
+    return frappe_mock
+
+
+class TestActiveTickets(unittest.TestCase):
+    def test_one_scan_per_request_and_fresh_copies(self):
+        with mock.patch.object(report_data, "frappe") as frappe_mock:
+            _frappe_mock(frappe_mock)
+            frappe_mock.db.sql.return_value = [
+                _Row(name="T-1", custom_fulfilment_party="Partner"),
+                _Row(name="T-2", custom_fulfilment_party=""),
+            ]
+
+            first = report_data.get_active_tickets()
+            first[0]["bucket"] = "mutated"
+            partner = report_data.get_active_tickets(
+                lambda row: row.get("custom_fulfilment_party") == "Partner"
+            )
+
+        frappe_mock.db.sql.assert_called_once()
+        sql, params = frappe_mock.db.sql.call_args.args
+        self.assertIn("coalesce(t._assign, '') as _assign", sql)
+        self.assertEqual(params["terminal_statuses"], report_data.TERMINAL_STATUSES)
+        self.assertEqual(partner, [{"name": "T-1", "custom_fulfilment_party": "Partner"}])
+        frappe_mock.cache.return_value.set_value.assert_called_once_with(
+            report_data.SNAPSHOT_KEY,
+            mock.ANY,
+            expires_in_sec=report_data.SNAPSHOT_TTL_SECONDS,
+        )
+
+    def test_redis_snapshot_is_shared_across_requests(self):
+        with mock.patch.object(report_data, "frappe") as frappe_mock:
+            _frappe_mock(frappe_mock, cached=[{"name": "T-9"}])
+
+            rows = report_data.get_active_tickets()
+
+        frappe_mock.db.sql.assert_not_called()
+        self.assertEqual(rows, [{"name": "T-9"}])
+
+    def test_invalidate_drops_both_layers_but_ignores_unrelated_todos(self):
+        with mock.patch.object(report_data, "frappe") as frappe_mock:
+            _frappe_mock(frappe_mock)
+            frappe_mock.local.telectro_active_tickets = []
+
+            report_data.invalidate(_Row(doctype="ToDo", reference_type="Lead"))
+            self.assertTrue(hasattr(frappe_mock.local, "telectro_active_tickets"))
+
+            report_data.invalidate(_Row(doctype="ToDo", reference_type="HD Ticket"))
+
+        self.assertFalse(hasattr(frappe_mock.local, "telectro_active_tickets"))
+        frappe_mock.cache.return_value.delete_value.assert_called_once_with(report_data.SNAPSHOT_KEY)
+
+
+class TestMyCurrentWork(unittest.TestCase):
+    def test_buckets_come_from_one_shared_scan(self):
+        tickets = [
+            _Row(name="T-1", _assign='["me@x"]', custom_request_source="Partner",
+                 custom_fulfilment_party="Telectro", custom_partner_acceptance_state="Accepted by Partner"),
+            _Row(name="T-2", _assign="", custom_request_source="", custom_fulfilment_party="Partner",
+                 custom_partner_work_state="Work Completed by Partner"),
+            _Row(name="T-3", _assign='["other@x"]', custom_request_source="",
+                 custom_fulfilment_party="Partner", custom_partner_work_state="Assigned to Partner"),
+        ]
+
+        with (
+            mock.patch.object(my_current_work, "frappe") as frappe_mock,
+            mock.patch.object(my_current_work, "get_active_tickets", return_value=tickets) as active,
+            mock.patch.object(my_current_work, "_is_internal_user", return_value=True),
+            mock.patch.object(my_current_work, "_can_see_broad_partner_work", return_value=False),
+        ):
+            frappe_mock.session.user = "me@x"
+            frappe_mock._dict = _Row
+            frappe_mock.get_all.return_value = ["T-2"]
+
+            data = my_current_work.get_data({})
+
+        active.assert_called_once()
+        frappe_mock.db.sql.assert_not_called()
+        self.assertEqual(
+            [(row["name"], row["bucket"]) for row in data],
+            [("T-1", "Assigned to me"), ("T-2", "Shared with me")],
+        )
+
+
+class TestPartnerAcceptanceReviewQueue(unittest.TestCase):
+    def test_mixed_set_and_unset_accepted_on_sort_newest_first(self):
+        tickets = [
+            _Row(name="T-1", custom_partner_accepted_on=None),
+            _Row(name="T-2", custom_partner_accepted_on=datetime.date(2026, 10, 1)),
+            _Row(name="T-3", custom_partner_accepted_on="2026-10-05"),
+        ]
+
+        with (
+            mock.patch.object(acceptance_queue, "get_active_tickets", return_value=tickets),
+            mock.patch.object(acceptance_queue, "get_partner_note_summaries", return_value={}),
+        ):
+            data = acceptance_queue.get_data()
+
+        self.assertEqual([row["name"] for row in data], ["T-3", "T-2", "T-1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
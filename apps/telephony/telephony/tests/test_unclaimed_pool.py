@@ -0,0 +1,190 @@
+import datetime
+import types
+import unittest
+from unittest import mock
+
+from telephony import ops_kpis, ticket_state_sync, unclaimed_pool
+from telephony.ftelephony.report.unclaimed_over_1_day import unclaimed_over_1_day
+
+NOW = datetime.datetime(2026, 10, 16, 12, 0)
+
+
+class _Row(dict):
+    __getattr__ = dict.get
+
+
+def _cache(frappe_mock, seeded=True):
+    cache = frappe_mock.cache.return_value
+    cache.make_key.side_effect = lambda key: f"site|{key}"
+    cache.get.return_value = b"1" if seeded else None
+    frappe_mock.safe_decode.side_effect = lambda value: value.decode() if isinstance(value, bytes) else value
+    return cache
+
+
+class TestPoolMaintenance(unittest.TestCase):
+    def test_entries_keep_their_first_entry_time(self):
+        with (
+            mock.patch.object(unclaimed_pool, "frappe") as frappe_mock,
+            mock.patch.object(unclaimed_pool, "now_datetime", return_value=NOW),
+        ):
+            cache = _cache(frappe_mock)
+            unclaimed_pool.apply_states(
+                {
+                    "T-1": _Row(status="Open", _assign="[]"),
+                    "T-2": _Row(status="Open", _assign='["a@x"]'),
+                    "T-3": _Row(status="Resolved", _assign=""),
+                    "T-4": None,
+                }
+            )
+
+        pipe = cache.pipeline.return_value
+        pipe.zadd.assert_called_once_with("site|" + unclaimed_pool.POOL_KEY, {"T-1": NOW.timestamp()}, nx=True)
+        removed = [call.args[1] for call in pipe.zrem.call_args_list]
+        self.assertEqual(removed, ["T-2", "T-3", "T-4"])
+
+    def test_reconcile_drops_stale_and_adds_missing_scored_by_modified(self):
+        modified = datetime.datetime(2026, 10, 15, 8, 0)
+
+        with mock.patch.object(unclaimed_pool, "frappe") as frappe_mock:
+            cache = _cache(frappe_mock)
+            frappe_mock.db.sql.return_value = [
+                _Row(name="T-1", modified=modified),
+                _Row(name="T-2", modified=modified),
+            ]
+            cache.zrange.return_value = [b"T-1", b"T-9"]
+
+            result = unclaimed_pool.reconcile()
+
+        self.assertEqual(result, {"size": 2, "stale": 1, "missing": 1})
+        pipe = cache.pipeline.return_value
+        pipe.zrem.assert_called_once_with("site|" + unclaimed_pool.POOL_KEY, "T-9")
+        pipe.zadd.assert_called_once_with(
+            "site|" + unclaimed_pool.POOL_KEY, {"T-2": modified.timestamp()}, nx=True
+        )
+        pipe.set.assert_called_once_with("site|" + unclaimed_pool.SEEDED_KEY, 1)
+
+
+class TestPoolReads(unittest.TestCase):
+    def test_threshold_is_a_score_range(self):
+        with (
+            mock.patch.object(unclaimed_pool, "frappe") as frappe_mock,
+            mock.patch.object(unclaimed_pool, "now_datetime", return_value=NOW),
+        ):
+            cache = _cache(frappe_mock)
+            cache.zcount.return_value = 3
+
+            self.assertEqual(unclaimed_pool.count_over(60), 3)
+
+        cache.zcount.assert_called_once_with(
+            "site|" + unclaimed_pool.POOL_KEY, "-inf", NOW.timestamp() - 3600
+        )
+
+    def test_unseeded_pool_returns_none(self):
+        with mock.patch.object(unclaimed_pool, "frappe") as frappe_mock:
+            _cache(frappe_mock, seeded=False)
+
+            self.assertIsNone(unclaimed_pool.get_entries(60))
+            self.assertIsNone(unclaimed_pool.count_over(60))
+
+    def test_age_card_prefers_the_pool(self):
+        with (
+            mock.patch.object(ops_kpis.unclaimed_pool, "count_over", return_value=4) as count_over,
+            mock.patch.object(ops_kpis, "get_kpi_snapshot") as snapshot,
+        ):
+            self.assertEqual(ops_kpis.unassigned_over_4h()["value"], 4)
+
+        count_over.assert_called_once_with(240)
+        snapshot.assert_not_called()
+
+    def test_over_one_day_report_uses_pool_entry_for_idle_time(self):
+        entered = NOW - datetime.timedelta(hours=30)
+        tickets = [
+            _Row(name="T-1", subject="No tone", status="Open", modified=NOW, _assign=""),
+            _Row(name="T-2", subject="Claimed since", status="Open", modified=NOW, _assign='["a@x"]'),
+        ]
+
+        with (
+            mock.patch.object(unclaimed_over_1_day, "frappe") as frappe_mock,
+            mock.patch.object(
+                unclaimed_pool, "get_entries", return_value=[("T-1", entered), ("T-2", entered)]
+            ) as get_entries,
+            mock.patch.object(unclaimed_pool, "now_datetime", return_value=NOW),
+        ):
+            frappe_mock.get_all.return_value = tickets
+            _columns, data, *_rest = unclaimed_over_1_day.execute()
+
+        get_entries.assert_called_once_with(24 * 60)
+        frappe_mock.db.sql.assert_not_called()
+        self.assertEqual([row["name"] for row in data], ["T-1"])
+        self.assertEqual(data[0]["idle_hours"], 30)
+        self.assertEqual(data[0]["unclaimed_since"], entered)
+
+
+class _Callbacks:
+    """frappe.db.after_commit / after_rollback: add, run (and empty), reset."""
+
+    def __init__(self):
+        self.functions = []
+
+    def add(self, func):
+        self.functions.append(func)
+
+    def run(self):
+        while self.functions:
+            self.functions.pop(0)()
+
+    def reset(self):
+        self.functions = []
+
+
+class TestTicketStateSync(unittest.TestCase):
+    def test_marks_flush_once_after_commit_to_every_consumer(self):
+        with (
+            mock.patch.object(ticket_state_sync, "frappe") as frappe_mock,
+            mock.patch.object(ticket_state_sync.kpi_counters, "apply_states") as counters,
+            mock.patch.object(ticket_state_sync.unclaimed_pool, "apply_states") as pool,
+        ):
+            frappe_mock.local = types.SimpleNamespace()
+            frappe_mock.get_all.return_value = [_Row(name="T-1", status="Open", _assign="")]
+
+            ticket_state_sync.mark_ticket("T-1")
+            ticket_state_sync.mark_ticket("T-2")
+            ticket_state_sync.on_todo_change({"reference_type": "HD Ticket", "reference_name": "T-1"})
+            ticket_state_sync.on_todo_change({"reference_type": "Lead", "reference_name": "L-1"})
+
+            frappe_mock.db.after_commit.add.assert_called_once_with(ticket_state_sync.flush)
+            ticket_state_sync.flush()
+
+        frappe_mock.get_all.assert_called_once()
+        states = counters.call_args.args[0]
+        self.assertEqual(set(states), {"T-1", "T-2"})
+        self.assertIsNone(states["T-2"])
+        pool.assert_called_once_with(states)
+
+    def test_marks_after_a_rollback_still_reach_the_pool(self):
+        with (
+            mock.patch.object(ticket_state_sync, "frappe") as frappe_mock,
+            mock.patch.object(ticket_state_sync.kpi_counters, "apply_states") as counters,
+            mock.patch.object(ticket_state_sync.unclaimed_pool, "apply_states") as pool,
+        ):
+            frappe_mock.local = types.SimpleNamespace()
+            after_commit = frappe_mock.db.after_commit = _Callbacks()
+            after_rollback = frappe_mock.db.after_rollback = _Callbacks()
+            frappe_mock.get_all.return_value = [_Row(name="T-2", status="Open", _assign="")]
+
+            ticket_state_sync.mark_ticket("T-1")
+            # frappe.db.rollback(): drop after_commit work, run after_rollback
+            after_commit.reset()
+            after_rollback.run()
+
+            ticket_state_sync.mark_ticket("T-2")
+            # frappe.db.commit(): drop after_rollback work, run after_commit
+            after_rollback.reset()
+            after_commit.run()
+
+        self.assertEqual(list(pool.call_args.args[0]), ["T-2"])
+        counters.assert_called_once_with(pool.call_args.args[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import json
+
+import frappe
+
+_TICKET_CHUNK = 500
+
+
+def parse_assign(raw) -> list[str]:
+    """HD Ticket._assign (JSON list, list, or a bare user) -> [user, ...]."""
+    if not raw:
+        return []
+
+    if isinstance(raw, list):
+        return [str(value).strip() for value in raw if str(value or "").strip()]
+
+    if isinstance(raw, str):
+        trimmed = raw.strip()
+
+        if not trimmed or trimmed == "[]":
+            return []
+
+        try:
+            parsed = json.loads(trimmed)
+        except Exception:
+            return [trimmed]
+
+        if isinstance(parsed, list):
+            return [str(value).strip() for value in parsed if str(value or "").strip()]
+
+        return [trimmed]
+
+    return []
+
+
+def get_open_todos(ticket_names) -> dict[str, list]:
+    """
+    {ticket: [ToDo row (name, allocated_to, creation), ...]} for Open ToDos, oldest first,
+    one IN query per 500 tickets. Tickets without an Open ToDo map to [].
+    """
+    names = sorted({(n or "").strip() for n in (ticket_names or []) if (n or "").strip()})
+    out = {name: [] for name in names}
+
+    for i in range(0, len(names), _TICKET_CHUNK):
+        rows = frappe.get_all(
+            "ToDo",
+            filters={
+                "reference_type": "HD Ticket",
+                "reference_name": ["in", names[i : i + _TICKET_CHUNK]],
+                "status": "Open",
+            },
+            fields=["name", "reference_name", "allocated_to", "creation"],
+            order_by="creation asc",
+            limit_page_length=0,
+            ignore_permissions=True,
+        )
+        for row in rows:
+            if row.reference_name in out:
+                out[row.reference_name].append(row)
+
+    return out
+
+
+def distinct_todo_users(todos) -> list[str]:
+    """Distinct allocated_to values, in ToDo order."""
+    users = []
+    for todo in todos or []:
+        user = (todo.get("allocated_to") or "").strip()
+        if user and user not in users:
+            users.append(user)
+    return users
+
+
+def get_open_todo_users(ticket_names) -> dict[str, list[str]]:
+    """{ticket: [allocated_to, ...]} from Open ToDos, oldest allocation first."""
+    return {name: distinct_todo_users(todos) for name, todos in get_open_todos(ticket_names).items()}
+
+
+def resolve_assignees(rows) -> dict[str, list[str]]:
+    """
+    {ticket: [user, ...]} for report rows carrying name and _assign.
+
+    _assign wins when set; rows with an empty _assign fall back to their Open ToDos,
+    resolved together in get_open_todo_users() instead of one ToDo query per row.
+    """
+    out = {}
+    missing = []
+
+    for row in rows:
+        name = row.get("name")
+        users = parse_assign(row.get("_assign"))
+        out[name] = users
+        if not users:
+            missing.append(name)
+
+    if missing:
+        for name, users in get_open_todo_users(missing).items():
+            out[name] = users
+
+    return out
@@ -0,0 +1,107 @@
+"""
+Shared lookups for one pass through the HD Ticket hook chain.
+
+before_insert -> validate (x8) -> after_insert -> on_update each used to re-read the same
+Location rows, Customer campus, roles and partner dispatch user. get_ticket_context(doc)
+returns one lazily-filled context memoised on doc.flags, so every hook in the same save
+shares the reads. release() (on_change, last in the chain) drops it so a later save of
+the same doc object starts fresh.
+
+Only reference data is memoised. ToDo / _assign state is written by the chain itself
+(and by native Assignment Rules), so hooks keep reading it from the database.
+"""
+
+import frappe
+
+FLAG = "telectro_ticket_context"
+
+LOCATION_FIELDS = ["name", "is_group", "parent_location", "lft", "rgt"]
+
+# Benchmark switch (scripts/bench_ticket_insert_queries.py): fresh context per call.
+DISABLED = False
+
+_MISSING = object()
+
+
+class TicketContext:
+    def __init__(self, doc):
+        self.doc = doc
+        self._locations = {}
+        self._customer_campus = {}
+        self._roles = {}
+        self._user_type = {}
+        self._exists = {}
+        self._memo = {}
+
+    def location(self, name):
+        """Location row (is_group, parent_location, lft, rgt) as _dict, or None."""
+        name = (name or "").strip()
+        if not name:
+            return None
+        row = self._locations.get(name, _MISSING)
+        if row is _MISSING:
+            row = frappe.db.get_value("Location", name, LOCATION_FIELDS, as_dict=True)
+            self._locations[name] = row
+        return row
+
+    def is_descendant(self, root_name, node_name) -> bool:
+        """Nested-set containment: node_name within root_name's subtree."""
+        root = self.location(root_name)
+        node = self.location(node_name)
+        if not root or not node:
+            return False
+        return node.lft >= root.lft and node.rgt <= root.rgt
+
+    def customer_default_campus(self, customer):
+        """Customer.custom_default_campus, or None (also when the Customer does not exist)."""
+        customer = (customer or "").strip()
+        if not customer:
+            return None
+        campus = self._customer_campus.get(customer, _MISSING)
+        if campus is _MISSING:
+            campus = frappe.db.get_value("Customer", customer, "custom_default_campus")
+            self._customer_campus[customer] = campus
+        return campus
+
+    def roles(self, user=None) -> set:
+        user = user or frappe.session.user
+        if user not in self._roles:
+            self._roles[user] = set(frappe.get_roles(user) or [])
+        return self._roles[user]
+
+    def user_type(self, user=None):
+        user = user or frappe.session.user
+        if user not in self._user_type:
+            self._user_type[user] = frappe.db.get_value("User", user, "user_type")
+        return self._user_type[user]
+
+    def exists(self, doctype, name) -> bool:
+        key = (doctype, name)
+        if key not in self._exists:
+            self._exists[key] = bool(frappe.db.exists(doctype, name))
+        return self._exists[key]
+
+    def memo(self, fn, *args):
+        """fn(*args) once per context, e.g. resolve_partner_dispatch_user. Exceptions are not memoised."""
+        key = (getattr(fn, "__qualname__", repr(fn)), args)
+        if key not in self._memo:
+            self._memo[key] = fn(*args)
+        return self._memo[key]
+
+
+def get_ticket_context(doc) -> TicketContext:
+    flags = getattr(doc, "flags", None)
+    if DISABLED or flags is None:
+        return TicketContext(doc)
+    ctx = flags.get(FLAG)
+    if ctx is None:
+        ctx = TicketContext(doc)
+        flags[FLAG] = ctx
+    return ctx
+
+
+def release(doc, method=None):
+    """doc_events hook (HD Ticket on_change): end of the save, drop the shared context."""
+    flags = getattr(doc, "flags", None)
+    if flags is not None:
+        flags.pop(FLAG, None)
@@ -0,0 +1,143 @@
+"""
+Shared active-ticket working set for the script reports.
+
+get_active_tickets() runs one select over non-terminal HD Tickets with every column the
+adopting reports use, text columns coalesced to '' and rows newest-modified first. Each
+caller gets its own row copies, so reports filter, decorate and bucket in memory.
+
+The rows are memoised on frappe.local for the rest of the request, and in Redis for
+SNAPSHOT_TTL_SECONDS so a workspace opening several reports at once shares one scan.
+HD Ticket and ToDo writes drop the Redis snapshot (ToDo changes rewrite _assign with
+db.set_value, which skips the HD Ticket hooks). telephony_report_snapshot_ttl_seconds = 0
+turns the Redis layer off.
+"""
+
+import frappe
+
+TERMINAL_STATUSES = ("Resolved", "Closed", "Archived")
+
+SNAPSHOT_KEY = "telephony:report_data:active_tickets"
+
+SNAPSHOT_TTL_SECONDS = 15
+
+_LOCAL_ATTR = "telectro_active_tickets"
+
+# Coalesced to '' so reports compare without ifnull() / None checks.
+TEXT_FIELDS = (
+    "subject",
+    "status",
+    "priority",
+    "custom_severity",
+    "customer",
+    "custom_customer",
+    "custom_site_group",
+    "custom_site",
+    "custom_fault_asset",
+    "custom_service_area",
+    "custom_request_source",
+    "custom_request_type",
+    "custom_fulfilment_party",
+    "custom_partner_acceptance_state",
+    "custom_partner_work_state",
+    "raised_by",
+    "agent_group",
+    "custom_equipment_ref",
+    "owner",
+    "_assign",
+)
+
+RAW_FIELDS = (
+    "name",
+    "via_customer_portal",
+    "custom_partner_accepted_on",
+    "custom_partner_work_completed",
+    "first_responded_on",
+    "response_by",
+    "resolution_by",
+    "resolution_date",
+    "creation",
+    "modified",
+)
+
+
+def _snapshot_ttl() -> int:
+    try:
+        value = frappe.conf.get("telephony_report_snapshot_ttl_seconds")
+    except Exception:
+        value = None
+    if value is None:
+        return SNAPSHOT_TTL_SECONDS
+    try:
+        return max(0, int(value))
+    except (TypeError, ValueError):
+        return SNAPSHOT_TTL_SECONDS
+
+
+def _select_sql() -> str:
+    columns = [f"t.{field}" for field in RAW_FIELDS]
+    columns += [f"coalesce(t.{field}, '') as {field}" for field in TEXT_FIELDS]
+    return f"""
+        select
+            {", ".join(columns)}
+        from `tabHD Ticket` t
+        where t.status not in %(terminal_statuses)s
+        order by t.modified desc
+    """
+
+
+def _query_rows() -> list[dict]:
+    rows = frappe.db.sql(
+        _select_sql(),
+        {"terminal_statuses": TERMINAL_STATUSES},
+        as_dict=True,
+    )
+    return [dict(row) for row in rows]
+
+
+def _load_rows() -> list[dict]:
+    rows = getattr(frappe.local, _LOCAL_ATTR, None)
+    if rows is not None:
+        return rows
+
+    ttl = _snapshot_ttl()
+    if ttl:
+        try:
+            rows = frappe.cache().get_value(SNAPSHOT_KEY)
+        except Exception:
+            rows = None
+
+    if rows is None:
+        rows = _query_rows()
+        if ttl:
+            try:
+                frappe.cache().set_value(SNAPSHOT_KEY, rows, expires_in_sec=ttl)
+            except Exception:
+                pass
+
+    setattr(frappe.local, _LOCAL_ATTR, rows)
+    return rows
+
+
+def get_active_tickets(predicate=None) -> list:
+    """Non-terminal HD Tickets (newest modified first) as fresh _dict copies, optionally filtered."""
+    return [
+        frappe._dict(row)
+        for row in _load_rows()
+        if predicate is None or predicate(row)
+    ]
+
+
+def invalidate(doc=None, method=None):
+    """doc_events hook (HD Ticket, ToDo): drop the shared snapshot."""
+    if doc is not None and doc.get("doctype") == "ToDo" and doc.get("reference_type") != "HD Ticket":
+        return
+
+    try:
+        delattr(frappe.local, _LOCAL_ATTR)
+    except AttributeError:
+        pass
+
+    try:
+        frappe.cache().delete_value(SNAPSHOT_KEY)
+    except Exception:
+        pass
@@ -0,0 +1,87 @@
+"""
+After-commit sync of the Redis ticket-state structures: the live KPI counters
+(telephony.kpi_counters) and the unclaimed pool (telephony.unclaimed_pool).
+
+Ticket writes mark the ticket: the HD Ticket and ToDo hooks, plus the assignment helpers
+that write _assign / ToDo status with db.set_value or raw SQL (claim, release, the
+assignment mirrors), which skip the hooks. Once the transaction commits, the marked
+tickets' STATE_FIELDS are read in one query and handed to each consumer, so a rolled-back
+write never reaches Redis and a ticket touched by several hooks is read once. A rollback
+drops the marks, and the next mark registers the callback again.
+"""
+
+import frappe
+
+from telephony import kpi_counters, unclaimed_pool
+
+STATE_FIELDS = (
+    "name",
+    "status",
+    "_assign",
+    "custom_fulfilment_party",
+    "custom_request_source",
+    "modified",
+)
+
+_LOCAL_ATTR = "telectro_ticket_state_marks"
+
+_TICKET_CHUNK = 500
+
+
+def mark_ticket(ticket: str):
+    """Queue a ticket for the Redis state sync once the current transaction commits."""
+    if not ticket:
+        return
+
+    pending = getattr(frappe.local, _LOCAL_ATTR, None)
+    if pending is None:
+        pending = set()
+        setattr(frappe.local, _LOCAL_ATTR, pending)
+        # rollback resets after_commit; dropping the marks lets the next write re-register
+        frappe.db.after_commit.add(flush)
+        frappe.db.after_rollback.add(discard)
+    pending.add(ticket)
+
+
+def discard():
+    """after_rollback callback: the marked writes never happened."""
+    try:
+        delattr(frappe.local, _LOCAL_ATTR)
+    except AttributeError:
+        pass
+
+
+def on_ticket_change(doc, method=None):
+    """doc_events hook (HD Ticket on_change / after_delete)."""
+    mark_ticket(doc.name)
+
+
+def on_todo_change(doc, method=None):
+    """doc_events hook (ToDo on_change / on_trash): ToDo sync rewrites the ticket's _assign."""
+    if doc.get("reference_type") == "HD Ticket":
+        mark_ticket(doc.get("reference_name"))
+
+
+def flush():
+    """after_commit callback: {ticket: state row, or None once deleted} to every consumer."""
+    pending = getattr(frappe.local, _LOCAL_ATTR, None) or set()
+    discard()
+
+    names = sorted(pending)
+    for i in range(0, len(names), _TICKET_CHUNK):
+        chunk = names[i : i + _TICKET_CHUNK]
+        states = {name: None for name in chunk}
+        for row in frappe.get_all(
+            "HD Ticket",
+            filters={"name": ["in", chunk]},
+            fields=list(STATE_FIELDS),
+            limit_page_length=0,
+            ignore_permissions=True,
+        ):
+            states[row.name] = row
+
+        for consumer in (kpi_counters.apply_states, unclaimed_pool.apply_states):
+            try:
+                consumer(states)
+            except Exception:
+                frappe.log_error(title="TELECTRO ticket state sync", message=frappe.get_traceback())
@@ -0,0 +1,132 @@
+"""
+Unclaimed pool: a Redis sorted set of unclaimed active HD Tickets, scored by the time
+each ticket entered the pool (epoch seconds).
+
+A ticket is in the pool while its status is Open/Replied and _assign is empty. After
+commit, telephony.ticket_state_sync passes the state of every ticket written in the
+transaction (claim, release, assignment sync, status changes); tickets that qualify are
+added with ZADD NX, so a ticket keeps its original entry time until it leaves the pool.
+
+"Unclaimed for at least N minutes" is then ZRANGEBYSCORE / ZCOUNT up to now - N, and
+pool entry replaces modified as the idle measure (comments and field edits no longer
+reset it). reconcile() (every 10 minutes) re-derives membership from SQL, logs drift and
+scores newly found tickets by modified. Readers get None until it has run once, and fall
+back to their SQL.
+"""
+
+import datetime
+
+import frappe
+from frappe.utils import get_datetime, now_datetime
+
+ACTIVE_STATUSES = ("Open", "Replied")
+
+POOL_KEY = "telephony:unclaimed_pool:entries"
+SEEDED_KEY = "telephony:unclaimed_pool:seeded"
+
+
+def in_pool(ticket) -> bool:
+    """Pool membership for one ticket state (dict/doc with status and _assign)."""
+    return (ticket.get("status") or "") in ACTIVE_STATUSES and (
+        (ticket.get("_assign") or "").strip() in ("", "[]")
+    )
+
+
+def _score(value) -> float:
+    return get_datetime(value).timestamp()
+
+
+def _is_seeded(cache) -> bool:
+    try:
+        return bool(cache.get(cache.make_key(SEEDED_KEY)))
+    except Exception:
+        return False
+
+
+def apply_states(states: dict):
+    """telephony.ticket_state_sync consumer: {ticket: state row or None}."""
+    if not states:
+        return
+
+    cache = frappe.cache()
+    key = cache.make_key(POOL_KEY)
+    now = _score(now_datetime())
+
+    pipe = cache.pipeline()
+    for name, row in states.items():
+        if row and in_pool(row):
+            pipe.zadd(key, {name: now}, nx=True)
+        else:
+            pipe.zrem(key, name)
+    pipe.execute()
+
+
+def get_entries(min_idle_minutes: int = 0):
+    """
+    [(ticket, entered_at datetime)] unclaimed for at least min_idle_minutes, longest
+    waiting first; None when the pool is not seeded (callers use their SQL instead).
+    """
+    cache = frappe.cache()
+    if not _is_seeded(cache):
+        return None
+
+    cutoff = _score(now_datetime()) - 60 * max(int(min_idle_minutes or 0), 0)
+    rows = cache.zrangebyscore(cache.make_key(POOL_KEY), "-inf", cutoff, withscores=True)
+    return [
+        (frappe.safe_decode(name), datetime.datetime.fromtimestamp(score))
+        for name, score in rows
+    ]
+
+
+def count_over(min_idle_minutes: int = 0):
+    """Pool size for tickets unclaimed at least min_idle_minutes, or None when not seeded."""
+    cache = frappe.cache()
+    if not _is_seeded(cache):
+        return None
+
+    cutoff = _score(now_datetime()) - 60 * max(int(min_idle_minutes or 0), 0)
+    return int(cache.zcount(cache.make_key(POOL_KEY), "-inf", cutoff))
+
+
+def idle_minutes(entered_at) -> int:
+    return max(int((now_datetime() - entered_at).total_seconds() // 60), 0)
+
+
+def reconcile() -> dict:
+    """
+    Scheduler job: make the pool match SQL. Members that no longer qualify are removed,
+    missing ones are added scored by modified; existing entry times are kept.
+    """
+    rows = frappe.db.sql(
+        """
+        select name, modified
+        from `tabHD Ticket`
+        where status in %(active)s
+          and ifnull(_assign, '') in ('', '[]')
+        """,
+        {"active": ACTIVE_STATUSES},
+        as_dict=True,
+    )
+    expected = {row.name: _score(row.modified) for row in rows}
+
+    cache = frappe.cache()
+    key = cache.make_key(POOL_KEY)
+    current = {frappe.safe_decode(name) for name in cache.zrange(key, 0, -1)}
+
+    stale = sorted(current - set(expected))
+    missing = {name: score for name, score in expected.items() if name not in current}
+
+    pipe = cache.pipeline(transaction=True)
+    if stale:
+        pipe.zrem(key, *stale)
+    if missing:
+        pipe.zadd(key, missing, nx=True)
+    pipe.set(cache.make_key(SEEDED_KEY), 1)
+    pipe.execute()
+
+    if stale or missing:
+        frappe.logger("telephony").warning(
+            "Unclaimed pool drift corrected: %s stale, %s missing", len(stale), len(missing)
+        )
+
+    return {"size": len(expected), "stale": len(stale), "missing": len(missing)}